@@ -1,9 +1,13 @@
 """Base app class for android applications."""
 import os
+import time
 from abc import ABCMeta, abstractmethod
 
 # import core modules
+from core.checkpoint import step_names
+from core.concurrency import ParallelExecutionError, run_in_parallel
 from core.devices.device import read_config_file
+from core.devices.device_factory import DeviceFactory
 from core.logger import get_logger
 
 LOGGER = get_logger().logger
@@ -12,6 +16,11 @@ LOGGER = get_logger().logger
 class BaseApp(metaclass=ABCMeta):
     """Base App Class."""
 
+    # Appium servers used when none are assigned. Its length is the number of devices required.
+    DEFAULT_SERVERS = ('SERVER_1',)
+    # Feature steps run by all_features, in order: (method name, keyword arguments).
+    FEATURES = ()
+
     def __enter__(self):
         """Setup Method."""
         return self
@@ -27,6 +36,153 @@ class BaseApp(metaclass=ABCMeta):
                                         'config',
                                         'app_config.yaml')
         self.config = read_config_file(self.config_path)
+        # Checkpoint recording the completed feature steps, set by the executor.
+        self.checkpoint = None
+
+    @staticmethod
+    def create_devices(device_type, app_name, servers):
+        """
+        Create one device per appium server concurrently.
+
+        :param device_type: str
+            'android' or 'ios'
+        :param app_name: str
+            Name of application. (Example: 'WhatsApp')
+        :param servers: list
+            Appium servers to connect to. (Example: ['SERVER_1', 'SERVER_2'])
+        :return: list
+            Devices in the order of servers.
+        :raises: ParallelExecutionError
+            Raises ParallelExecutionError with the error of every failed server, once the
+            devices created on the other servers are closed.
+        """
+        device_class = DeviceFactory.get_device_type(device_type)
+        try:
+            devices = run_in_parallel(lambda server: device_class(app_name, server), servers)
+        except ParallelExecutionError as exc:
+            for server, device in exc.results.items():
+                try:
+                    device.close_driver()
+                except Exception as err:  # pylint: disable=broad-except
+                    LOGGER.error('Could not close the device of {srv}: {err!r}'.format(srv=server, err=err))
+            raise
+        return [devices[server] for server in servers]
+
+    @property
+    def devices(self):
+        """
+        Return the devices of the application.
+
+        :return: list
+            Main device, then second device for applications using two.
+        """
+        return [device for device in (getattr(self, 'main_device', None), getattr(self, 'second_device', None))
+                if device is not None]
+
+    @staticmethod
+    def start_apps(*devices):
+        """
+        Open the application on all devices concurrently.
+
+        :param devices: Device
+            Devices on which the application has to be opened.
+        :return: None
+        :raises: ParallelExecutionError
+            Raises ParallelExecutionError with the error of every failed device.
+        """
+        run_in_parallel(lambda device: device.start_app(), devices)
+
+    @classmethod
+    def feature_steps(cls, names=None):
+        """
+        Return the named steps of FEATURES.
+
+        :param names: list
+            Names of the features to keep. Defaults to all of them.
+        :return: list
+            (step, method name, keyword arguments) in order. (Example: ('check_in', 'check_in', {}))
+        :raises: ValueError
+            Raises ValueError if a name is not a feature of the application.
+        """
+        unknown = set(names or ()) - {name for name, _kwargs in cls.FEATURES}
+        if unknown:
+            raise ValueError('Unknown features of {app}: {names}'.format(
+                app=cls.__name__, names=', '.join(sorted(unknown))))
+        return [(step, name, kwargs) for step, (name, kwargs) in zip(step_names(cls.FEATURES), cls.FEATURES)
+                if names is None or name in names]
+
+    def run_feature(self, name, **kwargs):
+        """
+        Run one feature method of the application.
+
+        :param name: str
+            Name of the feature method. (Example: 'put_status')
+        :param kwargs: dict
+            Keyword arguments of the feature method.
+        :return: tuple
+            Return value of the feature method and seconds taken by it.
+        """
+        start = time.monotonic()
+        output = getattr(self, name)(**kwargs)
+        return output, time.monotonic() - start
+
+    def run_features(self, names=None):
+        """
+        Run the feature steps of FEATURES in order.
+
+        The steps of FEATURES preceding the first step to run are passed to restore_state
+        first, so a run of selected features or a resumed run starts from the state those
+        steps leave. With a checkpoint, steps completed by a previous run are skipped, and
+        every completed step is recorded in the checkpoint.
+
+        :param names: list
+            Names of the features to run. Defaults to all of them.
+        :return: list
+            (step, seconds) of every step run.
+        :raises: ValueError
+            Raises ValueError if a name is not a feature of the application.
+        """
+        steps = self.feature_steps(names)
+        done = [step for step, _name, _kwargs in steps if self.checkpoint and self.checkpoint.is_done(step)]
+        pending = [step for step, _name, _kwargs in steps if step not in done]
+        if pending:
+            all_steps = [step for step, _name, _kwargs in self.feature_steps()]
+            preceding = all_steps[:all_steps.index(pending[0])]
+            if preceding:
+                self.restore_state(preceding)
+        results = []
+        for step, name, kwargs in steps:
+            if step in done:
+                LOGGER.info('Skipping step {step} completed by a previous run.'.format(step=step))
+                continue
+            output, seconds = self.run_feature(name, **kwargs)
+            if self.checkpoint:
+                self.checkpoint.complete(step, seconds, output)
+            results.append((step, seconds))
+        return results
+
+    def reset_state(self):
+        """
+        Bring the application back to the state it had right after it was started.
+
+        Restarts the application on all devices concurrently by default.
+
+        :return: None
+        :raises: ParallelExecutionError
+            Raises ParallelExecutionError with the error of every failed device.
+        """
+        run_in_parallel(lambda device: device.restart_app(), self.devices)
+
+    def restore_state(self, completed):
+        """
+        Bring the application to the state left by the steps preceding the first step to run.
+
+        Does nothing by default: the application has just been started.
+
+        :param completed: list
+            Names of the steps of FEATURES preceding the first step to run.
+        :return: None
+        """
 
     @abstractmethod
     def all_features(self):
@@ -1,8 +1,6 @@
 """Class for all messaging related applications."""
 from apps.base_app import BaseApp
 # Import core modules
-from core.devices.device import Device
-from core.devices.device_factory import DeviceFactory
 from core.logger import get_logger
 
 LOGGER = get_logger().logger
@@ -11,19 +9,20 @@ LOGGER = get_logger().logger
 class MessagingApp(BaseApp):
     """Class for all Messaging applications."""
 
-    def __init__(self, app_name, device_type):
+    DEFAULT_SERVERS = ('SERVER_1', 'SERVER_2')
+
+    def __init__(self, app_name, device_type, servers=None):
         """Initialization Method."""
         category = 'messaging'
         super().__init__(category, app_name.lower())
-        self.main_device = DeviceFactory.get_device_type(device_type)(app_name, 'SERVER_1')
-        self.second_device = DeviceFactory.get_device_type(device_type)(app_name, 'SERVER_2')
+        self.main_device, self.second_device = self.create_devices(
+            device_type, app_name, servers or self.DEFAULT_SERVERS)
         if not (self.main_device.driver and self.second_device.driver):
             LOGGER.error('Two drivers are required!')
             raise Exception('Two drivers are required!')
         self.main_device.contact = self.config['CONTACT'][self.main_device.mobile_name]
         self.second_device.contact = self.config['CONTACT'][self.second_device.mobile_name]
-        self.main_device.start_app()
-        self.second_device.start_app()
+        self.start_apps(self.main_device, self.second_device)
 
     def perform_chat(self):
         """Perform chat using two mobiles on application."""
@@ -50,4 +49,3 @@ class MessagingApp(BaseApp):
         """Exit method."""
         self.main_device.close_driver()
         self.second_device.close_driver()
-        Device.stop_appium()
@@ -1,13 +1,14 @@
 """WhatsApp class."""
+import asyncio
 import sys
 import time
 
-# Dependencies
-from selenium.common.exceptions import NoSuchElementException
-
 from apps.messaging.messaging import MessagingApp
 # Import core modules
+from core.concurrency import run_async_in_parallel
+from core.devices.wait import element_gone, element_present
 from core.logger import get_logger
+from core.tracing import trace_step
 
 LOGGER = get_logger().logger
 
@@ -15,10 +16,36 @@ LOGGER = get_logger().logger
 class WhatsApp(MessagingApp):
     """Class containing methods for WhatsApp application."""
 
-    def __init__(self, device_type):
+    FEATURES = (
+        ('put_status', {'duration': 10}),
+        ('open_chats', {}),
+        ('send_media_from_gallery', {}),
+        ('share_files', {}),
+        ('send_instant_media', {'duration': 10}),
+        ('perform_one_side_calls', {'duration': 7}),
+        ('perform_chat', {}),
+        ('make_call_two_mobiles', {'duration': 15})
+    )
+
+    def __init__(self, device_type, servers=None):
         """Initialization Method."""
         app_name = 'WhatsApp'
-        super().__init__(app_name, device_type)
+        super().__init__(app_name, device_type, servers)
+
+    def send_selected(self, element):
+        """
+        Open the preview of a media or document element and send it.
+
+        Waits for the send button of the preview after clicking the element, and for the
+        preview to close after sending.
+
+        :param element: obj
+            Element of the media or document to send.
+        :return: None
+        """
+        send = self.config['SEND']
+        self.main_device.click_and_settle(element, until=element_present('access', send))
+        self.main_device.click_element(el_type='access', text=send, until=element_gone('access', send))
 
     def upload_from_gallery(self, media_type, directory):
         """
@@ -31,12 +58,11 @@ class WhatsApp(MessagingApp):
         :return: None
         """
         self.main_device.click_using_class(text=directory)
-        self.main_device.click_element(el_type='xpath',
-                                       text=self.config['XPATH_GALLERY'].format(media=media_type))
-        time.sleep(3)
-        self.main_device.click_element(el_type='access', text=self.config['SEND'])
-        LOGGER.debug("{media} is sent!".format(media=media_type))
+        media = self.main_device.scroll_to_element(description=media_type, **self.config['GALLERY_MEDIA'])
+        self.send_selected(media)
+        LOGGER.debug("%s is sent!", media_type)
 
+    @trace_step
     def put_status(self, duration):
         """
         Triggers photo upload & clicking picture for status.
@@ -69,21 +95,11 @@ class WhatsApp(MessagingApp):
         :return: None
         """
         self.main_device.tap_screen(element='STATUS_BUTTON', config=self.config)
-        time.sleep(2)
-        i = 0
-        while i == 0:
-            try:
-                # pylint: disable=line-too-long
-                self.main_device.click_element(el_type='xpath',
-                                               text=self.config['XPATH_GALLERY'].format(media=media_type),
-                                               handle_error=False)
-                time.sleep(3)
-                break
-            except NoSuchElementException:
-                self.main_device.swipe_right(config=self.config)
-        self.main_device.click_element(el_type='access', text=self.config['SEND'])
-        LOGGER.debug("{media} status is set on {name}!".format(
-            media=media_type, name=self.main_device.mobile_name))
+        # The gallery strip of the status camera scrolls sideways.
+        media = self.main_device.scroll_to_element(description=media_type, horizontal=True,
+                                                   **self.config['GALLERY_MEDIA'])
+        self.send_selected(media)
+        LOGGER.debug("%s status is set on %s!", media_type, self.main_device.mobile_name)
 
     def live_media(self, media_type, vid_duration):
         """
@@ -106,8 +122,9 @@ class WhatsApp(MessagingApp):
             time.sleep(10)
 
         self.main_device.click_element(el_type='access', text=self.config['SEND'])
-        LOGGER.debug("Captured {media} sent!".format(media=media_type))
+        LOGGER.debug("Captured %s sent!", media_type)
 
+    @trace_step
     def send_media_from_gallery(self):
         """
         Attach photo & video from gallery and send to contact.
@@ -121,6 +138,7 @@ class WhatsApp(MessagingApp):
             self.main_device.click_using_class(text='Gallery')
             self.upload_from_gallery(media_type, self.config['FOLDER_DICT'][media_type])
 
+    @trace_step
     def send_instant_media(self, duration):
         """
         Record audio, click photo & capture live video using Camera button for sending to contact.
@@ -141,9 +159,10 @@ class WhatsApp(MessagingApp):
         for media in self.config['MEDIA_LIST']:
             camera = self.main_device.return_element(el_type='access',
                                                      text='Camera')
-            camera.click()
+            self.main_device.click_and_settle(camera)
             self.live_media(media, vid_duration=dur_milli_sec)
 
+    @trace_step
     def share_files(self):
         """
         Attach a document & send to contact.
@@ -154,28 +173,44 @@ class WhatsApp(MessagingApp):
         LOGGER.info("Preparing to send document from {name}".format(
             name=self.main_device.mobile_name))
         self.main_device.click_using_class(text='Document')
-        i = 0
-        while i == 0:
-            try:
-                self.main_device.click_using_class(text=self.config['DOC_FILE'])
-                self.main_device.click_element(el_type='access', text=self.config['SEND'])
-                LOGGER.debug("Document sent!")
-                i = 1
-            except NoSuchElementException:
-                self.main_device.swipe_up()
-                time.sleep(2)
+        document = self.main_device.scroll_to_element(text=self.config['DOC_FILE'],
+                                                      class_name='android.widget.TextView')
+        self.send_selected(document)
+        LOGGER.debug("Document sent!")
 
     @staticmethod
+    @trace_step
     def click_contact(dev_1, dev_2):
         """
         Click a contact and open chat.
 
         :return: None
         """
-        for dev in (dev_1, dev_2):
-            dev.click_using_class(text='CHATS', delay=5)  # Return to Chats Menu
-            dev.click_using_class(dev.contact)  # Open contact on mobile
+        async def open_chat(dev):
+            async with dev.async_session() as async_dev:
+                await async_dev.click_using_class(text='CHATS', delay=5)  # Return to Chats Menu
+                await async_dev.click_using_class(dev.contact)  # Open contact on mobile
+
+        # Both devices are driven concurrently from one event loop.
+        run_async_in_parallel(open_chat, (dev_1, dev_2))
+
+    def open_chats(self):
+        """Open the chat with the contact of the other mobile on both mobiles."""
+        WhatsApp.click_contact(self.main_device, self.second_device)
+
+    def restore_state(self, completed):
+        """
+        Reopen the chats on both mobiles when the steps to run follow 'open_chats'.
 
+        :param completed: list
+            Names of the steps of FEATURES preceding the first step to run.
+        :return: None
+        """
+        if 'open_chats' in completed:
+            LOGGER.info('Reopening chats before running the next steps.')
+            self.open_chats()
+
+    @trace_step
     def perform_one_side_calls(self, duration):
         """
         Give audio call & video call from secondary mobile. Main mobile will not attend the call.
@@ -187,6 +222,7 @@ class WhatsApp(MessagingApp):
         for call_type in self.config['CALL_LIST']:
             self.give_call(call_type, duration)
 
+    @trace_step
     def give_call(self, call_type, duration):
         """
         Initiate audio / video call & cut the call after specified duration.
@@ -205,6 +241,7 @@ class WhatsApp(MessagingApp):
         LOGGER.info("Closed {media} call!".format(media=call_type))
         time.sleep(4)
 
+    @trace_step
     def initiate_call(self, call_type):
         """
         Initiates the call from second mobile.
@@ -219,31 +256,48 @@ class WhatsApp(MessagingApp):
         LOGGER.info("Initiating WhatsApp {media} call now...".format(media=call_type))
         self.second_device.click_element(el_type='access', text=self.config['CALL_DICT'][call_type])
 
-    def accept_call(self, call_type, duration):
+    @trace_step
+    async def initiate_call_async(self, dev, call_type, _duration):
+        """
+        Initiate the call from a device using the asyncio client.
+
+        :param dev: device object
+            Device on which this action has to be performed.
+        :param call_type: str
+            'audio' or 'video'
+        :return: None
+        """
+        await asyncio.sleep(5)
+        async with dev.async_session() as async_dev:
+            LOGGER.info("Initiating WhatsApp {media} call now...".format(media=call_type))
+            await async_dev.click_element(el_type='access', text=self.config['CALL_DICT'][call_type])
+
+    @trace_step
+    async def accept_call_async(self, dev, call_type, duration):
         """
-        Accept incoming audio / video call from second mobile.
+        Wait for the incoming call on a device using the asyncio client and accept it.
 
+        :param dev: device object
+            Device on which this action has to be performed.
         :param call_type: str
             'audio' or 'video'
         :param duration: int
             Duration (in seconds) to keep the call alive
         :return: None
         """
-        while True:
-            try:
-                green_button = self.main_device.return_element(el_type='access',
-                                                               text=self.config['ACCEPT_CALL'])
-                self.main_device.press_long_and_slide(element=green_button,
-                                                      x_cord=self.config['END_CALL']['x'],
-                                                      y_cord=(self.config['END_CALL']['y'] - 300),
-                                                      hold_time=500)
-                time.sleep(duration)
-                LOGGER.info("Attended WhatsApp {media} call!".format(media=call_type))
-                self.main_device.tap_screen(element='END_CALL', config=self.config)
-                break
-            except NoSuchElementException:
-                LOGGER.info('Ringing...')
-
+        async with dev.async_session() as async_dev:
+            green_button = await async_dev.wait_for(
+                lambda device: device.return_element(el_type='access', text=self.config['ACCEPT_CALL']),
+                timeout=60, message='No incoming {media} call!'.format(media=call_type))
+            await async_dev.press_long_and_slide(element=green_button,
+                                                 x_cord=self.config['END_CALL']['x'],
+                                                 y_cord=(self.config['END_CALL']['y'] - 300),
+                                                 hold_time=500)
+            await asyncio.sleep(duration)
+            LOGGER.info("Attended WhatsApp {media} call!".format(media=call_type))
+            await async_dev.tap_screen(element='END_CALL', config=self.config)
+
+    @trace_step
     def perform_chat(self):
         """
         Peform Whatsapp chat using two devices.
@@ -252,23 +306,26 @@ class WhatsApp(MessagingApp):
         """
         LOGGER.info("Starting chat now..")
         time.sleep(3)
+        messages = list(self.config['CHAT_LIST']) * self.config.get('CHAT_REPEAT', 1)
         for mobile in (self.main_device, self.second_device):
-            for word in self.config['CHAT_LIST']:
-                mobile.click_using_class(search_text='Type a message', text=word, delay=1)
-                mobile.click_element(el_type='access', text=self.config['SEND'], delay=1)
+            mobile.send_messages(messages, field_text='Type a message', send_id=self.config['SEND'],
+                                 method=self.config.get('TEXT_ENTRY', 'auto'), delay=1)
         # Send emoji
         self.main_device.click_element(el_type='access', text='Emoji')
         LOGGER.info('Sending emoji...')
         local_dict = self.config['EMOJI']
         for row in (local_dict['y'], local_dict['y'] + 115):
-            for emoji in range(local_dict['x'], local_dict['x'] + 600, 120):
-                self.main_device.tap_screen(x_cord=emoji, y_cord=row)
-                LOGGER.info("pressed emoji button!")
-                time.sleep(2)
+            # All emoji of a row are tapped in a single request.
+            emojis = range(local_dict['x'], local_dict['x'] + 600, 120)
+            with self.main_device.actions() as batch:
+                for emoji in emojis:
+                    batch.tap(emoji, row).pause(100)
+            LOGGER.info("pressed {num} emoji buttons!".format(num=len(emojis)))
             self.main_device.click_element(el_type='access', text=self.config['SEND'], delay=1)
         self.main_device.press_back(2)
         LOGGER.debug("Chat Finished!")
 
+    @trace_step
     def make_call_two_mobiles(self, duration=15):
         """
         Second device will call & Main device will attend call for specified duration.
@@ -279,20 +336,15 @@ class WhatsApp(MessagingApp):
         """
         self.main_device.press_back(4)
         for call_type in self.config['CALL_LIST']:
-            self.initiate_call(call_type)
-            self.accept_call(call_type, duration)
+            # The main device waits for the ring while the second device is calling.
+            roles = {self.second_device: self.initiate_call_async,
+                     self.main_device: self.accept_call_async}
+            run_async_in_parallel(lambda dev, call=call_type: roles[dev](dev, call, duration), roles)
             if call_type == 'video':
                 self.main_device.tap_screen(element='END_CALL', config=self.config)
-            LOGGER.debug('{cal} call ended!'.format(cal=call_type))
+            LOGGER.debug('%s call ended!', call_type)
 
     def all_features(self):
         """Run all automation features of WhatsApp."""
         LOGGER.info('Starting WhatsApp automation now..!')
-        self.put_status(duration=10)
-        WhatsApp.click_contact(self.main_device, self.second_device)
-        self.send_media_from_gallery()
-        self.share_files()
-        self.send_instant_media(duration=10)
-        self.perform_one_side_calls(duration=7)
-        self.perform_chat()
-        self.make_call_two_mobiles(duration=15)
+        self.run_features()
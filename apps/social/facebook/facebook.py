@@ -7,6 +7,7 @@ from selenium.common.exceptions import NoSuchElementException
 from apps.social.social import SocialApp
 # Import core modules
 from core.logger import get_logger
+from core.tracing import trace_step
 
 LOGGER = get_logger().logger
 
@@ -15,12 +16,23 @@ class Facebook(SocialApp):
     """Class containing methods for Facebook application."""
 
     RAND_NUM = randint(0, 4)
-
-    def __init__(self, device_type):
+    FEATURES = (
+        ('send_friend_request', {}),
+        ('gallery_media_upload', {}),
+        ('go_live', {'duration': 10}),
+        ('instant_media_upload', {'duration': 10}),
+        ('check_in', {}),
+        ('watch_videos', {'duration': 20}),
+        ('like_comment_share', {}),
+        ('send_friend_request', {})
+    )
+
+    def __init__(self, device_type, servers=None):
         """Initialization Method."""
         app_name = 'Facebook'
-        super().__init__(app_name, device_type)
+        super().__init__(app_name, device_type, servers)
 
+    @trace_step
     def watch_videos(self, duration):
         """
         Watch videos for specified duration.
@@ -31,11 +43,12 @@ class Facebook(SocialApp):
         """
         LOGGER.info("Going to watch videos now...")
         self.main_device.tap_screen('MENU', config=self.config)  # Menu button
-        time.sleep(3)
-        self.main_device.click_element(el_type='access', text='Videos on Watch', delay=duration)
-        LOGGER.debug("Finished watching videos for {dur} seconds!".format(dur=duration))
+        self.main_device.click_element(el_type='access', text='Videos on Watch')
+        time.sleep(duration)
+        LOGGER.debug("Finished watching videos for %s seconds!", duration)
         self.main_device.press_back()
 
+    @trace_step
     def go_live(self, duration):
         """
         Capture video and go live on Facebook.
@@ -46,14 +59,15 @@ class Facebook(SocialApp):
         """
         self.main_device.click_element(el_type='xpath', text=self.config['LIVE_VIDEO'])
         LOGGER.info("Going to start live video...")
-        self.main_device.click_using_class(text='Start Live Video',
-                                           delay=duration)  # Start live video
-        self.main_device.click_using_class(text='FINISH', delay=(duration + 10),
-                                           is_button=True)  # Finish button
+        self.main_device.click_using_class(text='Start Live Video')  # Start live video
+        time.sleep(duration)
+        self.main_device.click_using_class(text='FINISH', is_button=True)  # Finish button
+        time.sleep(duration + 10)
         LOGGER.info("Live video finished.")
         self.main_device.click_using_class(text='SHARE', delay=5, is_button=True)  # Share button
         LOGGER.debug("Live video was shared!")
 
+    @trace_step
     def instant_media_upload(self, duration):
         """
         Capture live video, click picture and post on Facebook.
@@ -77,8 +91,9 @@ class Facebook(SocialApp):
                 time.sleep(2)
             self.main_device.click_using_class(text='DONE', delay=5)
             self.main_device.click_element(el_type='access', text=self.config['POST'])
-            LOGGER.debug("{med} Uploaded successfully!".format(med=media))
+            LOGGER.debug("%s Uploaded successfully!", media)
 
+    @trace_step
     def check_in(self):
         """
         Perform check-in of a location on Facebook.
@@ -100,6 +115,7 @@ class Facebook(SocialApp):
         self.main_device.tap_screen('RANDOM',
                                     config=self.config)  # Skip question about check-in
 
+    @trace_step
     def gallery_media_upload(self):
         """
         Upload photo and video from gallery on Facebook.
@@ -115,17 +131,20 @@ class Facebook(SocialApp):
                                            delay=7)
             self.main_device.click_element(el_type='access', text='NEXT', delay=7)
             self.main_device.click_element(el_type='access', text=self.config['POST'])
-            LOGGER.debug("{med} Uploaded successfully!".format(med=media))
+            LOGGER.debug("%s Uploaded successfully!", media)
 
+    @trace_step
     def like_comment_share(self):
         """
         Perform like, share & comment on posts on Facebook.
 
         :return: None
         """
-        for _11 in range(0, 5):  # _11 as dummy variable
+        for _11 in range(0, 5):  # _11 as dummy variable; moves on to another post on failure
             try:
-                self.main_device.click_using_class(text='Like')
+                like = self.main_device.scroll_to_element(text='Like', class_name='android.widget.TextView',
+                                                          max_swipes=5)
+                self.main_device.click_and_settle(like)
                 LOGGER.debug("Liked a post!")
                 self.main_device.click_using_class(text='Comment')
                 self.main_device.click_using_class(search_text='Write a comment…',
@@ -143,8 +162,11 @@ class Facebook(SocialApp):
                 break
             except NoSuchElementException:
                 self.main_device.swipe_up()
+        else:
+            LOGGER.error("Could not like, comment and share a post!")
         self.main_device.press_back()
 
+    @trace_step
     def send_friend_request(self):
         """
         Send a friend request. If request exists, cancel friend request.
@@ -168,11 +190,4 @@ class Facebook(SocialApp):
     def all_features(self):
         """Run all automation features of Facebook."""
         LOGGER.info("Starting Facebook automation now..!")
-        self.send_friend_request()
-        self.gallery_media_upload()
-        self.go_live(duration=10)
-        self.instant_media_upload(duration=10)
-        self.check_in()
-        self.watch_videos(duration=20)
-        self.like_comment_share()
-        self.send_friend_request()
+        self.run_features()
@@ -3,8 +3,6 @@ import sys
 
 from apps.base_app import BaseApp
 # Import core modules
-from core.devices.device import Device
-from core.devices.device_factory import DeviceFactory
 from core.logger import get_logger
 
 LOGGER = get_logger().logger
@@ -13,15 +11,18 @@ LOGGER = get_logger().logger
 class StreamingApp(BaseApp):
     """Class for all Streaming applications."""
 
-    def __init__(self, app_name, device_type):
+    DEFAULT_SERVERS = ('SERVER_1',)
+
+    def __init__(self, app_name, device_type, servers=None):
         """Initialization Method."""
         category = 'streaming'
         super().__init__(category, app_name.lower())
-        self.main_device = DeviceFactory.get_device_type(device_type)(app_name, 'SERVER_1')
+        self.main_device, = self.create_devices(device_type, app_name,
+                                                servers or self.DEFAULT_SERVERS)
         if not self.main_device.driver:
             LOGGER.error('Driver was not created! Exiting now!')
             sys.exit(1)
-        self.main_device.start_app()
+        self.start_apps(self.main_device)
 
     def watch_videos(self, num_vid, duration=10):
         """Watch videos on application."""
@@ -38,4 +39,3 @@ class StreamingApp(BaseApp):
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Exit method."""
         self.main_device.close_driver()
-        Device.stop_appium()
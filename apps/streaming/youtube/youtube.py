@@ -8,6 +8,7 @@ from selenium.common.exceptions import NoSuchElementException
 from apps.streaming.streaming import StreamingApp
 # Import Core modules
 from core.logger import get_logger
+from core.tracing import trace_step
 
 LOGGER = get_logger().logger
 
@@ -16,13 +17,20 @@ class YouTube(StreamingApp):
     """Class containing methods for YouTube application."""
 
     RAND_NUM = randint(0, 4)
-
-    def __init__(self, device_type):
+    FEATURES = (
+        ('upload_video', {'duration': 2}),
+        ('click_tabs_and_scroll_through', {}),
+        ('watch_videos', {'num_vid': 2, 'duration': 20}),
+        ('share_download_save', {})
+    )
+
+    def __init__(self, device_type, servers=None):
         """Initialization Method."""
         app_name = 'YouTube'
-        super().__init__(app_name, device_type)
+        super().__init__(app_name, device_type, servers)
         self.main_device.contact = self.config['CONTACT'][self.main_device.mobile_name]
 
+    @trace_step
     def upload_video(self, duration):
         """
         Upload video on Youtube by recording live video.
@@ -37,33 +45,34 @@ class YouTube(StreamingApp):
         try:
             record_circle = self.main_device.return_element(el_type='id',
                                                             text=self.config['RECORD_CIRCLE'])
-            record_circle.click()  # Start Record
+            self.main_device.click_and_settle(record_circle)  # Start Record
             time.sleep(duration)
-            record_circle.click()  # Stop Record
+            self.main_device.click_and_settle(record_circle)  # Stop Record
             time.sleep(duration + 10)
         except NoSuchElementException:
             self.main_device.tap_screen(x_cord=276, y_cord=1771)
             time.sleep(duration)
-            self.main_device.return_button(text='Stop', class_name='GLButton').click()
-            time.sleep(3)
+            self.main_device.click_and_settle(self.main_device.return_button(text='Stop',
+                                                                             class_name='GLButton'))
             self.main_device.click_using_class(text='OK')
         self.main_device.click_using_class(text='UPLOAD', delay=10)
         LOGGER.debug("Uploaded video!")
         self.main_device.press_back()
 
+    @trace_step
     def click_tabs_and_scroll_through(self):
         """
         Click different tabs present in Youtube and scroll through them.
 
         :return: None
         """
+        # The tap and scrolls of each tab are sent as one gesture sequence; pauses let the tab load.
         for button in self.config['BUTTONS']:
-            self.main_device.tap_screen(button, config=self.config)
-            LOGGER.debug("Pressed {but} button. Scrolling now..".format(but=button))
-            time.sleep(2)
-            for __11 in range(0, 4):  # _11 as dummy variable
-                self.main_device.swipe_up()
-                time.sleep(1)
+            LOGGER.debug("Pressing %s button and scrolling..", button)
+            with self.main_device.actions() as batch:
+                batch.tap_element(button, self.config).pause(1000)
+                for __11 in range(0, 4):  # _11 as dummy variable
+                    batch.swipe_up().pause(1000)
         # Return to home screen
         self.main_device.tap_screen('HOME', config=self.config)
 
@@ -73,9 +82,7 @@ class YouTube(StreamingApp):
 
         :return: None
         """
-        bounds_list = self.main_device.return_element(el_type='xpath',
-                                                      text=self.config['CLICK_VIDEO'],
-                                                      bounds=True)
+        bounds_list = self.main_device.scroll_to_element(**self.config['NEXT_VIDEO']).get_attribute('bounds')
         x_cor = bounds_list[1:5]
         y_cor = bounds_list[(-5):(-1)]
 
@@ -91,6 +98,7 @@ class YouTube(StreamingApp):
 
         self.main_device.tap_screen(x_cord=x_cor, y_cord=y_cor)
 
+    @trace_step
     def watch_videos(self, num_vid, duration=10):
         """
         Search and watch videos on Youtube.
@@ -111,10 +119,11 @@ class YouTube(StreamingApp):
             try:
                 self.click_next_video()
                 vid_count += 1
-                LOGGER.debug("Playing video {num}!".format(num=vid_count))
+                LOGGER.debug("Playing video %s!", vid_count)
                 time.sleep(duration)
             except NoSuchElementException:
-                self.main_device.swipe_up()
+                LOGGER.error("No further video found after scrolling!")
+                break
             # To skip app advertisement and live chat
             element = self.main_device.return_button('Live chat')
             if element:
@@ -123,10 +132,11 @@ class YouTube(StreamingApp):
                 try:
                     ad_panel = self.main_device.return_element(el_type='access',
                                                                text='Close ad panel')
-                    ad_panel.click()
+                    self.main_device.click_and_settle(ad_panel)
                 except NoSuchElementException:
                     continue
 
+    @trace_step
     def share_download_save(self):
         """
         Share Youtube video link on Whatsapp. Download and save videos.
@@ -138,15 +148,14 @@ class YouTube(StreamingApp):
         count_download = 0
         duration = 10
         # Share, Download and Save to Watchlist
-        elements = self.main_device.return_textview_elements()
-        for button in elements:
+        labels = self.main_device.snapshot().texts('android.widget.TextView')
+        for label in labels:
             if count_share > 0 and count_save > 0 and count_download > 0:
                 break
 
-            if count_share == 0 and button.text == 'Share':
+            if count_share == 0 and label == 'Share':
                 LOGGER.info("Going to share video...")
-                button.click()
-                time.sleep(duration - 3)
+                self.main_device.click_using_class(text=label, delay=duration - 3)
                 try:
                     self.main_device.click_using_class(text='WhatsApp')
                 except NoSuchElementException:
@@ -160,26 +169,23 @@ class YouTube(StreamingApp):
                 self.main_device.press_back(2)
                 count_share += 1
 
-            if count_save == 0 and button.text == 'Save':
+            if count_save == 0 and label == 'Save':
                 LOGGER.info("Going to save video...")
-                button.click()
+                self.main_device.click_using_class(text=label, delay=duration + 5)
                 LOGGER.debug('Saved video!')
-                time.sleep(duration + 5)
                 count_save += 1
 
-            if count_download == 0 and button.text == 'Download':
+            if count_download == 0 and label == 'Download':
                 LOGGER.info("Going to download video...")
-                button.click()
+                self.main_device.click_using_class(text=label)
                 LOGGER.debug('Downloaded video!')
                 time.sleep(duration + duration)
                 count_download += 1
 
-            if count_download == 0 and button.text == 'Downloaded':
+            if count_download == 0 and label == 'Downloaded':
                 LOGGER.info('This video has already been downloaded! '
                             'Will download another video now')
-                self.main_device.swipe_up()
-                time.sleep(2)
-                self.main_device.click_element(el_type='xpath', text=self.config['CLICK_VIDEO'])
+                self.main_device.click_and_settle(self.main_device.scroll_to_element(**self.config['NEXT_VIDEO']))
                 LOGGER.info("Going to download video...")
                 self.main_device.click_using_class(text='Download')
                 count_download += 1
@@ -190,7 +196,4 @@ class YouTube(StreamingApp):
     def all_features(self):
         """Run all automation features of Youtube."""
         LOGGER.info("Starting YouTube automation now..!")
-        self.upload_video(duration=2)
-        self.click_tabs_and_scroll_through()
-        self.watch_videos(num_vid=2, duration=20)
-        self.share_download_save()
+        self.run_features()
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark.py - benchmark device primitives and app flows against fake appium servers.
+
+Fake appium servers (core.devices.fake_appium) are started on the ports of the appium
+server config, so no phone is needed and results only depend on the framework code.
+The run stops if a configured port is already taken, so a server left from an earlier
+run is never measured in place of the current code. Sleeps are virtualized: time.sleep
+and asyncio.sleep return at once and advance a virtual clock which time.monotonic
+follows, so waits and deadlines behave as in a real run without idling.
+
+    return_element[access|id|xpath]  single lookup per locator strategy
+    return_button                    snapshot fetch and lookup of a TextView
+    click_using_class                lookup, click and settle
+    tap_screen                       coordinate tap and settle
+    swipe_up                         swipe gesture
+    read_config_file[cold|warm]      app config with and without the in-memory cache
+    all_features[WhatsApp|...]       full feature run of each app
+
+Results are appended to a JSON history file; 'compare' flags benchmarks whose median
+got slower than a threshold.
+
+Usage:
+python bin/benchmark.py run --repeat 20
+python bin/benchmark.py compare --threshold 10
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+os.environ.setdefault('basedir', BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+# Import core modules
+# pylint: disable=wrong-import-position
+from core.config import clear_config_cache, read_config_file  # noqa: E402
+from core.devices.appium_server import is_server_ready, stop_server  # noqa: E402
+from core.devices.command_metrics import COMMAND_METRICS  # noqa: E402
+from core.devices.wait import Waiter  # noqa: E402
+from core.executor import get_device_inventory  # noqa: E402
+
+HISTORY_FILE = os.path.join(BASE_DIR, 'logs', 'benchmarks', 'benchmark_history.json')
+SERVER_CONFIG = os.path.join(BASE_DIR, 'core', 'devices', 'appium_server_config.yaml')
+APP_CLASSES = {
+    'WhatsApp': ('apps.messaging.whatsapp.whatsapp', 'WhatsApp'),
+    'Facebook': ('apps.social.facebook.facebook', 'Facebook'),
+    'YouTube': ('apps.streaming.youtube.youtube', 'YouTube')
+}
+WHATSAPP_CONFIG = os.path.join(BASE_DIR, 'apps', 'messaging', 'whatsapp', 'config', 'app_config.yaml')
+
+
+class VirtualClock:
+    """Replace sleeping by advancing a virtual clock followed by time.monotonic."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.offset = 0.0
+        self._lock = threading.Lock()
+        self._originals = None
+
+    def _advance(self, seconds):
+        """Advance the virtual clock."""
+        with self._lock:
+            self.offset += max(seconds, 0)
+
+    def _sleep(self, seconds):
+        """Replacement of time.sleep."""
+        self._advance(seconds)
+
+    async def _async_sleep(self, delay, result=None):
+        """Replacement of asyncio.sleep, still yielding to the event loop."""
+        self._advance(delay)
+        await self._originals[2](0)
+        return result
+
+    def _monotonic(self):
+        """Replacement of time.monotonic."""
+        return self._originals[1]() + self.offset
+
+    def install(self):
+        """Patch time.sleep, time.monotonic and asyncio.sleep."""
+        self._originals = (time.sleep, time.monotonic, asyncio.sleep)
+        time.sleep, time.monotonic, asyncio.sleep = self._sleep, self._monotonic, self._async_sleep
+
+    def uninstall(self):
+        """Restore time.sleep, time.monotonic and asyncio.sleep."""
+        time.sleep, time.monotonic, asyncio.sleep = self._originals
+
+
+def port_in_use(port):
+    """Return 'True' if a server already listens on the local port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(('127.0.0.1', port))
+        except OSError:
+            return True
+    return False
+
+
+def start_fake_server(url, latency, wait_config):
+    """
+    Start a fake appium server process on the port of a WebDriver url and wait until it is ready.
+
+    :return: subprocess.Popen
+    :raises: RuntimeError
+        Raises RuntimeError if the port is taken, e.g. by a server left from an earlier run,
+        or if the server process exits.
+    """
+    port = urlsplit(url).port
+    if port_in_use(port):
+        raise RuntimeError('Port {port} is already in use. Stop the server listening on it, '
+                           'the benchmark would measure it instead.'.format(port=port))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'core.devices.fake_appium', '-a', '127.0.0.1', '-p', str(port),
+         '--latency', str(latency)], cwd=BASE_DIR, env=dict(os.environ, PYTHONPATH=BASE_DIR),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    waiter = Waiter(None, wait_config, ignored_exceptions=(OSError, ValueError))
+    try:
+        waiter.until(lambda _device: process.poll() is not None or is_server_ready(url),
+                     timeout=waiter.server_ready_timeout,
+                     message='Fake appium server at {url} is not ready!'.format(url=url))
+    except BaseException:
+        stop_server(process)
+        raise
+    if process.poll() is not None:
+        raise RuntimeError('Fake appium server at {url} exited with code {code}.'.format(
+            url=url, code=process.returncode))
+    return process
+
+
+def start_fake_servers(latency):
+    """
+    Start a fake appium server process for every server of the appium server config.
+
+    :param latency: float
+        Seconds added by the servers to every command.
+    :return: list
+        Server processes.
+    """
+    config = read_config_file(SERVER_CONFIG)
+    processes = []
+    try:
+        for name in get_device_inventory(config):
+            processes.append(start_fake_server(config[name]['URL'], latency, config.get('WAIT')))
+    except BaseException:
+        for process in processes:
+            stop_server(process)
+        raise
+    return processes
+
+
+def measure(func, repeat, clock):
+    """
+    Call func 'repeat' times.
+
+    :return: dict
+        Wall time statistics in milliseconds, driver commands and virtual sleep per call.
+    """
+    samples = []
+    COMMAND_METRICS.reset()
+    slept = clock.offset
+    for _11 in range(repeat):  # _11 as dummy variable
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    commands = sum(summary['count'] for commands in COMMAND_METRICS.to_dict().values()
+                   for summary in commands.values())
+    return {
+        'rounds': repeat,
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'min_ms': round(min(samples), 3),
+        'stdev_ms': round(statistics.stdev(samples), 3) if repeat > 1 else 0.0,
+        'commands': round(commands / repeat, 1),
+        'virtual_sleep_s': round((clock.offset - slept) / repeat, 3)
+    }
+
+
+def primitive_benchmarks():
+    """
+    Open the chat of a contact on a WhatsApp device and return the primitive benchmarks.
+
+    :return: tuple
+        Device and list of (name, callable).
+    """
+    from core.devices.device_factory import DeviceFactory  # pylint: disable=import-outside-toplevel
+    config = read_config_file(WHATSAPP_CONFIG)
+    device = DeviceFactory.get_device_type('android')('WhatsApp', 'SERVER_1')
+    device.start_app()
+    device.click_using_class(text='CHATS')
+    device.click_using_class(text=config['CONTACT']['MOBILE_2'])
+
+    def return_button():
+        device.invalidate_snapshot()
+        device.return_button('Document')
+
+    def read_config_cold():
+        clear_config_cache()
+        read_config_file(WHATSAPP_CONFIG)
+
+    return device, [
+        ('return_element[access]', lambda: device.return_element(el_type='access', text='Attach')),
+        ('return_element[id]', lambda: device.return_element(el_type='id', text='com.whatsapp:id/entry')),
+        ('return_element[xpath]', lambda: device.return_element(
+            el_type='xpath', text='(//android.widget.ImageView[@content-desc="Photo"])[2]')),
+        ('return_button', return_button),
+        ('click_using_class', lambda: device.click_using_class(text='Gallery')),
+        ('tap_screen', lambda: device.tap_screen(x_cord=540, y_cord=700)),
+        ('swipe_up', device.swipe_up),
+        ('read_config_file[cold]', read_config_cold),
+        ('read_config_file[warm]', lambda: read_config_file(WHATSAPP_CONFIG))
+    ]
+
+
+def app_benchmark(app_name):
+    """Return a callable running all features of an app, as Executor.run_app does."""
+    from importlib import import_module  # pylint: disable=import-outside-toplevel
+    module_name, class_name = APP_CLASSES[app_name]
+    app_class = getattr(import_module(module_name), class_name)
+
+    def _run():
+        with app_class('android') as app:
+            app.all_features()
+    return _run
+
+
+def run(args):
+    """Run the selected benchmarks and append the results to the history file."""
+    from core.devices.device import Device  # pylint: disable=import-outside-toplevel
+    selected = set(args.only.split(',')) if args.only else None
+    processes = start_fake_servers(args.latency)
+    clock = VirtualClock()
+    clock.install()
+    results = {}
+    try:
+        device, benchmarks = primitive_benchmarks()
+        benchmarks += [('all_features[{app}]'.format(app=app), app_benchmark(app)) for app in APP_CLASSES]
+        for name, func in benchmarks:
+            if selected and name not in selected and name.split('[')[0] not in selected:
+                continue
+            repeat = args.app_repeat if name.startswith('all_features') else args.repeat
+            results[name] = measure(func, repeat, clock)
+            print('{name: <28} {ms: >10.3f} ms  ({cmd} commands, {sl}s virtual sleep)'.format(
+                name=name, ms=results[name]['median_ms'], cmd=results[name]['commands'],
+                sl=results[name]['virtual_sleep_s']))
+        device.close_driver()
+    finally:
+        clock.uninstall()
+        Device.stop_appium()
+        for process in processes:
+            stop_server(process)
+
+    history = load_history(args.history)
+    history.append({'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': sys.version.split()[0], 'commit': git_commit(),
+                    'latency': args.latency, 'results': results})
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    with open(args.history, 'w') as stream:
+        json.dump(history, stream, indent=2)
+    print('Results appended to {path}'.format(path=args.history))
+
+
+def git_commit():
+    """Return the short hash of the checked out commit, 'None' outside of a git repository."""
+    proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL, universal_newlines=True, check=False)
+    return proc.stdout.strip() or None
+
+
+def load_history(path):
+    """Return the entries of a history file, an empty list if it does not exist."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as stream:
+        return json.load(stream)
+
+
+def compare(args):
+    """
+    Compare the latest history entry to a baseline entry.
+
+    :return: int
+        Exit code: 1 if any benchmark regressed beyond the threshold.
+    """
+    history = load_history(args.history)
+    if len(history) < 2:
+        print('Need at least two runs in {path} to compare.'.format(path=args.history))
+        return 0
+    baseline, current = history[args.baseline], history[-1]
+    print('Baseline {bt} ({bc}) -> current {ct} ({cc})'.format(
+        bt=baseline['timestamp'], bc=baseline.get('commit'), ct=current['timestamp'], cc=current.get('commit')))
+    regressions = 0
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            print('{name: <28} {ms: >10.3f} ms  (new)'.format(name=name, ms=result['median_ms']))
+            continue
+        delta = result['median_ms'] - before['median_ms']
+        change = (delta / before['median_ms'] * 100) if before['median_ms'] else 0.0
+        regressed = change > args.threshold and delta > args.min_delta_ms
+        regressions += regressed
+        print('{name: <28} {old: >10.3f} -> {new: >10.3f} ms  {chg:+7.1f}%{flag}'.format(
+            name=name, old=before['median_ms'], new=result['median_ms'], chg=change,
+            flag='  REGRESSION' if regressed else ''))
+    if regressions:
+        print('{num} benchmark(s) slower than the {th}% threshold.'.format(num=regressions, th=args.threshold))
+    return 1 if regressions else 0
+
+
+def main():
+    """Parse arguments and run the requested command."""
+    parser = argparse.ArgumentParser(description='Benchmark device primitives and app flows.')
+    parser.add_argument('--history', default=HISTORY_FILE, help='JSON history file of the results.')
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='Run benchmarks and append the results to the history.')
+    run_parser.add_argument('--repeat', type=int, default=20, help='Rounds of each primitive benchmark.')
+    run_parser.add_argument('--app-repeat', type=int, default=3, help='Rounds of each app benchmark.')
+    run_parser.add_argument('--only', default=None,
+                            help='Comma separated benchmarks to run. (Example: return_element,swipe_up)')
+    run_parser.add_argument('--latency', type=float, default=0.0,
+                            help='Seconds added by the fake servers to every command.')
+    compare_parser = commands.add_parser('compare', help='Flag regressions of the latest run.')
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help='Slowdown of the median, in percent, flagged as regression.')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                                help='Slowdowns smaller than this are never flagged.')
+    compare_parser.add_argument('--baseline', type=int, default=-2,
+                                help='History index of the baseline run. Defaults to the previous run.')
+    args = parser.parse_args()
+    if args.command == 'compare':
+        sys.exit(compare(args))
+    if args.command == 'run':
+        run(args)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+startup_benchmark.py - measure startup cost of run.py.
+
+Every measurement runs in a fresh interpreter and is repeated to report the median:
+    help           wall time of 'python run.py --help'
+    import_run     cumulative import time of run.py ('python -X importtime')
+    import_backend cumulative import time of run.py plus the android backend
+    first_command  time from interpreter launch until the first request to the
+                   appium server ('/status') has completed
+
+Results are appended to a JSON history file so numbers can be tracked across changes.
+
+Usage:
+python bin/startup_benchmark.py --url http://localhost:4723/wd/hub
+"""
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+IMPORT_TIME_REGEX = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+BACKEND_SNIPPET = ('import run\n'
+                   'from core.devices.device_factory import DeviceFactory\n'
+                   'DeviceFactory.get_device_type("android")\n')
+FIRST_COMMAND_SNIPPET = ('import os, sys, time\n'
+                         'os.environ["basedir"] = {base!r}\n'
+                         'import run\n'
+                         'from core.executor import Executor\n'
+                         'from core.devices.device_factory import DeviceFactory\n'
+                         'from core.devices.appium_server import is_server_ready\n'
+                         'executor = Executor({{"app": {app!r}, "device_type": "android"}})\n'
+                         'executor.get_app_class(executor.app_name)\n'
+                         'DeviceFactory.get_device_type("android")\n'
+                         'try:\n'
+                         '    is_server_ready({url!r})\n'
+                         'except OSError:\n'
+                         '    sys.exit(3)\n')
+
+
+def parse_import_time(stderr, first_module='run'):
+    """
+    Parse 'python -X importtime' output, ignoring imports done by interpreter startup.
+
+    :param stderr: str
+        Standard error of the interpreter.
+    :param first_module: str
+        First top-level module imported by the measured code.
+    :return: tuple
+        Total cumulative microseconds of top-level imports from first_module on,
+        and the ten modules with the highest self time.
+    """
+    total = 0
+    modules = []
+    started = False
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if not match:
+            continue
+        own, cumulative = int(match.group(1)), int(match.group(2))
+        nesting, name = len(match.group(3)), match.group(4)
+        modules.append((own, name))
+        if nesting == 1:
+            # importtime prints a module after its children, so a top-level line closes a group.
+            started = started or name == first_module
+            if started:
+                total += cumulative
+            else:
+                modules = []
+    return total, [name for _own, name in sorted(modules, reverse=True)[:10]]
+
+
+def run_python(args, env=None):
+    """
+    Run a fresh interpreter from the base directory.
+
+    :param args: list
+        Arguments to the interpreter.
+    :param env: dict
+        Extra environment variables.
+    :return: tuple
+        Wall time in seconds and completed process.
+    """
+    full_env = dict(os.environ, PYTHONPATH=BASE_DIR, basedir=BASE_DIR, **(env or {}))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=BASE_DIR, env=full_env,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=False)
+    return time.perf_counter() - start, proc
+
+
+def measure(repeat, url, app):
+    """
+    Take every measurement 'repeat' times.
+
+    :return: dict
+        Median of each measurement in milliseconds, with the slowest imports.
+    """
+    samples = {'help': [], 'import_run': [], 'import_backend': [], 'first_command': []}
+    slowest = []
+    first_command_ok = True
+    for _11 in range(repeat):  # _11 as dummy variable
+        samples['help'].append(run_python(['run.py', '--help'])[0])
+        _wall, proc = run_python(['-X', 'importtime', '-c', 'import run'])
+        total, slowest = parse_import_time(proc.stderr)
+        samples['import_run'].append(total / 1e6)
+        _wall, proc = run_python(['-X', 'importtime', '-c', BACKEND_SNIPPET])
+        samples['import_backend'].append(parse_import_time(proc.stderr)[0] / 1e6)
+        wall, proc = run_python(['-c', FIRST_COMMAND_SNIPPET.format(base=BASE_DIR, app=app,
+                                                                    url=url)])
+        first_command_ok = first_command_ok and proc.returncode == 0
+        samples['first_command'].append(wall)
+    result = {name: round(statistics.median(values) * 1000, 2) for name, values in samples.items()}
+    result['first_command_reached_server'] = first_command_ok
+    result['slowest_imports'] = slowest
+    return result
+
+
+def main():
+    """Parse arguments, measure and append to the history file."""
+    parser = argparse.ArgumentParser(description='Measure startup time of run.py.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs per measurement.')
+    parser.add_argument('--url', default='http://localhost:4723/wd/hub',
+                        help='WebDriver url of the appium server used for first_command.')
+    parser.add_argument('--app', default='whatsapp', help='App resolved before first command.')
+    parser.add_argument('--history', default=os.path.join(BASE_DIR, 'logs', 'benchmarks',
+                                                          'startup_history.json'),
+                        help='JSON file where results are appended.')
+    args = parser.parse_args()
+
+    result = measure(args.repeat, args.url, args.app)
+    result['timestamp'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    result['python'] = sys.version.split()[0]
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history) as stream:
+            history = json.load(stream)
+    previous = history[-1] if history else None
+    history.append(result)
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    with open(args.history, 'w') as stream:
+        json.dump(history, stream, indent=2)
+
+    for name in ('help', 'import_run', 'import_backend', 'first_command'):
+        change = ''
+        if previous and previous.get(name):
+            change = ' ({pct:+.1f}%)'.format(pct=(result[name] / previous[name] - 1) * 100)
+        print('{name: <16} {ms: >10.2f} ms{chg}'.format(name=name, ms=result[name], chg=change))
+    if not result['first_command_reached_server']:
+        print('WARNING: appium server at {url} was not reachable; first_command only covers '
+              'startup up to the first request.'.format(url=args.url))
+    print('Slowest imports: ' + ', '.join(result['slowest_imports']))
+
+
+if __name__ == '__main__':
+    main()
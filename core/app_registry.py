@@ -0,0 +1,227 @@
+"""
+Registry of automated applications.
+
+The registry maps every app listed in 'core/app_categories.yaml' to its category,
+module, class and metadata. It is built by reading the app sources with 'ast', so
+no app code is imported, and cached in 'logs/app_registry.json' until a source or
+the category file changes.
+
+Usage:
+python -m core.app_registry
+"""
+import ast
+import json
+import os
+import threading
+
+# Import core modules
+from core.config import read_config_file
+from core.logger import get_logger
+
+__all__ = ('AppRegistry', 'get_app_registry')
+LOGGER = get_logger().logger
+
+REGISTRY_VERSION = 1
+DEFAULT_DEVICE_COUNT = 1
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _class_attributes(tree):
+    """
+    Return base class names and 'DEFAULT_SERVERS' length of every class of a module.
+
+    :param tree: ast.Module
+    :return: dict
+        {class name: (list of base names, device count or None)}
+    """
+    classes = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [base.id if isinstance(base, ast.Name) else getattr(base, 'attr', '')
+                 for base in node.bases]
+        device_count = None
+        for stmt in node.body:
+            if isinstance(stmt, ast.Assign) and isinstance(stmt.value, (ast.Tuple, ast.List)) and \
+                    any(getattr(target, 'id', None) == 'DEFAULT_SERVERS' for target in stmt.targets):
+                device_count = len(stmt.value.elts)
+        classes[node.name] = (bases, device_count)
+    return classes
+
+
+def _parse(path):
+    """Parse a python source file, returning an empty module if it is missing."""
+    if not os.path.exists(path):
+        return ast.Module(body=[], type_ignores=[])
+    with open(path) as stream:
+        return ast.parse(stream.read(), filename=path)
+
+
+class AppRegistry:
+    """Name to category, module, class and metadata index of the apps."""
+
+    def __init__(self, base_dir, apps=None, stamp=None):
+        """
+        Initialization Method.
+
+        :param base_dir: str
+            Base directory of the framework.
+        :param apps: dict
+            Metadata of each app keyed by lower case app name.
+        :param stamp: list
+            Modification times of the sources the registry was built from.
+        """
+        self.base_dir = base_dir
+        self.apps = apps or {}
+        self.stamp = stamp
+
+    @property
+    def categories_file(self):
+        """Property getter for the path of 'app_categories.yaml'."""
+        return os.path.join(self.base_dir, 'core', 'app_categories.yaml')
+
+    @property
+    def cache_file(self):
+        """Property getter for the path of the cached registry."""
+        return os.path.join(self.base_dir, 'logs', 'app_registry.json')
+
+    def _sources(self, categories):
+        """Return every file the registry depends on."""
+        sources = [self.categories_file, os.path.join(self.base_dir, 'apps', 'base_app.py')]
+        for category, app_names in categories.items():
+            sources.append(os.path.join(self.base_dir, 'apps', category, category + '.py'))
+            sources.extend(os.path.join(self.base_dir, 'apps', category, app, app + '.py')
+                           for app in app_names)
+        return sources
+
+    @staticmethod
+    def _stamp(sources):
+        """Return modification times of sources, 0 for missing ones."""
+        return [[path, os.stat(path).st_mtime_ns if os.path.exists(path) else 0]
+                for path in sources]
+
+    def build(self):
+        """
+        Scan the apps listed in 'app_categories.yaml' without importing them.
+
+        :return: AppRegistry
+        """
+        categories = read_config_file(self.categories_file)
+        apps = {}
+        for category, app_names in categories.items():
+            category_classes = _class_attributes(
+                _parse(os.path.join(self.base_dir, 'apps', category, category + '.py')))
+            for app in app_names:
+                app_classes = _class_attributes(
+                    _parse(os.path.join(self.base_dir, 'apps', category, app, app + '.py')))
+                class_name = next((name for name in app_classes if name.lower() == app), None)
+                if class_name is None:
+                    LOGGER.error('Cannot find class name for {app}'.format(app=app))
+                    continue
+                bases, device_count = app_classes[class_name]
+                for base in bases:
+                    if device_count is None and base in category_classes:
+                        device_count = category_classes[base][1]
+                apps[app] = {
+                    'name': app,
+                    'category': category,
+                    'module': '.'.join(['apps', category, app, app]),
+                    'class': class_name,
+                    'device_count': device_count or DEFAULT_DEVICE_COUNT,
+                    'config': os.path.join('apps', category, app, 'config', 'app_config.yaml')
+                }
+        self.apps = apps
+        self.stamp = self._stamp(self._sources(categories))
+        return self
+
+    def is_stale(self):
+        """
+        Check whether any source changed since the registry was built.
+
+        :return: Boolean
+        """
+        if self.stamp is None:
+            return True
+        return self._stamp([path for path, _mtime in self.stamp]) != self.stamp
+
+    def save(self):
+        """
+        Write the registry to its cache file. Failures are only logged.
+
+        :return: None
+        """
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w') as stream:
+                json.dump({'version': REGISTRY_VERSION, 'stamp': self.stamp, 'apps': self.apps},
+                          stream, indent=2)
+        except OSError as exc:
+            LOGGER.debug('Could not write app registry: %s', exc)
+
+    @classmethod
+    def load(cls, base_dir):
+        """
+        Return the cached registry, rebuilding it if it is missing or stale.
+
+        :param base_dir: str
+            Base directory of the framework.
+        :return: AppRegistry
+        """
+        registry = cls(base_dir)
+        try:
+            with open(registry.cache_file) as stream:
+                cached = json.load(stream)
+            if cached.get('version') == REGISTRY_VERSION:
+                registry = cls(base_dir, cached['apps'], cached['stamp'])
+        except (OSError, ValueError, KeyError):
+            pass
+        if registry.is_stale():
+            registry.build().save()
+        return registry
+
+    def get(self, app_name):
+        """
+        Return metadata of an app.
+
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :return: dict
+            'None' if the app is not registered.
+        """
+        return self.apps.get(app_name.lower())
+
+    def category_apps(self, category):
+        """
+        Return names of the apps of a category.
+
+        :param category: str
+            (Example: 'social')
+        :return: list
+        """
+        return [name for name, app in self.apps.items() if app['category'] == category]
+
+    @property
+    def categories(self):
+        """Property getter for the names of all categories."""
+        return sorted({app['category'] for app in self.apps.values()})
+
+
+def get_app_registry():
+    """
+    Return the registry of this process, loading it on first use.
+
+    :return: AppRegistry
+    """
+    global _REGISTRY  # pylint: disable=global-statement
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = AppRegistry.load(os.environ['basedir'])
+        return _REGISTRY
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('basedir', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), os.pardir)))
+    print(json.dumps(get_app_registry().apps, indent=2))
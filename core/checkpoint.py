@@ -0,0 +1,132 @@
+"""
+Checkpoint of the feature steps completed by an app run.
+
+The steps of an app are the entries of its FEATURES, named after the feature method
+with '#<n>' appended to repeated methods. (Example: 'send_friend_request#2')
+Runs with '--checkpoint' or '--resume' write each completed step to
+'logs/checkpoints/<app>.json' with its duration and output as soon as it ends, so a
+run failing deep in its features can be resumed from the first incomplete step with
+'--resume'.
+"""
+import json
+import os
+import time
+
+# Import core modules
+from core.logger import get_logger
+
+__all__ = ('Checkpoint', 'step_names')
+LOGGER = get_logger().logger
+
+
+def step_names(features):
+    """
+    Return the step name of every feature entry.
+
+    :param features: tuple
+        FEATURES of an app: (method name, keyword arguments).
+    :return: list
+        (Example: ['send_friend_request', 'check_in', 'send_friend_request#2'])
+    """
+    seen = {}
+    names = []
+    for name, _kwargs in features:
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else '{name}#{num}'.format(name=name, num=seen[name]))
+    return names
+
+
+class Checkpoint:
+    """Completed steps of an app run, persisted after every step."""
+
+    def __init__(self, app_name, steps, directory=None):
+        """
+        Initialization Method.
+
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :param steps: list
+            Names of the steps of the run, in order.
+        :param directory: str
+            Directory of the checkpoint file. Defaults to 'logs/checkpoints'.
+        """
+        self.app_name = app_name
+        self.steps = list(steps)
+        self.completed = {}
+        directory = directory or os.path.join(os.environ['basedir'], 'logs', 'checkpoints')
+        self.path = os.path.join(directory, '{app}.json'.format(app=app_name))
+
+    def load(self):
+        """
+        Take the completed steps of the checkpoint file of a previous run.
+
+        Checkpoints of runs with other steps, or which completed all of their steps,
+        are ignored, so the run starts from its first step.
+
+        :return: list
+            Names of the completed steps.
+        """
+        try:
+            with open(self.path) as stream:
+                data = json.load(stream)
+        except (OSError, ValueError):
+            LOGGER.info('No checkpoint to resume {app} from.'.format(app=self.app_name))
+            return []
+        if data.get('steps') != self.steps:
+            LOGGER.warning('Checkpoint {path} was written for other steps, starting {app} '
+                           'from the first step.'.format(path=self.path, app=self.app_name))
+            return []
+        if data.get('status') == 'completed':
+            LOGGER.info('Checkpoint {path} is complete, starting {app} from the first step.'.format(
+                path=self.path, app=self.app_name))
+            return []
+        self.completed = data.get('completed', {})
+        LOGGER.info('Resuming {app} after {num} completed step(s): {steps}'.format(
+            app=self.app_name, num=len(self.completed), steps=', '.join(self.completed)))
+        return list(self.completed)
+
+    def is_done(self, step):
+        """
+        Return 'True' if the step completed in this or the resumed run.
+
+        :param step: str
+        :return: Boolean
+        """
+        return step in self.completed
+
+    def complete(self, step, seconds, output=None):
+        """
+        Record a completed step and write the checkpoint file.
+
+        :param step: str
+            Name of the step.
+        :param seconds: float
+            Duration of the step.
+        :param output: object
+            Return value of the feature method, stored as its repr if not JSON serializable.
+        :return: None
+        """
+        try:
+            json.dumps(output)
+        except (TypeError, ValueError):
+            output = repr(output)
+        self.completed[step] = {'seconds': round(seconds, 3), 'output': output,
+                                'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.save()
+
+    def save(self):
+        """
+        Write the checkpoint file, replacing the previous one at once.
+
+        :return: None
+        """
+        status = 'completed' if all(step in self.completed for step in self.steps) else 'incomplete'
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w') as stream:
+                json.dump({'app': self.app_name, 'status': status, 'steps': self.steps,
+                           'completed': self.completed}, stream, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as exc:
+            LOGGER.error('Could not write checkpoint {path}: {err}'.format(path=self.path, err=exc))
@@ -0,0 +1,99 @@
+"""Helpers to run device operations concurrently."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# Import core modules
+from core.logger import get_logger
+
+__all__ = ('ParallelExecutionError', 'run_in_parallel', 'run_async_in_parallel')
+LOGGER = get_logger().logger
+
+
+class ParallelExecutionError(Exception):
+    """Raised when one or more of the concurrent tasks failed."""
+
+    def __init__(self, errors, results=None):
+        """
+        Initialization Method.
+
+        :param errors: dict
+            Exception raised for each failed item, keyed by item.
+        :param results: dict
+            Result of each item which succeeded, keyed by item, so it can be cleaned up.
+        """
+        self.errors = errors
+        self.results = results or {}
+        super().__init__('Failed for {items}: {errs}'.format(
+            items=', '.join(str(item) for item in errors),
+            errs='; '.join('{it}: {er!r}'.format(it=item, er=err) for item, err in errors.items())))
+
+
+def run_in_parallel(func, items, max_workers=None):
+    """
+    Call func for every item on a thread pool and wait for all of them.
+
+    Errors of all items are collected before raising, so one failing item does
+    not hide the state of the others.
+
+    :param func: callable
+        Function accepting a single item.
+    :param items: iterable
+        Items to process. Each item must be hashable. (Example: 'SERVER_1')
+    :param max_workers: int
+        Size of the thread pool. Defaults to one thread per item.
+    :return: dict
+        Result of func keyed by item.
+    :raises: ParallelExecutionError
+        Raises ParallelExecutionError if func failed for any item.
+    """
+    items = list(items)
+    if not items:
+        return {}
+    results = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(items)) as pool:
+        futures = {item: pool.submit(func, item) for item in items}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except BaseException as err:  # pylint: disable=broad-except
+                LOGGER.error('Failed for {item}: {err!r}'.format(item=item, err=err))
+                errors[item] = err
+    if errors:
+        raise ParallelExecutionError(errors, results)
+    return results
+
+
+def run_async_in_parallel(func, items):
+    """
+    Await func for every item on one event loop and wait for all of them.
+
+    Errors of all items are collected before raising, like run_in_parallel.
+
+    :param func: callable
+        Coroutine function accepting a single item.
+    :param items: iterable
+        Items to process. Each item must be hashable. (Example: a device)
+    :return: dict
+        Result of func keyed by item.
+    :raises: ParallelExecutionError
+        Raises ParallelExecutionError if func failed for any item.
+    """
+    items = list(items)
+    if not items:
+        return {}
+
+    async def _gather():
+        return await asyncio.gather(*(func(item) for item in items), return_exceptions=True)
+
+    results = {}
+    errors = {}
+    for item, result in zip(items, asyncio.run(_gather())):
+        if isinstance(result, BaseException):
+            LOGGER.error('Failed for {item}: {err!r}'.format(item=item, err=result))
+            errors[item] = result
+        else:
+            results[item] = result
+    if errors:
+        raise ParallelExecutionError(errors, results)
+    return results
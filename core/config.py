@@ -0,0 +1,164 @@
+"""Process wide cache of YAML configuration files."""
+import hashlib
+import json
+import os
+import sys
+import threading
+from types import MappingProxyType
+
+import yaml
+
+from core.logger import get_logger
+
+__all__ = ('read_config_file', 'thaw', 'clear_config_cache', 'CONFIG_CACHE_DIR_ENV')
+LOGGER = get_logger().logger
+
+# Directory for precompiled (JSON) configs. The disk cache is off when unset.
+CONFIG_CACHE_DIR_ENV = 'APPIUM_CONFIG_CACHE_DIR'
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+_CONFIG_CACHE = {}
+_CONFIG_CACHE_LOCK = threading.Lock()
+
+
+def _freeze(value):
+    """
+    Return a read-only view of parsed YAML data.
+
+    :param value: object
+        Parsed YAML data.
+    :return: object
+        Mappings become MappingProxyType and lists become tuples, recursively.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(val) for key, val in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
+def thaw(value):
+    """
+    Return a mutable deep copy of a config value returned by read_config_file.
+
+    :param value: object
+        Config value. (Example: config['SERVER_1']['DESIRED_CAP'])
+    :return: object
+        Mappings become dict and tuples become lists, recursively.
+    """
+    if isinstance(value, (dict, MappingProxyType)):
+        return {key: thaw(val) for key, val in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(val) for val in value]
+    return value
+
+
+def _disk_cache_path(config_file):
+    """
+    Return path of the precompiled config, 'None' if the disk cache is disabled.
+
+    The cache directory is created private to the user. A directory owned by another
+    user disables the disk cache, since its files could have been planted.
+
+    :param config_file: str
+        Path of the YAML file.
+    :return: str
+    """
+    cache_dir = os.environ.get(CONFIG_CACHE_DIR_ENV)
+    if not cache_dir:
+        return None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        owner = os.stat(cache_dir).st_uid
+    except OSError as exc:
+        LOGGER.debug('Config cache directory %s is not usable: %s', cache_dir, exc)
+        return None
+    if hasattr(os, 'getuid') and owner != os.getuid():
+        LOGGER.warning('Ignoring config cache directory {dir} owned by another user.'.format(dir=cache_dir))
+        return None
+    digest = hashlib.sha1(os.path.abspath(config_file).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, digest + '.json')
+
+
+def _load_from_disk(config_file, stamp):
+    """Return data of a precompiled config matching stamp, 'None' otherwise."""
+    cache_path = _disk_cache_path(config_file)
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path) as stream:
+            cached = json.load(stream)
+        cached_stamp, data = cached['stamp'], cached['data']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return data if tuple(cached_stamp) == stamp else None
+
+
+def _store_on_disk(config_file, stamp, data):
+    """
+    Write a precompiled config. Failures only disable the disk cache for this file.
+
+    Data which JSON does not keep as is (Example: integer keys, dates) is not cached.
+    """
+    cache_path = _disk_cache_path(config_file)
+    if not cache_path:
+        return
+    try:
+        text = json.dumps({'stamp': stamp, 'data': data})
+    except (TypeError, ValueError):
+        return
+    if json.loads(text)['data'] != data:
+        return
+    tmp_path = '{path}.{pid}.tmp'.format(path=cache_path, pid=os.getpid())
+    try:
+        with open(tmp_path, 'w') as stream:
+            stream.write(text)
+        os.replace(tmp_path, cache_path)
+    except OSError as exc:
+        LOGGER.debug('Could not write config cache for %s: %s', config_file, exc)
+
+
+def read_config_file(config_file):
+    """
+    Read YAML file and return dictionary with values.
+
+    Parsed files are cached for the process and reused until their modification
+    time or size changes. The returned mappings are read-only and shared between
+    callers; use thaw() to get a mutable copy.
+
+    :param config_file: str
+        Name of YAML file to be read.
+    :return: MappingProxyType
+        Configuration dictionary created after reading YAML file
+    """
+    stat = os.stat(config_file)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _CONFIG_CACHE_LOCK:
+        cached = _CONFIG_CACHE.get(config_file)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    data = _load_from_disk(config_file, stamp)
+    if data is None:
+        try:
+            with open(config_file) as stream:
+                data = yaml.load(stream, Loader=YAML_LOADER)
+        except yaml.YAMLError as exc:
+            LOGGER.error('Encountered some ERROR while trying to load {fl}'.format(fl=config_file))
+            LOGGER.error(str(exc))
+            sys.exit(1)
+        _store_on_disk(config_file, stamp, data)
+    config_dict = _freeze(data)
+    with _CONFIG_CACHE_LOCK:
+        _CONFIG_CACHE[config_file] = (stamp, config_dict)
+    return config_dict
+
+
+def clear_config_cache():
+    """
+    Forget every cached config of this process.
+
+    :return: None
+    """
+    with _CONFIG_CACHE_LOCK:
+        _CONFIG_CACHE.clear()
@@ -1,7 +1,19 @@
 """Initialization Method."""
-from core.devices.device import Device
-from core.devices.android_device import AndroidDevice
-from core.devices.ios_device import IOSDevice
-from core.devices.device_factory import DeviceFactory
+from importlib import import_module
 
 __all__ = ('Device', 'AndroidDevice', 'IOSDevice', 'DeviceFactory')
+
+# Device backends pull in appium & selenium, so they are only imported on first use.
+_LAZY_ATTRIBUTES = {
+    'Device': 'core.devices.device',
+    'AndroidDevice': 'core.devices.android_device',
+    'IOSDevice': 'core.devices.ios_device',
+    'DeviceFactory': 'core.devices.device_factory'
+}
+
+
+def __getattr__(name):
+    """Import the module of a public attribute when it is first accessed."""
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError('module {mod!r} has no attribute {name!r}'.format(mod=__name__, name=name))
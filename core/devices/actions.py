@@ -0,0 +1,177 @@
+"""Batch of touch gestures sent to the device as one W3C actions request."""
+
+__all__ = ('ActionBatch',)
+
+TAP_HOLD_MS = 50
+
+
+class ActionBatch:
+    """
+    Collect taps, swipes, long presses and pauses and perform them in a single request.
+
+    Usage:
+        with device.actions() as batch:
+            batch.tap(100, 200).pause(500).swipe_up()
+    """
+
+    def __init__(self, device, settle_delay=2):
+        """
+        Initialization Method.
+
+        :param device: Device
+            Device on which the gestures are performed.
+        :param settle_delay: int
+            Delay in seconds to wait for the screen after performing.
+        """
+        self.device = device
+        self.settle_delay = settle_delay
+        self._actions = []
+
+    def __enter__(self):
+        """Setup Method."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Perform the collected gestures unless the block raised."""
+        if exc_type is None:
+            self.perform()
+
+    def __len__(self):
+        """Return the number of collected W3C pointer actions."""
+        return len(self._actions)
+
+    def _move(self, x_cord, y_cord, duration=0):
+        """Append a pointer move to the coordinates."""
+        self._actions.append({'type': 'pointerMove', 'duration': int(duration),
+                              'x': int(x_cord), 'y': int(y_cord), 'origin': 'viewport'})
+
+    def _press(self, x_cord, y_cord, hold_time):
+        """Append a press held for hold_time milli-seconds, without releasing."""
+        self._move(x_cord, y_cord)
+        self._actions.append({'type': 'pointerDown', 'button': 0})
+        self._actions.append({'type': 'pause', 'duration': int(hold_time)})
+
+    def _release(self):
+        """Append the release of the pointer."""
+        self._actions.append({'type': 'pointerUp', 'button': 0})
+
+    def tap(self, x_cord, y_cord):
+        """
+        Add a tap on coordinates.
+
+        :param x_cord: int
+            X coordinate to tap.
+        :param y_cord: int
+            Y coordinate to tap.
+        :return: ActionBatch
+        """
+        self._press(x_cord, y_cord, TAP_HOLD_MS)
+        self._release()
+        return self
+
+    def tap_element(self, element, config):
+        """
+        Add a tap on an element whose coordinates are in the app config.
+
+        :param element: str
+            Key of the element in config. (Example: 'HOME', 'SEARCH')
+        :param config: dict
+            Config dictionary of particular app.
+        :return: ActionBatch
+        """
+        return self.tap(config[element]['x'], config[element]['y'])
+
+    def long_press(self, x_cord, y_cord, hold_time):
+        """
+        Add a long press on coordinates.
+
+        :param x_cord: int
+            X coordinate of the press.
+        :param y_cord: int
+            Y coordinate of the press.
+        :param hold_time: int
+            Duration (in milli-seconds) of the press.
+        :return: ActionBatch
+        """
+        self._press(x_cord, y_cord, hold_time)
+        self._release()
+        return self
+
+    def swipe(self, start_x, start_y, end_x, end_y, duration=1000):
+        """
+        Add a swipe between two points.
+
+        :param duration: int
+            Duration (in milli-seconds) of the swipe. Defaults to 1000.
+        :return: ActionBatch
+        """
+        self._press(start_x, start_y, 0)
+        self._move(end_x, end_y, duration)
+        self._release()
+        return self
+
+    def press_and_slide(self, start_x, start_y, end_x, end_y, hold_time):
+        """
+        Add a long press on a point followed by a slide to another one, like Device.press_long_and_slide.
+
+        :param hold_time: int
+            Duration (in milli-seconds) of the press before sliding.
+        :return: ActionBatch
+        """
+        self._press(start_x, start_y, hold_time)
+        self._move(end_x, end_y)
+        self._release()
+        return self
+
+    def swipe_up(self):
+        """
+        Add a swipe scrolling the screen down, like Device.swipe_up.
+
+        :return: ActionBatch
+        """
+        return self.swipe(self.device.x_cord, self.device.start_y,
+                          self.device.x_cord, self.device.end_y)
+
+    def swipe_right(self, config):
+        """
+        Add a swipe moving the screen right, like Device.swipe_right.
+
+        :param config: dict
+            Config dictionary of particular app with 'SWIPE_RIGHT' coordinates.
+        :return: ActionBatch
+        """
+        return self.swipe(config['SWIPE_RIGHT']['x'], config['SWIPE_RIGHT']['y'],
+                          config['SWIPE_RIGHT']['x'] - 400, config['SWIPE_RIGHT']['y'])
+
+    def pause(self, duration):
+        """
+        Add a pause between gestures.
+
+        :param duration: int
+            Duration (in milli-seconds) of the pause.
+        :return: ActionBatch
+        """
+        self._actions.append({'type': 'pause', 'duration': int(duration)})
+        return self
+
+    def payload(self):
+        """
+        Return the W3C 'actions' request body for the collected gestures.
+
+        :return: dict
+        """
+        return {'actions': [{'type': 'pointer',
+                             'id': 'finger1',
+                             'parameters': {'pointerType': 'touch'},
+                             'actions': list(self._actions)}]}
+
+    def perform(self):
+        """
+        Send all collected gestures to the device in one request and clear the batch.
+
+        :return: None
+        """
+        if not self._actions:
+            return
+        self.device.perform_actions(self.payload(), delay=self.settle_delay)
+        self._actions = []
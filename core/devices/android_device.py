@@ -1,30 +1,57 @@
 """Android Device class for performing actions on android app."""
-import os
-import subprocess
 import sys
 import time
+from contextlib import asynccontextmanager
 
 # Import Dependencies
 from appium import webdriver
 from appium.webdriver.common.touch_action import TouchAction
-from selenium.common.exceptions import WebDriverException, NoSuchElementException
+from selenium.common.exceptions import (WebDriverException, NoSuchElementException,
+                                        StaleElementReferenceException)
+from selenium.webdriver.remote.command import Command
 
 # Import core modules
+from core.config import thaw
+from core.devices.appium_server import is_server_ready, start_server, wait_for_server
+from core.devices.async_driver import AsyncAndroidDevice, AsyncWebDriver
+from core.devices.command_metrics import COMMAND_METRICS
 from core.devices.device import Device
+from core.devices.recording import RECORDER
+from core.devices.server_pool import PoolClient, PoolError
+from core.devices.session_cache import SESSION_CACHE
+from core.devices.ui_snapshot import invalidates_snapshot, ui_selector
+from core.devices.wait import WaitTimeoutError, activity_changed, element_present
 from core.logger import get_logger
+from core.tracing import TRACER
 
 LOGGER = get_logger().logger
 
 KEY_CODE_DICT = {
     'enter': 66,
-    'search': 84
+    'search': 84,
+    'paste': 279
 }
+# Text entry mechanisms, fastest first. 'auto' tries them in this order.
+TEXT_ENTRY_METHODS = ('set_value', 'clipboard', 'adb', 'send_keys')
+
+
+def _adb_text(value):
+    """
+    Escape a value for 'adb shell input text'.
+
+    :param value: str
+    :return: str
+    """
+    escaped = ''.join('\\' + char if char in '()<>|;&*~"\'`$\\?#' else char for char in value)
+    return escaped.replace(' ', '%s')
 
 
 # pylint: disable=too-many-instance-attributes
 class AndroidDevice(Device):
     """Android driver class."""
 
+    NOT_FOUND_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
     def __init__(self, app_name, app_server):
         """Initialization Method."""
         super().__init__(app_name)
@@ -32,6 +59,12 @@ class AndroidDevice(Device):
         self.touch = None
         self.mobile_name = None
         self.contact = None
+        self.server_startup_time = None
+        self.pool_client = PoolClient(self.config.get('SERVER_POOL'))
+        self.server_url = None
+        self.desired_cap = None
+        self.session_reused = False
+        self.text_entry_method = None
         self.create_driver(app_server)
 
     def create_driver(self, app_server):
@@ -45,42 +78,155 @@ class AndroidDevice(Device):
         """
         config = self.config[app_server]
 
-        cmd = config['CMD']
-        server_name = config['NAME']
-        log_file_name = config['LOG_FILE_NAME']
-        full_log_path = os.path.join(os.environ['basedir'], 'logs', 'appium', log_file_name)
-        url = config['URL']
-        desired_cap = config['DESIRED_CAP']
+        url = self.server_url = config['URL']
+        desired_cap = self.desired_cap = thaw(config['DESIRED_CAP'])
         self.mobile_name = config['MOBILE_NAME']
 
-        with open(full_log_path, "w") as file:
-            subprocess.Popen(cmd, shell=True, stdout=file, stderr=subprocess.STDOUT)
-        LOGGER.info("{name} started !".format(name=server_name))
+        session = SESSION_CACHE.acquire(url, desired_cap, check=lambda drv: drv.current_activity)
+        if session:
+            self.pool_client = session.owner
+            if session.driver:
+                self.driver = self.instrument(session.driver)
+                self.touch = TouchAction(self.driver)
+                self.session_reused = True
+                LOGGER.info("Reusing session on {mob}".format(mob=self.mobile_name))
+                return
+        else:
+            self.start_appium(app_server)
         try:
-            self.driver = webdriver.Remote(url, desired_cap)
+            self.driver = self.instrument(webdriver.Remote(url, desired_cap))
             self.touch = TouchAction(self.driver)
             LOGGER.info("Connected to {mob}".format(mob=self.mobile_name))
         except WebDriverException:
             LOGGER.error("{dev} is not connected!".format(
                 dev=self.mobile_name))
-        time.sleep(3)
 
+    def instrument(self, driver):
+        """
+        Record latency metrics, trace events and the session recording of every command of the driver.
+
+        :param driver: WebDriver
+        :return: WebDriver
+        """
+        RECORDER.instrument(driver, self.mobile_name)
+        return TRACER.instrument(COMMAND_METRICS.instrument(driver, self.mobile_name),
+                                 self.mobile_name)
+
+    def start_appium(self, app_server):
+        """
+        Lease the appium server from the pool, or launch it if no pool is running.
+
+        :param app_server: str
+            'SERVER_1' or 'SERVER_2'
+        :return: None
+        """
+        config = self.config[app_server]
+        server_name = config['NAME']
+        try:
+            pooled_url = self.pool_client.lease(app_server)
+        except PoolError as exc:
+            LOGGER.error("Could not lease {name} from pool: {err}".format(name=server_name, err=exc))
+            return
+        if pooled_url:
+            LOGGER.info("{name} leased from pool!".format(name=server_name))
+            return
+        try:
+            if is_server_ready(config['URL']):
+                # Started outside the framework, e.g. core.devices.fake_appium.
+                LOGGER.info("{name} is already running!".format(name=server_name))
+                return
+        except OSError:
+            pass
+        Device.spawned_servers[app_server] = start_server(config)
+        try:
+            self.server_startup_time = wait_for_server(config['URL'], self.config.get('WAIT'))
+        except WaitTimeoutError as exc:
+            LOGGER.error(str(exc))
+            return
+        LOGGER.info("{name} started in {sec:.2f} seconds!".format(
+            name=server_name, sec=self.server_startup_time))
+
+    @asynccontextmanager
+    async def async_session(self):
+        """
+        Attach an asyncio client to the session of this device.
+
+        The client keeps its own keep-alive connections to the appium server for the
+        duration of the block, so several devices can be driven from one event loop.
+        The snapshot of this device is invalidated when the block exits.
+
+        :return: AsyncAndroidDevice
+        """
+        async_driver = AsyncWebDriver(self.server_url, self.driver.session_id)
+        async_driver.device = self.mobile_name
+        async_device = AsyncAndroidDevice(async_driver, self.mobile_name, self.config.get('WAIT'))
+        async_device.contact = self.contact
+        async_device.x_cord = getattr(self, 'x_cord', None)
+        async_device.start_y = getattr(self, 'start_y', None)
+        async_device.end_y = getattr(self, 'end_y', None)
+        try:
+            yield async_device
+        finally:
+            await async_device.driver.close()
+            self.invalidate_snapshot()
+
+    @invalidates_snapshot
     def close_driver(self):
         """
-        Close the application, quits the drivers.
+        Close the application and keep the session alive for the next app run.
+
+        Cached sessions are quit by Device.stop_appium.
 
         :return: None
         """
         package_dict = self.config['PACKAGE']
         try:
             self.driver.terminate_app(package_dict[self.app_name])  # Kill app
-            self.driver.quit()  # Kill drivers
+            SESSION_CACHE.release(self.server_url, self.desired_cap, self.driver,
+                                  owner=self.pool_client)
         except WebDriverException:
-            pass
+            try:
+                self.driver.quit()  # Kill broken drivers
+            except WebDriverException:
+                pass
+            self.pool_client.release()
         finally:
             LOGGER.info("Closed {apl} on {mob}!".format(
                 apl=self.app_name, mob=self.mobile_name))
 
+    def fetch_page_source(self):
+        """
+        Fetch the XML page source of the current screen from the driver.
+
+        :return: str
+        """
+        return self.driver.page_source
+
+    def get_current_activity(self):
+        """
+        Return the name of the foreground activity.
+
+        :return: str
+        """
+        return self.driver.current_activity
+
+    @invalidates_snapshot
+    def click_and_settle(self, element, delay=3, until=None):
+        """
+        Click an element and wait for the screen.
+
+        :param element: obj
+            Element to click.
+        :param delay: int
+            Maximum delay in seconds to wait for the screen. Defaults to 3 seconds.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
+        :return: None
+        """
+        element.click()
+        self.settle(delay, until)
+
     def set_scroll_length(self):
         """
         Read mobile window size & sets the scroll length for a mobile.
@@ -92,8 +238,9 @@ class AndroidDevice(Device):
         self.start_y = int(size['height'] * 0.9)
         self.end_y = int(size['height'] * 0.1)
 
-    # pylint: disable=C0103
-    def tap_screen(self, element=None, config=None, x_cord=None, y_cord=None):
+    # pylint: disable=C0103,too-many-arguments
+    @invalidates_snapshot
+    def tap_screen(self, element=None, config=None, x_cord=None, y_cord=None, until=None):
         """
         Perform tap for requested element or coordinates.
 
@@ -105,6 +252,9 @@ class AndroidDevice(Device):
             X coordinate of element to tap.
         :param y_cord: int
             Y coordinate of element to tap.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
         :return: None
         """
         if element and config:
@@ -114,8 +264,27 @@ class AndroidDevice(Device):
             self.touch.tap(x=x_cord, y=y_cord).perform()
         else:
             LOGGER.error('Either element or co-ordinates must be given for tap!')
-        time.sleep(2)
+        self.settle(2, until)
 
+    @invalidates_snapshot
+    def perform_actions(self, payload, delay=2, until=None):
+        """
+        Send a W3C actions payload in one request, then release all pointers.
+
+        :param payload: dict
+            Request body built by ActionBatch.payload().
+        :param delay: int
+            Maximum delay in seconds to wait for the screen. Defaults to 2 seconds.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
+        :return: None
+        """
+        self.driver.execute(Command.W3C_ACTIONS, payload)
+        self.driver.execute(Command.W3C_CLEAR_ACTIONS)
+        self.settle(delay, until)
+
+    @invalidates_snapshot
     def swipe_up(self):
         """
         Swipe the screen to scroll down.
@@ -125,6 +294,7 @@ class AndroidDevice(Device):
         self.driver.swipe(start_x=self.x_cord, start_y=self.start_y,
                           end_x=self.x_cord, end_y=self.end_y, duration=1000)
 
+    @invalidates_snapshot
     def swipe_right(self, config):
         """
         Swipe the screen to move right.
@@ -137,7 +307,8 @@ class AndroidDevice(Device):
                           end_y=config['SWIPE_RIGHT']['y'], duration=1000)
 
     # pylint: disable=too-many-arguments
-    def press_long(self, hold_time, element=None, config=None, x_cord=None, y_cord=None):
+    @invalidates_snapshot
+    def press_long(self, hold_time, element=None, config=None, x_cord=None, y_cord=None, until=None):
         """
         Method to perform long press of element or a coordinate.
 
@@ -151,6 +322,9 @@ class AndroidDevice(Device):
             X coordinate of element
         :param y_cord: int
             Y coordinate of element
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
         :return: None
         """
         if config:
@@ -163,8 +337,9 @@ class AndroidDevice(Device):
             self.touch.long_press(x=x_cord, y=y_cord, duration=hold_time).release().perform()
         else:
             LOGGER.error('Either element or co-ordinates must be given for long press!')
-        time.sleep(2)
+        self.settle(2, until)
 
+    @invalidates_snapshot
     def press_long_and_slide(self, element, x_cord, y_cord, hold_time):
         """
         Method to perform long press of element or a coordinate and slide.
@@ -185,18 +360,23 @@ class AndroidDevice(Device):
         else:
             LOGGER.error('Element and co-ordinates must be given for long press!')
 
-    def press_using_keycode(self, text):
+    @invalidates_snapshot
+    def press_using_keycode(self, text, until=None):
         """
         Select an key on the screen using keycode.
 
         :param text: str
             Text for which key code number has to be found. Example: 'enter', 'search'.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
         :return: None
         """
         num = KEY_CODE_DICT[text]
         self.driver.press_keycode(num)
-        time.sleep(3)
+        self.settle(3, until)
 
+    @invalidates_snapshot
     def press_back(self, num=1):
         """
         Press back button on mobile for 'num' times.
@@ -243,10 +423,82 @@ class AndroidDevice(Device):
         """
         return self.driver.find_elements_by_class_name('android.widget.TextView')
 
+    def return_node_element(self, node):
+        """
+        Return the element for a node of the snapshot using a single lookup.
+
+        :param node: UINode
+            Node found in the snapshot.
+        :return: element
+        :raises: NoSuchElementException
+            Raises NoSuchElementException if element is no longer on the screen.
+        """
+        return self.driver.find_element_by_android_uiautomator(ui_selector(
+            class_name=node.class_name, resource_id=node.resource_id, text=node.text,
+            description=None if node.text else node.content_desc))
+
+    # pylint: disable=too-many-arguments
+    @invalidates_snapshot
+    def scroll_to_element(self, text=None, description=None, class_name=None, resource_id=None,
+                          instance=None, horizontal=False, max_swipes=10):
+        """
+        Scroll the scrollable view of the screen until an element matches and return it.
+
+        The device scrolls and searches by itself (UiScrollable), so the element comes back
+        in one request. Drivers without UiAutomator selectors fall back to looking up the
+        element and swiping, at most 'max_swipes' times.
+
+        :param text: str
+            Text of the element.
+        :param description: str
+            Content description (accessibility id) of the element.
+        :param class_name: str
+            Class of the element. (Example: 'android.widget.TextView')
+        :param resource_id: str
+            Resource id of the element.
+        :param instance: int
+            Index of the element among the matching ones, from 0.
+        :param horizontal: Boolean
+            Whether the view scrolls horizontally. Defaults to 'False'.
+        :param max_swipes: int
+            Maximum number of scrolls. Defaults to 10.
+        :return: element
+        :raises: NoSuchElementException
+            Raises NoSuchElementException if no element matches after 'max_swipes' scrolls.
+        """
+        selector = ui_selector(class_name, resource_id, text, description, instance)
+        scrollable = ('new UiScrollable(new UiSelector().scrollable(true)){orient}'
+                      '.setMaxSearchSwipes({num}).scrollIntoView({sel})').format(
+                          orient='.setAsHorizontalList()' if horizontal else '', num=int(max_swipes),
+                          sel=selector)
+        try:
+            return self.driver.find_element_by_android_uiautomator(scrollable)
+        except NoSuchElementException:
+            # Also raised on screens without a scrollable view, where the element may still be.
+            return self.driver.find_element_by_android_uiautomator(selector)
+        except WebDriverException as exc:
+            LOGGER.debug('UiScrollable is not supported, scrolling by swipes: %s', exc)
+        for swipe in range(max_swipes + 1):
+            try:
+                return self.driver.find_element_by_android_uiautomator(selector)
+            except NoSuchElementException:
+                if swipe == max_swipes:
+                    raise
+            if horizontal:
+                size = self.driver.get_window_size()
+                self.driver.swipe(start_x=int(size['width'] * 0.9), start_y=int(size['height'] / 2),
+                                  end_x=int(size['width'] * 0.1), end_y=int(size['height'] / 2), duration=1000)
+            else:
+                self.swipe_up()
+
     def return_button(self, text, class_name='android.widget.TextView'):
         """
         Return element matching the text which is passed to it.
 
+        The text is looked up in the snapshot of the screen, so only the matching
+        element is fetched from the driver. A cached snapshot which does not
+        contain the text is refreshed once before giving up.
+
         :param text: str
             Text present in the element.
         :param class_name: str
@@ -254,12 +506,26 @@ class AndroidDevice(Device):
         :return: object
             Returns element if present. Returns 'None' if element not found.
         """
-        for button in self.driver.find_elements_by_class_name(class_name):
-            if button.text == text:
-                return button
-        return None
+        is_cached = self._snapshot is not None
+        node = self.snapshot().find(class_name=class_name, text=text)
+        if node is None and is_cached:
+            is_cached = False
+            node = self.snapshot(refresh=True).find(class_name=class_name, text=text)
+        if node is None:
+            return None
+        try:
+            return self.return_node_element(node)
+        except NoSuchElementException:
+            if not is_cached:
+                return None
+        node = self.snapshot(refresh=True).find(class_name=class_name, text=text)
+        try:
+            return self.return_node_element(node) if node else None
+        except NoSuchElementException:
+            return None
 
-    def click_element(self, el_type, text, delay=3, handle_error=True):
+    @invalidates_snapshot
+    def click_element(self, el_type, text, delay=3, handle_error=True, until=None):
         """
         Click a specified element if present. Handles error inside the method if parameter is set.
 
@@ -268,28 +534,31 @@ class AndroidDevice(Device):
         :param text: str
             accessibility id or xpath string to identify the element.
         :param delay: int
-            Delay in seconds after clicking the text. Defaults to 3 seconds.
+            Maximum delay in seconds to wait for the screen after clicking. Defaults to 3 seconds.
         :param handle_error: Boolean
-            If set to 'True', handles exception inside the method.
+            If set to 'True', waits for the element to appear and handles exception inside
+            the method.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
         :return: None
         """
         if el_type not in ['access', 'xpath']:
             LOGGER.error('Mentioned element does not exist!')
-            button = None
-        else:
-            button = self.return_element(el_type=el_type, text=text)
+            sys.exit(1)
 
         if handle_error:
             try:
-                button.click()
-            except NoSuchElementException:
+                button = self.wait_for(element_present(el_type, text))
+            except WaitTimeoutError:
                 LOGGER.error('{ele} is not found: {err}'.format(ele=el_type, err=text))
                 sys.exit(1)
         else:
-            button.click()
-        time.sleep(delay)
+            button = self.return_element(el_type=el_type, text=text)
+        self.click_and_settle(button, delay, until)
 
-    def click_using_class(self, text, search_text=None, delay=3, is_button=False):
+    @invalidates_snapshot
+    def click_using_class(self, text, search_text=None, delay=3, is_button=False, until=None):
         """
         Return element according to 'text' or 'search text' and clicks it.
 
@@ -299,9 +568,12 @@ class AndroidDevice(Device):
         :param search_text: str
             Name of the search box to click (Example: 'Type a message')
         :param delay: int
-            Delay in seconds after clicking the text. Defaults to 3 seconds.
+            Maximum delay in seconds to wait for the screen. Defaults to 3 seconds.
         :param is_button: Boolean
             Whether element is button or not. Defaults to 'False'.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
         :return: None
         :raises: NoSuchElementException
             Raises NoSuchElementException if element not found.
@@ -321,10 +593,132 @@ class AndroidDevice(Device):
 
         if search_text:
             button.send_keys(text)
+            self.settle(delay, until)
         else:
-            button.click()
-        time.sleep(delay)
+            self.click_and_settle(button, delay, until)
+
+    def _inject_text(self, field, text, method):
+        """
+        Put text into an input field with one text entry mechanism.
+
+        The clipboard and adb mechanisms type into the focused view, so the field is
+        focused first.
 
+        :param field: WebElement
+            Resolved input field.
+        :param text: str
+            Text to enter.
+        :param method: str
+            One of TEXT_ENTRY_METHODS.
+        :return: None
+        """
+        if method == 'set_value':
+            field.set_value(text)
+        elif method == 'clipboard':
+            field.click()
+            self.driver.set_clipboard_text(text)
+            self.driver.press_keycode(KEY_CODE_DICT['paste'])
+        elif method == 'adb':
+            field.click()
+            self.driver.execute_script('mobile: shell', {'command': 'input',
+                                                         'args': ['text', _adb_text(text)]})
+        else:
+            field.send_keys(text)
+
+    def _enter_text(self, field, text, method):
+        """
+        Put text into an input field, finding the fastest working mechanism for 'auto'.
+
+        A mechanism works if it raises no error and the field then holds the text. The
+        mechanism found first is remembered for the following messages, which are not
+        checked again.
+
+        :raises: WebDriverException
+            Raises WebDriverException if no mechanism works.
+        """
+        if method != 'auto':
+            self._inject_text(field, text, method)
+            return
+        if self.text_entry_method:
+            self._inject_text(field, text, self.text_entry_method)
+            return
+        for candidate in TEXT_ENTRY_METHODS:
+            try:
+                self._inject_text(field, text, candidate)
+                entered = field.text
+                if entered != text:
+                    LOGGER.debug('Text entry using %s left %r in the field', candidate, entered)
+                    field.clear()
+                    continue
+            except StaleElementReferenceException:
+                raise
+            except (WebDriverException, AttributeError) as exc:
+                LOGGER.debug('Text entry using %s failed: %s', candidate, exc)
+                continue
+            LOGGER.info('Using {mt} for text entry on {dev}'.format(mt=candidate, dev=self.mobile_name))
+            self.text_entry_method = candidate
+            return
+        raise WebDriverException('No text entry method works on {dev}'.format(dev=self.mobile_name))
+
+    @invalidates_snapshot
+    def send_messages(self, messages, field_text, send_id, method='auto', delay=3, until=None):
+        """
+        Type and send every message through one resolved input field.
+
+        The input field and send button are resolved once and reused; they are only
+        looked up again if they go stale. Messages are sent back-to-back without waiting
+        for the screen in between, and the screen is waited for once at the end.
+
+        :param messages: list
+            Messages to send. (Example: ['Hello!', 'Have', 'a', 'nice', 'day'])
+        :param field_text: str
+            Text (hint) of the input field. (Example: 'Type a message')
+        :param send_id: str
+            Accessibility id of the send button. (Example: 'Send')
+        :param method: str
+            'auto' or one of 'set_value', 'clipboard', 'adb', 'send_keys'. Defaults to 'auto'.
+        :param delay: int
+            Maximum delay in seconds to wait for the screen. Defaults to 3 seconds.
+        :param until: callable
+            Post-condition from 'core.devices.wait' ending the wait as soon as it is met.
+            (Example: element_present('access', 'Send')) Without it the full delay is waited.
+        :return: dict
+            Number of messages, seconds, messages per second and the text entry method used.
+        :raises: NoSuchElementException
+            Raises NoSuchElementException if the input field is not found.
+        """
+        field = self.return_button(field_text, 'android.widget.EditText')
+        if not field:
+            raise NoSuchElementException
+        send_button = None
+        start = time.monotonic()
+        for message in messages:
+            try:
+                self._enter_text(field, message, method)
+            except StaleElementReferenceException:
+                self.invalidate_snapshot()
+                field = self.return_button(field_text, 'android.widget.EditText')
+                if not field:
+                    raise NoSuchElementException
+                self._enter_text(field, message, method)
+            try:
+                send_button = send_button or self.driver.find_element_by_accessibility_id(send_id)
+                send_button.click()
+            except StaleElementReferenceException:
+                send_button = self.driver.find_element_by_accessibility_id(send_id)
+                send_button.click()
+        seconds = time.monotonic() - start
+        self.settle(delay, until)
+        stats = {'messages': len(messages), 'seconds': round(seconds, 3),
+                 'messages_per_second': round(len(messages) / seconds, 2) if seconds else 0.0,
+                 'method': self.text_entry_method if method == 'auto' else method}
+        LOGGER.info('Sent {num} messages on {dev} in {sec:.2f} seconds '
+                    '({rate:.2f} messages/sec using {mt})'.format(
+                        num=stats['messages'], dev=self.mobile_name, sec=seconds,
+                        rate=stats['messages_per_second'], mt=stats['method']))
+        return stats
+
+    @invalidates_snapshot
     def start_app(self):
         """
         Open application on mobile device.
@@ -334,13 +728,32 @@ class AndroidDevice(Device):
         app_xpath = '//android.widget.FrameLayout[@content-desc=\"{app}\"]/android.widget.ImageView'
         LOGGER.info('Starting app now!')
         tex = app_xpath.format(app=self.app_name)
+        home_activity = self.get_current_activity()
+        if self.session_reused:
+            self.driver.activate_app(self.config['PACKAGE'][self.app_name])
+            self.settle(5, activity_changed(home_activity))
+            self.set_scroll_length()
+            return
         try:
             self.click_element(el_type='xpath', text=tex, handle_error=False)
         except NoSuchElementException:
             LOGGER.exception('Cannot find {app} on home screen of the phone!'.format(
                 app=self.app_name))
             sys.exit(1)
-        LOGGER.debug("{app} is opened on {name}".format(
-            app=self.app_name, name=self.mobile_name))
-        time.sleep(5)
+        self.settle(5, activity_changed(home_activity))
+        LOGGER.debug("%s is opened on %s", self.app_name, self.mobile_name)
         self.set_scroll_length()
+
+    @invalidates_snapshot
+    def restart_app(self):
+        """
+        Close the application and open it again on its first screen, keeping the session.
+
+        :return: None
+        """
+        package = self.config['PACKAGE'][self.app_name]
+        self.driver.terminate_app(package)
+        home_activity = self.get_current_activity()
+        self.driver.activate_app(package)
+        self.settle(5, activity_changed(home_activity))
+        LOGGER.debug("%s is restarted on %s", self.app_name, self.mobile_name)
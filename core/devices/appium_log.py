@@ -0,0 +1,155 @@
+"""
+Streaming capture of appium server output.
+
+The output pipe of each server is read by a background thread, written to the
+rotating log file of the server and parsed line by line. Appium logs every request
+when it answers it ('[HTTP] <-- POST /wd/hub/session/<id>/element 200 125 ms - 137'),
+so the time spent by the server and the device on each command is recorded while
+the server runs, without reading the log files afterwards.
+"""
+import os
+import re
+import threading
+
+# Import core modules
+from core.devices.command_metrics import SERVER_METRICS
+from core.logger import get_logger
+
+__all__ = ('AppiumLogParser', 'AppiumLogReader')
+LOGGER = get_logger().logger
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+ANSI_REGEX = re.compile(r'\x1b\[[0-9;]*m')
+REQUEST_REGEX = re.compile(r'\[HTTP\] --> (\w+) (\S+)')
+DRIVER_CALL_REGEX = re.compile(r'Calling \w+\.(\w+)\(\)')
+RESPONSE_REGEX = re.compile(r'\[HTTP\] <-- (\w+) (\S+) (\d+) (\d+(?:\.\d+)?) ms')
+SESSION_ROUTE_REGEX = re.compile(r'^.*?/session/[^/]+')
+ELEMENT_ROUTE_REGEX = re.compile(r'/element/[^/]+')
+
+
+def route_name(method, path):
+    """
+    Return the route of a request path without session and element ids.
+
+    :param method: str
+    :param path: str
+        (Example: '/wd/hub/session/5f1c/element/12/click')
+    :return: str
+        (Example: 'POST /element/:id/click')
+    """
+    route = SESSION_ROUTE_REGEX.sub('', path.split('?')[0])
+    return '{mt} {route}'.format(mt=method, route=ELEMENT_ROUTE_REGEX.sub('/element/:id', route) or '/')
+
+
+class AppiumLogParser:
+    """Extract server-side command latencies from appium log lines."""
+
+    def __init__(self, device, metrics=SERVER_METRICS):
+        """
+        Initialization Method.
+
+        :param device: str
+            Name of the mobile served by the server. (Example: 'MOBILE_1')
+        :param metrics: CommandMetrics
+            Histograms the latencies are recorded into.
+        """
+        self.device = device
+        self.metrics = metrics
+        self.commands = 0
+        self._pending = {}
+
+    def feed(self, line):
+        """
+        Parse one log line.
+
+        The command name comes from the driver call logged while the request was handled
+        (Example: 'findElement'), else from the route of the request.
+
+        :param line: str
+        :return: tuple
+            (command, seconds) when the line completes a request, else 'None'.
+        """
+        if '[HTTP]' not in line and 'Calling ' not in line:
+            return None
+        if '\x1b' in line:
+            line = ANSI_REGEX.sub('', line)
+        match = RESPONSE_REGEX.search(line)
+        if match:
+            method, path = match.group(1), match.group(2)
+            command = self._pending.pop((method, path), None) or route_name(method, path)
+            seconds = float(match.group(4)) / 1000
+            self.metrics.record(self.device, command, seconds)
+            self.commands += 1
+            return command, seconds
+        match = REQUEST_REGEX.search(line)
+        if match:
+            self._pending[(match.group(1), match.group(2))] = None
+            return None
+        match = DRIVER_CALL_REGEX.search(line)
+        if match and self._pending:
+            # Requests of one session are handled one at a time; the call belongs to the latest.
+            self._pending[next(reversed(self._pending))] = match.group(1)
+        return None
+
+
+class AppiumLogReader(threading.Thread):
+    """Background thread copying a server's output to a rotating log file while parsing it."""
+
+    def __init__(self, stream, path, device, mode='w', max_bytes=DEFAULT_MAX_BYTES,
+                 backup_count=DEFAULT_BACKUP_COUNT):
+        """
+        Initialization Method.
+
+        :param stream: file
+            Output pipe of the server process, in binary mode.
+        :param path: str
+            Path of the log file.
+        :param device: str
+            Name of the mobile served by the server.
+        :param mode: str
+            'w' starts with an empty log file, 'a' appends to it.
+        :param max_bytes: int
+            Size at which the log file is rotated to '<path>.1'. 0 disables rotation.
+        :param backup_count: int
+            Number of rotated files kept.
+        """
+        super().__init__(name='appium-log-{dev}'.format(dev=device), daemon=True)
+        self.stream = stream
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.parser = AppiumLogParser(device)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, mode + 'b')
+        self._size = self._file.tell() if mode == 'a' else 0
+
+    def _rotate(self):
+        """Move '<path>' to '<path>.1', shifting older files, and start a new file."""
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = '{path}.{idx}'.format(path=self.path, idx=index)
+            if os.path.exists(source):
+                os.replace(source, '{path}.{idx}'.format(path=self.path, idx=index + 1))
+        if self.backup_count:
+            os.replace(self.path, self.path + '.1')
+        self._file = open(self.path, 'wb')
+        self._size = 0
+
+    def run(self):
+        """Copy and parse lines until the server closes its output."""
+        try:
+            for line in iter(self.stream.readline, b''):
+                if self.max_bytes and self._size + len(line) > self.max_bytes:
+                    self._rotate()
+                self._file.write(line)
+                self._size += len(line)
+                try:
+                    self.parser.feed(line.decode('utf-8', 'replace'))
+                except (ValueError, KeyError) as exc:
+                    LOGGER.debug('Could not parse appium log line: %s', exc)
+        except (OSError, ValueError) as exc:
+            LOGGER.error('Appium log capture of {dev} stopped: {err}'.format(dev=self.parser.device, err=exc))
+        finally:
+            self._file.close()
+            self.stream.close()
@@ -0,0 +1,131 @@
+"""Launch, stop and readiness probe for appium servers."""
+import json
+import os
+import signal
+import subprocess
+import time
+from urllib.request import urlopen
+
+from core.devices.appium_log import DEFAULT_BACKUP_COUNT, DEFAULT_MAX_BYTES, AppiumLogReader
+from core.devices.wait import Waiter
+
+__all__ = ('status_url', 'is_server_ready', 'wait_for_server', 'start_server', 'stop_server', 'server_device')
+
+
+def status_url(url):
+    """
+    Return the '/status' endpoint for the WebDriver url of an appium server.
+
+    :param url: str
+        WebDriver url. (Example: 'http://localhost:4723/wd/hub')
+    :return: str
+    """
+    return url.rstrip('/') + '/status'
+
+
+def is_server_ready(url, request_timeout=2):
+    """
+    Query the '/status' endpoint of the server once.
+
+    :param url: str
+        WebDriver url of the server.
+    :param request_timeout: float
+        Timeout (in seconds) of the HTTP request.
+    :return: Boolean
+        'True' if the server answered and did not report itself as not ready.
+    :raises: OSError
+        Raises OSError (or URLError) if the server cannot be reached.
+    """
+    with urlopen(status_url(url), timeout=request_timeout) as response:
+        body = json.loads(response.read().decode('utf-8') or '{}')
+    value = body.get('value') if isinstance(body, dict) else None
+    if isinstance(value, dict):
+        return value.get('ready', True) is not False
+    return True
+
+
+def wait_for_server(url, wait_config=None):
+    """
+    Poll the '/status' endpoint with backoff until the server is ready.
+
+    :param url: str
+        WebDriver url of the server. (Example: 'http://localhost:4723/wd/hub')
+    :param wait_config: dict
+        'WAIT' section of the appium server config. 'SERVER_READY_TIMEOUT' is the deadline.
+    :return: float
+        Seconds taken by the server to become ready.
+    :raises: WaitTimeoutError
+        Raises WaitTimeoutError if the server is not ready before the deadline.
+    """
+    waiter = Waiter(None, wait_config, ignored_exceptions=(OSError, ValueError))
+    start = time.monotonic()
+    waiter.until(lambda _device: is_server_ready(url),
+                 timeout=waiter.server_ready_timeout,
+                 message='Appium server at {url} is not ready!'.format(url=url))
+    return time.monotonic() - start
+
+
+def server_device(server_config):
+    """
+    Return the name under which the latencies of a server are recorded.
+
+    :param server_config: dict
+        Server section of the appium server config. (Example: config['SERVER_1'])
+    :return: str
+        (Example: 'MOBILE_1')
+    """
+    return server_config.get('MOBILE_NAME', server_config['NAME'])
+
+
+def start_server(server_config, mode='w'):
+    """
+    Launch the appium server described by a server section of the config.
+
+    The output of the server is streamed by an AppiumLogReader thread into the log file
+    of the server, rotated at 'LOG_MAX_BYTES', and the server-side latency of every
+    command is recorded into SERVER_METRICS. The reader is attached to the returned
+    handle as 'log_reader'.
+
+    :param server_config: dict
+        Server section of the appium server config. (Example: config['SERVER_1'])
+    :param mode: str
+        Mode in which the log file of the server is opened. Defaults to 'w'.
+    :return: subprocess.Popen
+        Handle of the launched server process.
+    """
+    full_log_path = os.path.join(os.environ['basedir'], 'logs', 'appium',
+                                 server_config['LOG_FILE_NAME'])
+    if os.name == 'nt':
+        process = subprocess.Popen(server_config['CMD'], shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT)
+    else:
+        process = subprocess.Popen(server_config['CMD'], shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+    process.log_reader = AppiumLogReader(process.stdout, full_log_path, server_device(server_config), mode,
+                                         server_config.get('LOG_MAX_BYTES', DEFAULT_MAX_BYTES),
+                                         server_config.get('LOG_BACKUP_COUNT', DEFAULT_BACKUP_COUNT))
+    process.log_reader.start()
+    return process
+
+
+def stop_server(process):
+    """
+    Kill an appium server launched by start_server along with its child processes.
+
+    :param process: subprocess.Popen
+        Handle returned by start_server.
+    :return: None
+    """
+    if process.poll() is None:
+        if os.name == 'nt':
+            subprocess.run('taskkill /F /T /PID {pid}'.format(pid=process.pid), shell=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT, check=False)
+        else:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        process.wait()
+    log_reader = getattr(process, 'log_reader', None)
+    if log_reader is not None:
+        log_reader.join(timeout=5)
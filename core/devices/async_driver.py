@@ -0,0 +1,712 @@
+"""
+Asyncio WebDriver / Appium client.
+
+Requests to a server go through a small pool of HTTP/1.1 keep-alive connections, so
+one event loop can drive many devices concurrently without a thread per device.
+Only the standard library is used; any server speaking the WebDriver protocol over
+plain HTTP works, including a local fake Appium server.
+
+Usage:
+    async with device.async_session() as async_device:
+        await async_device.tap_screen('HOME', config=config)
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+# Import core modules
+from core.devices.actions import ActionBatch
+from core.devices.appium_log import route_name
+from core.devices.command_metrics import COMMAND_METRICS, command_name
+from core.devices.recording import RECORDER
+from core.devices.ui_snapshot import ui_selector
+from core.devices.wait import Waiter, WaitTimeoutError
+from core.logger import get_logger
+from core.tracing import TRACER
+
+__all__ = ('AsyncWebDriverError', 'NoSuchElementError', 'AsyncConnectionPool', 'AsyncWebDriver',
+           'AsyncAndroidDevice')
+LOGGER = get_logger().logger
+
+ELEMENT_KEYS = ('element-6066-11e4-a52e-4f735466cecf', 'ELEMENT')
+LOCATOR_STRATEGIES = {
+    'access': 'accessibility id',
+    'xpath': 'xpath',
+    'id': 'id',
+    'class': 'class name',
+    'uiautomator': '-android uiautomator'
+}
+NOT_FOUND_ERRORS = ('no such element', 'stale element reference')
+# JSONWP status codes of 'no such element' and 'stale element reference'.
+NOT_FOUND_STATUS = (7, 10)
+KEY_CODE_DICT = {
+    'enter': 66,
+    'search': 84,
+    'back': 4
+}
+# Selenium / Appium command names of the routes used, so both clients share their latency metrics.
+ROUTE_COMMANDS = {
+    'POST /session': 'newSession',
+    'DELETE /': 'quit',
+    'POST /element': 'findElement',
+    'POST /elements': 'findElements',
+    'POST /element/:id/click': 'clickElement',
+    'POST /element/:id/value': 'sendKeysToElement',
+    'GET /element/:id/attribute': 'getElementAttribute',
+    'GET /element/:id/rect': 'getElementRect',
+    'GET /source': 'getPageSource',
+    'GET /appium/device/current_activity': 'getCurrentActivity',
+    'GET /window/rect': 'getWindowRect',
+    'POST /appium/device/press_keycode': 'pressKeyCode',
+    'POST /back': 'goBack',
+    'POST /actions': 'actions',
+    'DELETE /actions': 'clearActionState'
+}
+
+
+class AsyncWebDriverError(Exception):
+    """Raised when the server answers a command with an error."""
+
+    def __init__(self, message, status=None, error=None):
+        """
+        Initialization Method.
+
+        :param message: str
+            Error message returned by the server.
+        :param status: int
+            HTTP status of the response.
+        :param error: str
+            WebDriver error code. (Example: 'no such element')
+        """
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+class NoSuchElementError(AsyncWebDriverError):
+    """Raised when an element is not found or went stale."""
+
+
+def route_command(method, path, payload=None):
+    """
+    Return the metric name of a request, as CommandMetrics names the same selenium command.
+
+    :param method: str
+    :param path: str
+        Path relative to the WebDriver url. (Example: '/session/5f1c/element/12/click')
+    :param payload: dict
+        JSON body of the request.
+    :return: str
+        (Example: 'clickElement', 'findElement[xpath]')
+    """
+    route = route_name(method, path)
+    if '/attribute/' in route:
+        route = route.rsplit('/', 1)[0]
+    return command_name(ROUTE_COMMANDS.get(route, route), payload)
+
+
+class AsyncConnectionPool:
+    """Pool of HTTP/1.1 keep-alive connections to one server."""
+
+    def __init__(self, host, port, size=4, timeout=60):
+        """
+        Initialization Method.
+
+        :param host: str
+            Host name of the server.
+        :param port: int
+            Port of the server.
+        :param size: int
+            Maximum number of concurrent connections. Defaults to 4.
+        :param timeout: float
+            Seconds allowed for connecting and for each request. Defaults to 60.
+        """
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.requests = 0
+        self.connections_opened = 0
+        self._idle = []
+        self._semaphore = None
+
+    async def _open(self):
+        """Open a new connection."""
+        connection = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                            self.timeout)
+        self.connections_opened += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        """Close a connection, ignoring errors."""
+        try:
+            connection[1].close()
+        except OSError:
+            pass
+
+    async def _roundtrip(self, connection, method, path, body):
+        """
+        Send one request and read its response.
+
+        :return: tuple
+            HTTP status, response body and whether the connection can be reused.
+        """
+        reader, writer = connection
+        head = ['{mt} {path} HTTP/1.1'.format(mt=method, path=path),
+                'Host: {host}:{port}'.format(host=self.host, port=self.port),
+                'Accept: application/json',
+                'Connection: keep-alive',
+                'Content-Length: {num}'.format(num=len(body))]
+        if body:
+            head.append('Content-Type: application/json; charset=utf-8')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed by {host}'.format(host=self.host))
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _sep, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        reusable = headers.get('connection', '').lower() != 'close'
+        if 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            data = b''.join(chunks)
+        else:
+            data = await reader.read()
+            reusable = False
+        return status, data, reusable
+
+    async def request(self, method, path, payload=None):
+        """
+        Send a request on an idle connection, opening one if none is idle.
+
+        A request failing on a reused connection (closed by the server while idle)
+        is retried once on a new connection.
+
+        :param method: str
+            'GET', 'POST' or 'DELETE'
+        :param path: str
+            Path of the request. (Example: '/wd/hub/session')
+        :param payload: dict
+            JSON body of the request.
+        :return: tuple
+            HTTP status and response body.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.size)
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        async with self._semaphore:
+            self.requests += 1
+            reused = bool(self._idle)
+            connection = self._idle.pop() if reused else await self._open()
+            try:
+                status, data, reusable = await asyncio.wait_for(
+                    self._roundtrip(connection, method, path, body), self.timeout)
+            except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                self._close(connection)
+                if not reused:
+                    raise
+                connection = await self._open()
+                try:
+                    status, data, reusable = await asyncio.wait_for(
+                        self._roundtrip(connection, method, path, body), self.timeout)
+                except BaseException:
+                    self._close(connection)
+                    raise
+            except BaseException:
+                self._close(connection)
+                raise
+            if reusable:
+                self._idle.append(connection)
+            else:
+                self._close(connection)
+        return status, data
+
+    async def close(self):
+        """Close all idle connections."""
+        while self._idle:
+            _reader, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+
+class AsyncWebDriver:
+    """Awaitable WebDriver / Appium commands of one session."""
+
+    def __init__(self, url, session_id=None, pool_size=4, timeout=60):
+        """
+        Initialization Method.
+
+        :param url: str
+            WebDriver url of the appium server. (Example: 'http://localhost:4723/wd/hub')
+        :param session_id: str
+            Id of an existing session to attach to. Use start_session() otherwise.
+        :param pool_size: int
+            Maximum number of concurrent connections to the server. Defaults to 4.
+        :param timeout: float
+            Seconds allowed for each request. Defaults to 60.
+        """
+        parsed = urlsplit(url)
+        self.url = url
+        self.base_path = parsed.path.rstrip('/')
+        self.session_id = session_id
+        self.device = None
+        self.pool = AsyncConnectionPool(parsed.hostname, parsed.port or 80, pool_size, timeout)
+
+    async def request(self, method, path, payload=None):
+        """
+        Send a command and return the decoded response.
+
+        Commands of a driver with a device are recorded into COMMAND_METRICS, under the
+        selenium command names used by the synchronous driver.
+
+        :param method: str
+            'GET', 'POST' or 'DELETE'
+        :param path: str
+            Path relative to the WebDriver url. (Example: '/session')
+        :param payload: dict
+            JSON body of the command.
+        :return: dict
+            Decoded JSON response.
+        :raises: AsyncWebDriverError
+            Raises AsyncWebDriverError (NoSuchElementError for missing elements) on errors.
+        """
+        start = time.perf_counter()
+        try:
+            with TRACER.span('{mt} {path}'.format(mt=method, path=path.replace(
+                    '/session/{sid}'.format(sid=self.session_id), '')), 'command', self.device):
+                status, data = await self.pool.request(method, self.base_path + path, payload)
+        finally:
+            seconds = time.perf_counter() - start
+            if self.device:
+                COMMAND_METRICS.record(self.device, route_command(method, path, payload), seconds)
+        try:
+            response = json.loads(data.decode('utf-8')) if data else {}
+        except ValueError:
+            response = {'value': data.decode('utf-8', 'replace')}
+        if not isinstance(response, dict):
+            response = {'value': response}
+        if RECORDER.enabled and self.device:
+            RECORDER.record(self.device, method, path, payload, status, response, start, seconds)
+        value = response.get('value')
+        if status >= 400 or response.get('status') not in (0, None):
+            error = value.get('error', '') if isinstance(value, dict) else ''
+            message = value.get('message', '') if isinstance(value, dict) else str(value)
+            error_class = AsyncWebDriverError
+            if error in NOT_FOUND_ERRORS or response.get('status') in NOT_FOUND_STATUS:
+                error_class = NoSuchElementError
+            raise error_class('{mt} {path} failed: {msg}'.format(mt=method, path=path, msg=message),
+                              status=status, error=error)
+        return response
+
+    async def execute(self, method, path, payload=None):
+        """
+        Send a command of the session and return its value.
+
+        :param method: str
+            'GET', 'POST' or 'DELETE'
+        :param path: str
+            Path relative to the session. (Example: '/source')
+        :param payload: dict
+            JSON body of the command.
+        :return: object
+            'value' of the response.
+        """
+        response = await self.request(method, '/session/{sid}{path}'.format(sid=self.session_id, path=path),
+                                      payload)
+        return response.get('value')
+
+    async def start_session(self, desired_caps):
+        """
+        Create a new session with the desired capabilities.
+
+        :param desired_caps: dict
+            Desired capabilities of the session.
+        :return: str
+            Id of the session.
+        """
+        response = await self.request('POST', '/session', {
+            'capabilities': {'alwaysMatch': desired_caps, 'firstMatch': [{}]},
+            'desiredCapabilities': desired_caps})
+        value = response.get('value') or {}
+        self.session_id = response.get('sessionId') or value.get('sessionId')
+        return self.session_id
+
+    async def quit(self):
+        """Delete the session and close the connections."""
+        try:
+            if self.session_id:
+                await self.execute('DELETE', '')
+        finally:
+            self.session_id = None
+            await self.close()
+
+    async def close(self):
+        """Close the connections without deleting the session."""
+        await self.pool.close()
+
+    async def find_element(self, el_type, text):
+        """
+        Find an element and return its id.
+
+        :param el_type: str
+            'access', 'xpath', 'id', 'class' or 'uiautomator'
+        :param text: str
+            String by which element is identified.
+        :return: str
+            Id of the element.
+        :raises: NoSuchElementError
+            Raises NoSuchElementError if element is not found.
+        """
+        value = await self.execute('POST', '/element', {'using': LOCATOR_STRATEGIES[el_type],
+                                                        'value': text})
+        for key in ELEMENT_KEYS:
+            if isinstance(value, dict) and key in value:
+                return value[key]
+        raise NoSuchElementError('No element for {tp}: {text}'.format(tp=el_type, text=text))
+
+    async def click(self, element_id):
+        """Click an element."""
+        await self.execute('POST', '/element/{eid}/click'.format(eid=element_id), {})
+
+    async def send_keys(self, element_id, text):
+        """Type text into an element."""
+        await self.execute('POST', '/element/{eid}/value'.format(eid=element_id),
+                           {'text': text, 'value': list(text)})
+
+    async def get_attribute(self, element_id, name):
+        """Return an attribute of an element."""
+        return await self.execute('GET', '/element/{eid}/attribute/{name}'.format(eid=element_id,
+                                                                                  name=name))
+
+    async def get_rect(self, element_id):
+        """Return position and size of an element as a dict with 'x', 'y', 'width', 'height'."""
+        return await self.execute('GET', '/element/{eid}/rect'.format(eid=element_id))
+
+    async def page_source(self):
+        """Return the XML page source of the current screen."""
+        return await self.execute('GET', '/source')
+
+    async def current_activity(self):
+        """Return the foreground activity."""
+        return await self.execute('GET', '/appium/device/current_activity')
+
+    async def window_size(self):
+        """Return the window size as a dict with 'width' and 'height'."""
+        return await self.execute('GET', '/window/rect')
+
+    async def press_keycode(self, keycode):
+        """Press an android key code."""
+        await self.execute('POST', '/appium/device/press_keycode', {'keycode': keycode})
+
+    async def back(self):
+        """Press the back button."""
+        await self.execute('POST', '/back', {})
+
+    async def perform_actions(self, payload):
+        """Perform a W3C actions payload and release all pointers."""
+        await self.execute('POST', '/actions', payload)
+        await self.execute('DELETE', '/actions')
+
+
+class AsyncAndroidDevice:
+    """Awaitable versions of the AndroidDevice primitives on one session."""
+
+    NOT_FOUND_EXCEPTIONS = (NoSuchElementError,)
+
+    def __init__(self, driver, mobile_name=None, wait_config=None):
+        """
+        Initialization Method.
+
+        :param driver: AsyncWebDriver
+            Driver of a started or attached session.
+        :param mobile_name: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :param wait_config: dict
+            'WAIT' section of the appium server config. Missing keys take default values.
+        """
+        self.driver = driver
+        self.mobile_name = mobile_name
+        self.contact = None
+        self.waiter = Waiter(self, wait_config)
+        self.fixed_delay = self.waiter.fixed_delay
+        self.x_cord = None
+        self.start_y = None
+        self.end_y = None
+
+    async def wait_for(self, condition, timeout=None, message=''):
+        """
+        Evaluate condition until it returns a truthy value or the deadline passes.
+
+        :param condition: callable
+            Function accepting the device and returning a value or an awaitable.
+        :param timeout: float
+            Seconds to wait. Defaults to 'TIMEOUT' from the wait config.
+        :param message: str
+            Message of the WaitTimeoutError raised on deadline.
+        :return: object
+            Truthy value returned by the condition.
+        :raises: WaitTimeoutError
+            Raises WaitTimeoutError if condition is not met in time.
+        """
+        return await self.waiter.until_async(condition, timeout=timeout, message=message)
+
+    async def settle(self, delay, before=None):
+        """
+        Wait until the page source differs from 'before', for at most 'delay' seconds.
+
+        :param delay: float
+            Maximum seconds to wait. Waited in full in fixed delay mode.
+        :param before: str
+            Page source before the action.
+        :return: None
+        """
+        if self.fixed_delay or before is None:
+            await asyncio.sleep(delay)
+            return
+
+        async def _changed(device):
+            return await device.get_page_source() != before
+        try:
+            await self.wait_for(_changed, timeout=delay)
+        except WaitTimeoutError:
+            LOGGER.debug('Screen of %s did not change in %s seconds', self.mobile_name, delay)
+
+    async def _ui_state(self):
+        """Return the page source to compare against after an action, 'None' in fixed mode."""
+        return None if self.fixed_delay else await self.get_page_source()
+
+    async def get_page_source(self):
+        """Return the XML page source of the current screen."""
+        return await self.driver.page_source()
+
+    async def get_current_activity(self):
+        """Return the foreground activity."""
+        return await self.driver.current_activity()
+
+    async def set_scroll_length(self):
+        """Read mobile window size & sets the scroll length for a mobile."""
+        size = await self.driver.window_size()
+        self.x_cord = int(size['width'] / 2)
+        self.start_y = int(size['height'] * 0.9)
+        self.end_y = int(size['height'] * 0.1)
+
+    async def perform_actions(self, payload, delay=2):
+        """
+        Send a W3C actions payload in one request and wait for the screen to change.
+
+        :param payload: dict
+            Request body built by ActionBatch.payload().
+        :param delay: int
+            Maximum delay in seconds to wait for the screen to change. Defaults to 2 seconds.
+        :return: None
+        """
+        before = await self._ui_state()
+        await self.driver.perform_actions(payload)
+        await self.settle(delay, before)
+
+    async def _element_center(self, element):
+        """Return center coordinates of an element id."""
+        rect = await self.driver.get_rect(element)
+        return rect['x'] + rect['width'] // 2, rect['y'] + rect['height'] // 2
+
+    async def tap_screen(self, element=None, config=None, x_cord=None, y_cord=None):
+        """
+        Perform tap for requested element or coordinates.
+
+        :param element: str
+            Where tap has to be performed. (Example: 'Home' , 'Search')
+        :param config: dict
+            Config dictionary of particular app
+        :param x_cord:  int
+            X coordinate of element to tap.
+        :param y_cord: int
+            Y coordinate of element to tap.
+        :return: None
+        """
+        if element and config:
+            x_cord, y_cord = config[element]['x'], config[element]['y']
+        elif not x_cord:
+            LOGGER.error('Either element or co-ordinates must be given for tap!')
+            return
+        await self.perform_actions(ActionBatch(self).tap(x_cord, y_cord).payload())
+
+    async def swipe_up(self):
+        """Swipe the screen to scroll down."""
+        if self.x_cord is None:
+            await self.set_scroll_length()
+        await self.perform_actions(ActionBatch(self).swipe_up().payload())
+
+    async def swipe_right(self, config):
+        """
+        Swipe the screen to move right.
+
+        :param config: dict
+            Config dictionary of particular app with 'SWIPE_RIGHT' coordinates.
+        :return: None
+        """
+        await self.perform_actions(ActionBatch(self).swipe_right(config).payload())
+
+    async def press_long(self, hold_time, element=None, config=None, x_cord=None, y_cord=None):
+        """
+        Long press an element id, a config element or coordinates.
+
+        :param hold_time: int
+            Duration (in milli-seconds) of the press.
+        :return: None
+        """
+        if element and config:
+            x_cord, y_cord = config[element]['x'], config[element]['y']
+        elif element:
+            x_cord, y_cord = await self._element_center(element)
+        await self.perform_actions(ActionBatch(self).long_press(x_cord, y_cord, hold_time).payload(),
+                                   delay=3)
+
+    async def press_long_and_slide(self, element, x_cord, y_cord, hold_time):
+        """
+        Long press an element id and slide it to the coordinates.
+
+        :param element: str
+            Id of the element.
+        :param x_cord: int
+            X coordinate to slide to.
+        :param y_cord: int
+            Y coordinate to slide to.
+        :param hold_time: int
+            Duration (in milli-seconds) of the press before sliding.
+        :return: None
+        """
+        start_x, start_y = await self._element_center(element)
+        await self.perform_actions(ActionBatch(self).press_and_slide(start_x, start_y, x_cord, y_cord,
+                                                                     hold_time).payload(), delay=3)
+
+    async def press_using_keycode(self, text):
+        """
+        Select an key on the screen using keycode.
+
+        :param text: str
+            Text for which key code number has to be found. Example: 'enter', 'search'.
+        :return: None
+        """
+        before = await self._ui_state()
+        await self.driver.press_keycode(KEY_CODE_DICT[text])
+        await self.settle(3, before)
+
+    async def press_back(self, num=1):
+        """
+        Press back button on mobile for 'num' times.
+
+        :param num: int
+            Number of times to press back button. Defaults to 1.
+        :return: None
+        """
+        for _11 in range(num):  # _11 as dummy variable
+            before = await self._ui_state()
+            await self.driver.back()
+            await self.settle(2, before)
+
+    async def return_element(self, el_type, text, bounds=False):
+        """
+        Return the id or bounds of an element.
+
+        :param el_type: str
+            'access', 'xpath', 'id', 'class' or 'uiautomator'
+        :param text: str
+            String by which element is identified.
+        :param bounds: Boolean
+            Return the 'bounds' attribute instead of the id. Defaults to 'False'.
+        :return: str
+        :raises: NoSuchElementError
+            Raises NoSuchElementError if element is not found.
+        """
+        element = await self.driver.find_element(el_type, text)
+        if bounds:
+            return await self.driver.get_attribute(element, 'bounds')
+        return element
+
+    async def click_and_settle(self, element, delay=3):
+        """
+        Click an element id and wait for the screen to change.
+
+        :param element: str
+            Id of the element.
+        :param delay: int
+            Maximum delay in seconds to wait for the screen to change. Defaults to 3 seconds.
+        :return: None
+        """
+        before = await self._ui_state()
+        await self.driver.click(element)
+        await self.settle(delay, before)
+
+    async def click_element(self, el_type, text, delay=3, handle_error=True):
+        """
+        Click a specified element if present, waiting for it to appear if parameter is set.
+
+        :param el_type: str
+            'access' or 'xpath' accordingly to the element present.
+        :param text: str
+            accessibility id or xpath string to identify the element.
+        :param delay: int
+            Maximum delay in seconds to wait for the screen to change after clicking.
+        :param handle_error: Boolean
+            Wait for the element up to the wait timeout. Defaults to 'True'.
+        :return: None
+        :raises: NoSuchElementError, WaitTimeoutError
+        """
+        if handle_error:
+            element = await self.wait_for(lambda device: device.return_element(el_type, text),
+                                          message='{text} not found on {dev}!'.format(
+                                              text=text, dev=self.mobile_name))
+        else:
+            element = await self.return_element(el_type, text)
+        await self.click_and_settle(element, delay)
+
+    async def click_using_class(self, text, search_text=None, delay=3, is_button=False):
+        """
+        Find element according to 'text' or 'search text' and click it.
+
+        :param text: str
+            Text to click on the screen.
+            In case of search box, text to enter into box  (Eg:'Phoenix Mall')
+        :param search_text: str
+            Name of the search box to click (Example: 'Type a message')
+        :param delay: int
+            Maximum delay in seconds to wait for the screen to change. Defaults to 3 seconds.
+        :param is_button: Boolean
+            Whether element is button or not. Defaults to 'False'.
+        :return: None
+        :raises: NoSuchElementError
+        """
+        if search_text:
+            class_name, label = 'android.widget.EditText', search_text
+        elif is_button:
+            class_name, label = 'android.widget.Button', text
+        else:
+            class_name, label = 'android.widget.TextView', text
+        element = await self.return_element('uiautomator', ui_selector(class_name, text=label))
+        if search_text:
+            before = await self._ui_state()
+            await self.driver.send_keys(element, text)
+            await self.settle(delay, before)
+        else:
+            await self.click_and_settle(element, delay)
@@ -0,0 +1,358 @@
+"""
+Per-command latency metrics of the WebDriver calls of each device.
+
+Every command sent through an instrumented driver is timed and recorded into a
+log-linear (HDR style) histogram keyed by device and command. Recording is a few
+arithmetic operations under a lock, so instrumentation stays on for every run.
+The collected data is exported as JSON and as a Prometheus text file.
+
+SERVER_METRICS holds the same histograms as timed by the appium servers themselves,
+parsed from their logs (core.devices.appium_log), so the difference to
+COMMAND_METRICS is the time spent in the client and on the network. Servers leased
+from the pool are parsed by the pool daemon, which hands the histograms of a lease
+back to the client when it is released.
+"""
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+__all__ = ('LatencyHistogram', 'CommandMetrics', 'COMMAND_METRICS', 'SERVER_METRICS')
+
+# Sub-buckets per power of two; 16 keeps the relative error of percentiles below ~4.5%.
+SUB_BUCKETS = 16
+# Lowest recorded latency, in seconds. Faster commands fall into the first bucket.
+MIN_LATENCY = 1e-5
+PROMETHEUS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+FIND_COMMANDS = ('findElement', 'findElements', 'findChildElement', 'findChildElements')
+
+
+class LatencyHistogram:
+    """Log-linear histogram of latencies in seconds."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+        # Exact number of latencies per Prometheus bucket, the last one above all bounds.
+        self.prometheus_counts = [0] * (len(PROMETHEUS_BUCKETS) + 1)
+
+    @staticmethod
+    def bucket_index(seconds):
+        """Return the bucket index of a latency."""
+        return int(math.log2(max(seconds, MIN_LATENCY) / MIN_LATENCY) * SUB_BUCKETS)
+
+    @staticmethod
+    def bucket_upper_bound(index):
+        """Return the highest latency (in seconds) counted in a bucket."""
+        return MIN_LATENCY * 2 ** ((index + 1) / SUB_BUCKETS)
+
+    def record(self, seconds):
+        """
+        Add a latency to the histogram.
+
+        :param seconds: float
+        :return: None
+        """
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        index = self.bucket_index(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.prometheus_counts[bisect.bisect_left(PROMETHEUS_BUCKETS, seconds)] += 1
+
+    def percentile(self, percent):
+        """
+        Return the latency below which 'percent' of the recorded latencies fall.
+
+        :param percent: float
+            (Example: 99 for the 99th percentile)
+        :return: float
+            Upper bound of the matching bucket, capped at the maximum. 0 if empty.
+        """
+        if not self.count:
+            return 0.0
+        rank = math.ceil(self.count * percent / 100.0)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def cumulative_counts(self):
+        """
+        Return the number of latencies up to each bound of PROMETHEUS_BUCKETS.
+
+        The counts are exact: they are kept per bound when recording, since the log-linear
+        buckets straddle the Prometheus bounds.
+
+        :return: list
+        """
+        counts = []
+        total = 0
+        for num in self.prometheus_counts[:-1]:
+            total += num
+            counts.append(total)
+        return counts
+
+    def merge(self, state):
+        """
+        Add the latencies of a histogram state to the histogram.
+
+        :param state: dict
+            Return value of 'state', possibly sent as JSON.
+        :return: None
+        """
+        self.count += state['count']
+        self.total += state['total']
+        for attr, func in (('min', min), ('max', max)):
+            if state[attr] is not None:
+                value = getattr(self, attr)
+                setattr(self, attr, state[attr] if value is None else func(value, state[attr]))
+        for index, num in state['buckets'].items():
+            self.buckets[int(index)] = self.buckets.get(int(index), 0) + num
+        self.prometheus_counts = [num + other for num, other in zip(self.prometheus_counts,
+                                                                    state['prometheus_counts'])]
+
+    def state(self):
+        """
+        Return the complete content of the histogram, serializable as JSON.
+
+        :return: dict
+        """
+        return {'count': self.count, 'total': self.total, 'min': self.min, 'max': self.max,
+                'buckets': dict(self.buckets), 'prometheus_counts': list(self.prometheus_counts)}
+
+    def to_dict(self):
+        """
+        Return a summary of the histogram.
+
+        :return: dict
+        """
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0.0,
+            'min_seconds': round(self.min or 0.0, 6),
+            'max_seconds': round(self.max or 0.0, 6),
+            'p50_seconds': round(self.percentile(50), 6),
+            'p90_seconds': round(self.percentile(90), 6),
+            'p99_seconds': round(self.percentile(99), 6),
+            'buckets': {'{:.6f}'.format(self.bucket_upper_bound(index)): num
+                        for index, num in sorted(self.buckets.items())}
+        }
+
+
+def command_name(driver_command, params):
+    """
+    Return the metric name of a driver command.
+
+    Element lookups are split by locator strategy. (Example: 'findElement[xpath]')
+
+    :param driver_command: str
+        Command name as passed to WebDriver.execute. (Example: 'clickElement')
+    :param params: dict
+        Parameters of the command.
+    :return: str
+    """
+    if driver_command in FIND_COMMANDS and params and 'using' in params:
+        return '{cmd}[{using}]'.format(cmd=driver_command, using=params['using'])
+    return driver_command
+
+
+class CommandMetrics:
+    """Latency histograms of driver commands, keyed by device and command."""
+
+    def __init__(self, metric_name='appium_command_duration_seconds', file_name='command_latency',
+                 description='Latency of WebDriver commands per device.'):
+        """
+        Initialization Method.
+
+        :param metric_name: str
+            Name of the Prometheus histogram.
+        :param file_name: str
+            Base name of the exported files.
+        :param description: str
+            Help text of the Prometheus histogram.
+        """
+        self.metric_name = metric_name
+        self.file_name = file_name
+        self.description = description
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, device, command, seconds):
+        """
+        Record the latency of one command.
+
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :param command: str
+            Name of the command. (Example: 'getPageSource')
+        :param seconds: float
+            Latency of the command.
+        :return: None
+        """
+        with self._lock:
+            histogram = self.histograms.get((device, command))
+            if histogram is None:
+                histogram = self.histograms[(device, command)] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def instrument(self, driver, device):
+        """
+        Time every command sent through the driver.
+
+        The driver's 'execute' method, which all commands go through, is wrapped on
+        the instance. Instrumenting a driver twice has no further effect.
+
+        :param driver: WebDriver
+            Driver of the device.
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :return: WebDriver
+        """
+        execute = driver.execute
+        if getattr(execute, 'command_metrics', None) is self:
+            return driver
+
+        @wraps(execute)
+        def _execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.record(device, command_name(driver_command, params), time.perf_counter() - start)
+
+        _execute.command_metrics = self
+        driver.execute = _execute
+        return driver
+
+    def total_seconds(self):
+        """
+        Return the time spent in all recorded commands.
+
+        :return: float
+        """
+        with self._lock:
+            return sum(histogram.total for histogram in self.histograms.values())
+
+    def totals(self, devices=None):
+        """
+        Return the number of recorded commands and the time spent in them.
+
+        :param devices: iterable
+            Names of the mobiles to count. Defaults to all of them.
+        :return: tuple
+            (count, seconds)
+        """
+        with self._lock:
+            histograms = [histogram for (device, _command), histogram in self.histograms.items()
+                          if devices is None or device in devices]
+            return (sum(histogram.count for histogram in histograms),
+                    sum(histogram.total for histogram in histograms))
+
+    def reset(self):
+        """Forget every recorded latency."""
+        with self._lock:
+            self.histograms.clear()
+
+    def take(self, device):
+        """
+        Remove the histograms of a device and return their content.
+
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :return: dict
+            {command: histogram state}
+        """
+        with self._lock:
+            keys = [key for key in self.histograms if key[0] == device]
+            return {key[1]: self.histograms.pop(key).state() for key in keys}
+
+    def merge(self, device, states):
+        """
+        Add histograms taken from another process to those of a device.
+
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :param states: dict
+            {command: histogram state}, as returned by 'take'.
+        :return: None
+        """
+        with self._lock:
+            for command, state in states.items():
+                histogram = self.histograms.get((device, command))
+                if histogram is None:
+                    histogram = self.histograms[(device, command)] = LatencyHistogram()
+                histogram.merge(state)
+
+    def to_dict(self):
+        """
+        Return the metrics of every device and command.
+
+        :return: dict
+            {device: {command: histogram summary}}, commands sorted by total time.
+        """
+        with self._lock:
+            items = [(key, histogram.to_dict()) for key, histogram in self.histograms.items()]
+        devices = {}
+        for (device, command), summary in sorted(items, key=lambda item: -item[1]['total_seconds']):
+            devices.setdefault(device, {})[command] = summary
+        return devices
+
+    def to_prometheus(self):
+        """
+        Return the metrics in the Prometheus text exposition format.
+
+        :return: str
+        """
+        name = self.metric_name
+        lines = ['# HELP {name} {desc}'.format(name=name, desc=self.description),
+                 '# TYPE {name} histogram'.format(name=name)]
+        with self._lock:
+            items = sorted(self.histograms.items())
+            for (device, command), histogram in items:
+                labels = 'device="{dev}",command="{cmd}"'.format(
+                    dev=device.replace('\\', '\\\\').replace('"', '\\"'),
+                    cmd=command.replace('\\', '\\\\').replace('"', '\\"'))
+                for bound, num in zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts()):
+                    lines.append('{name}_bucket{{{lb},le="{le}"}} {num}'.format(
+                        name=name, lb=labels, le=bound, num=num))
+                lines.append('{name}_bucket{{{lb},le="+Inf"}} {num}'.format(
+                    name=name, lb=labels, num=histogram.count))
+                lines.append('{name}_sum{{{lb}}} {sum:.6f}'.format(name=name, lb=labels,
+                                                                   sum=histogram.total))
+                lines.append('{name}_count{{{lb}}} {num}'.format(name=name, lb=labels,
+                                                                 num=histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory):
+        """
+        Write '<file_name>.json' and '<file_name>.prom' into a directory.
+
+        :param directory: str
+        :return: tuple
+            Paths of the JSON and Prometheus files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, self.file_name + '.json')
+        prom_path = os.path.join(directory, self.file_name + '.prom')
+        with open(json_path, 'w') as stream:
+            json.dump(self.to_dict(), stream, indent=2)
+        with open(prom_path, 'w') as stream:
+            stream.write(self.to_prometheus())
+        return json_path, prom_path
+
+
+COMMAND_METRICS = CommandMetrics()
+SERVER_METRICS = CommandMetrics('appium_server_command_duration_seconds', 'server_latency',
+                                'Latency of WebDriver commands per device, as timed by the appium server.')
@@ -1,38 +1,29 @@
 """Base class for Device."""
 import os
-import sys
-import subprocess
+import time
 from abc import ABCMeta, abstractmethod
 
-import yaml
-
+from core.config import read_config_file
+from core.devices.actions import ActionBatch
+from core.devices.appium_server import stop_server
+from core.devices.session_cache import SESSION_CACHE
+from core.devices.ui_snapshot import UISnapshot
+from core.devices.wait import Waiter, WaitTimeoutError
 from core.logger import get_logger
 
+__all__ = ('Device', 'read_config_file')
 LOGGER = get_logger().logger
 
 
-def read_config_file(config_file):
-    """
-    Read YAML file and return dictionary with values.
-
-    :param config_file: str
-        Name of YAML file to be read.
-    :return: dict
-        Configuration dictionary created after reading YAML file
-    """
-    try:
-        with open(config_file) as stream:
-            config_dict = yaml.safe_load(stream)
-    except yaml.YAMLError as exc:
-        LOGGER.error('Encountered some ERROR while trying to load {fl}'.format(fl=config_file))
-        LOGGER.error(str(exc))
-        sys.exit(1)
-    return config_dict
-
-
 class Device(metaclass=ABCMeta):
     """Class containing all methods relating to driver."""
 
+    # Exceptions raised by element lookups when the element is not on the screen.
+    NOT_FOUND_EXCEPTIONS = ()
+    # Processes of the servers launched by this process, by server name.
+    # Servers leased from the pool or started outside the framework are not listed.
+    spawned_servers = {}
+
     def __init__(self, app_name):
         """Initialization Method."""
         self.x_cord = None
@@ -43,6 +34,87 @@ class Device(metaclass=ABCMeta):
                                                     'core',
                                                     'devices',
                                                     'appium_server_config.yaml'))
+        self.waiter = Waiter(self, self.config.get('WAIT'))
+        self._snapshot = None
+
+    def snapshot(self, refresh=False):
+        """
+        Return the indexed page source of the current screen, fetching it only when needed.
+
+        :param refresh: Boolean
+            If 'True', page source is fetched again even if a snapshot is cached.
+        :return: UISnapshot
+        """
+        if refresh or self._snapshot is None:
+            self.get_page_source()
+        return self._snapshot
+
+    def actions(self, settle_delay=2):
+        """
+        Return a batch collecting gestures which are performed in a single request.
+
+        :param settle_delay: int
+            Delay in seconds to wait for the screen after performing.
+        :return: ActionBatch
+        """
+        return ActionBatch(self, settle_delay)
+
+    def get_page_source(self):
+        """
+        Return the XML page source of the current screen and keep it as snapshot.
+
+        :return: str
+        """
+        self._snapshot = UISnapshot(self.fetch_page_source())
+        return self._snapshot.source
+
+    def invalidate_snapshot(self):
+        """
+        Drop the cached snapshot. Called by every action which changes the screen.
+
+        :return: None
+        """
+        self._snapshot = None
+
+    def wait_for(self, condition, timeout=None, message=''):
+        """
+        Wait until condition is met on this device.
+
+        :param condition: callable
+            Condition from 'core.devices.wait' (Example: element_present('access', 'Send')).
+        :param timeout: float
+            Seconds to wait. Defaults to 'TIMEOUT' from the 'WAIT' config.
+        :param message: str
+            Message of the error raised on timeout.
+        :return: object
+            Value returned by the condition.
+        :raises: WaitTimeoutError
+            Raises WaitTimeoutError if condition is not met in time.
+        """
+        return self.waiter.until(condition, timeout=timeout, message=message)
+
+    def settle(self, delay, condition=None):
+        """
+        Wait after an action until the UI reaches the expected state.
+
+        The delay is an upper bound: the method returns as soon as the condition is met.
+        When 'FIXED_DELAY' is set in the 'WAIT' config or no condition is given,
+        sleeps for the full delay instead.
+
+        :param delay: float
+            Maximum number of seconds to wait.
+        :param condition: callable
+            Post-condition of the action.
+        :return: None
+        """
+        if self.waiter.fixed_delay or condition is None:
+            time.sleep(delay)
+            return
+        try:
+            self.wait_for(condition, timeout=delay)
+        except WaitTimeoutError:
+            LOGGER.debug('UI did not reach the expected state within %s seconds on %s', delay,
+                         getattr(self, 'mobile_name', None))
 
     @abstractmethod
     def create_driver(self, app_server):
@@ -52,6 +124,18 @@ class Device(metaclass=ABCMeta):
     def close_driver(self):
         """Close the application, quits the drivers."""
 
+    @abstractmethod
+    def fetch_page_source(self):
+        """Fetch the XML page source of the current screen from the driver."""
+
+    @abstractmethod
+    def get_current_activity(self):
+        """Return the name of the foreground activity."""
+
+    @abstractmethod
+    def perform_actions(self, payload, delay=2):
+        """Send a W3C actions payload in one request."""
+
     @abstractmethod
     def set_scroll_length(self):
         """Read mobile window size & sets the scroll length for a mobile."""
@@ -80,6 +164,12 @@ class Device(metaclass=ABCMeta):
     def return_element(self, el_type, text, bounds=False):
         """Return element according to element type given."""
 
+    # pylint: disable=too-many-arguments
+    @abstractmethod
+    def scroll_to_element(self, text=None, description=None, class_name=None, resource_id=None,
+                          instance=None, horizontal=False, max_swipes=10):
+        """Scroll until an element matches and return it, at most 'max_swipes' times."""
+
     @abstractmethod
     def return_button(self, text, class_name='android.widget.TextView'):
         """Return element matching the text which is passed to it."""
@@ -96,13 +186,26 @@ class Device(metaclass=ABCMeta):
     def click_using_class(self, text, search_text, delay=3, is_button=False):
         """Return element according to 'text' or 'search text' and clicks it."""
 
+    @abstractmethod
+    def send_messages(self, messages, field_text, send_id, method='auto', delay=3):
+        """Type and send every message through one resolved input field."""
+
     @abstractmethod
     def start_app(self):
         """Open the application on the mobile device."""
 
+    @abstractmethod
+    def restart_app(self):
+        """Close the application and open it again on its first screen."""
+
     @staticmethod
     def stop_appium():
-        """Kill appium servers running on Windows using Powershell."""
-        subprocess.run('powershell Stop-Process -name node', shell=True,
-                       stderr=subprocess.STDOUT, check=False)
-        LOGGER.info("Appium server killed!")
+        """Quit cached sessions and kill the appium servers launched by this process."""
+        SESSION_CACHE.close_all()
+        if not Device.spawned_servers:
+            LOGGER.info("No appium server was launched by this run, leaving servers running.")
+            return
+        for app_server, process in list(Device.spawned_servers.items()):
+            stop_server(process)
+            del Device.spawned_servers[app_server]
+            LOGGER.info("{srv} killed!".format(srv=app_server))
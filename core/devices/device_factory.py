@@ -1,6 +1,11 @@
 """"Device Factory class."""
-from core.devices.android_device import AndroidDevice
-from core.devices.ios_device import IOSDevice
+from importlib import import_module
+
+# Module & class of each backend. Backends are imported only when requested.
+DEVICE_BACKENDS = {
+    'android': ('core.devices.android_device', 'AndroidDevice'),
+    'ios': ('core.devices.ios_device', 'IOSDevice')
+}
 
 
 # pylint: disable=too-few-public-methods
@@ -10,9 +15,8 @@ class DeviceFactory:
     @staticmethod
     def get_device_type(device_type):
         """Identify type of device and returns the appropriate class."""
-        if device_type == 'android':
-            return AndroidDevice
-        if device_type == 'ios':
-            return IOSDevice
-        raise NotImplementedError('Device type {dt} is currently not supported!'.format(
-            dt=device_type))
+        if device_type not in DEVICE_BACKENDS:
+            raise NotImplementedError('Device type {dt} is currently not supported!'.format(
+                dt=device_type))
+        module_name, class_name = DEVICE_BACKENDS[device_type]
+        return getattr(import_module(module_name), class_name)
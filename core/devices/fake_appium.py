@@ -0,0 +1,723 @@
+"""
+Local stand-in for an appium server, driven by scripted screen states.
+
+The server speaks the W3C WebDriver and Appium endpoints used by the device classes.
+Every screen is an XML page source with transitions: clicking or tapping a node,
+pressing back or a key code moves the session to another screen. Each command which
+acts on the screen increments a 'revision' attribute of the page source, so waits on
+a changed screen return at once. Scenarios of all apps are loaded from YAML files;
+a session starts on the home screen of the phone ('launcher.yaml') and opens an app
+when its icon is clicked, like on a real phone.
+
+Usage:
+python -m core.devices.fake_appium -a 127.0.0.1 -p 4723
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Import core modules
+from core.config import read_config_file
+from core.devices.ui_snapshot import parse_bounds
+from core.logger import get_logger
+
+__all__ = ('Scenario', 'FakeSession', 'FakeAppiumServer', 'start_fake_server', 'DEFAULT_SCENARIO_DIR')
+LOGGER = get_logger().logger
+
+DEFAULT_SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_scenarios')
+LAUNCHER = 'launcher'
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+WINDOW_SIZE = {'width': 1080, 'height': 1920}
+KEYCODE_BACK = 4
+KEYCODE_PASTE = 279
+# Moves shorter than this (in pixels) between press and release count as a tap.
+TAP_SLOP = 10
+NODE_DEFAULTS = ('index', 'text', 'resource-id', 'content-desc', 'checkable', 'clickable', 'enabled',
+                 'focusable', 'bounds')
+UI_SELECTOR_REGEX = re.compile(r'\.(\w+)\((?:"((?:[^"\\]|\\.)*)"|(\w+))\)')
+UI_SELECTOR_ATTRIBUTES = {
+    'className': ('class', False),
+    'resourceId': ('resource-id', False),
+    'text': ('text', False),
+    'textContains': ('text', True),
+    'description': ('content-desc', False),
+    'descriptionContains': ('content-desc', True)
+}
+GROUPED_XPATH_REGEX = re.compile(r'^\((.+)\)(?:\[(\d+)\])?$')
+CSS_ID_REGEX = re.compile(r'^(?:\*?\[id="(.+)"\]|#(.+))$')
+
+
+class WebDriverError(Exception):
+    """Error answered to the client in the W3C format."""
+
+    def __init__(self, status, error, message):
+        """
+        Initialization Method.
+
+        :param status: int
+            HTTP status of the response.
+        :param error: str
+            W3C error code. (Example: 'no such element')
+        :param message: str
+        """
+        super().__init__(message)
+        self.status = status
+        self.error = error
+
+
+class Screen:
+    """Page source of one screen and its transitions."""
+
+    def __init__(self, name, config, package, resolve):
+        """
+        Initialization Method.
+
+        :param name: str
+            Qualified name of the screen. (Example: 'whatsapp.chat')
+        :param config: dict
+            Screen section of a scenario file.
+        :param package: str
+            Package of the app the screen belongs to.
+        :param resolve: callable
+            Function qualifying a screen name relative to the scenario file.
+        """
+        self.name = name
+        self.package = package
+        self.activity = config.get('ACTIVITY', '.' + name.split('.')[-1].title() + 'Activity')
+        self.root = ET.fromstring(config['SOURCE'])
+        for node in self.root.iter():
+            if node is self.root:
+                continue
+            node.set('class', node.get('class', node.tag))
+            node.set('package', node.get('package', package))
+            for attr in NODE_DEFAULTS:
+                node.set(attr, node.get(attr, '0' if attr == 'index' else ''))
+        self.parents = {child: parent for parent in self.root.iter() for child in parent}
+        self.source = ET.tostring(self.root, encoding='unicode')
+        self.on_click = [(dict(item['MATCH']), resolve(item['GOTO']))
+                         for item in config.get('ON_CLICK') or ()]
+        self.on_key = {int(key): resolve(goto) for key, goto in (config.get('ON_KEY') or {}).items()}
+        self.back = resolve(config['BACK']) if config.get('BACK') else None
+
+    def render(self, revision):
+        """Return the page source with the revision of the session."""
+        return self.source.replace('<hierarchy', '<hierarchy revision="{rev}"'.format(rev=revision), 1)
+
+    def transition(self, node):
+        """Return the screen reached by clicking node, 'None' if the click stays on this screen."""
+        while node is not None and node is not self.root:
+            for match, goto in self.on_click:
+                if all(node.get(attr) == value for attr, value in match.items()):
+                    return goto
+            node = self.parents.get(node)
+        return None
+
+    def node_at(self, x_cord, y_cord):
+        """Return the last (top-most) node whose bounds contain the point."""
+        hit = None
+        for node in self.root.iter():
+            bounds = parse_bounds(node.get('bounds'))
+            if bounds and bounds[0] <= x_cord <= bounds[2] and bounds[1] <= y_cord <= bounds[3]:
+                hit = node
+        return hit
+
+    def find(self, using, value):
+        """
+        Return the nodes matching a locator.
+
+        :param using: str
+            W3C / Appium locator strategy. (Example: 'accessibility id')
+        :param value: str
+        :return: list
+        :raises: WebDriverError
+            Raises WebDriverError for unsupported strategies or selectors.
+        """
+        if using == 'accessibility id':
+            return [node for node in self.root.iter() if node.get('content-desc') == value]
+        if using == 'id':
+            return [node for node in self.root.iter() if node.get('resource-id') == value]
+        if using == 'class name':
+            return [node for node in self.root.iter() if node.get('class') == value]
+        if using == 'css selector' and CSS_ID_REGEX.match(value):
+            match = CSS_ID_REGEX.match(value)
+            return self.find('id', match.group(1) or match.group(2))
+        if using == 'xpath':
+            return self._find_xpath(value)
+        if using == '-android uiautomator':
+            return self._find_ui_selector(value)
+        raise WebDriverError(400, 'invalid selector', 'Unsupported locator {us}'.format(us=using))
+
+    def _find_xpath(self, xpath):
+        """Evaluate the XPath subset used by the apps with ElementTree."""
+        position = None
+        # Quotes escaped for the YAML or Python string may reach the server as is.
+        xpath = xpath.replace('\\"', '"')
+        grouped = GROUPED_XPATH_REGEX.match(xpath)
+        if grouped:
+            xpath, position = grouped.group(1), grouped.group(2)
+        if xpath.startswith('//'):
+            path = './/' + xpath[2:]
+        elif xpath.startswith('/hierarchy/'):
+            path = './' + xpath[len('/hierarchy/'):]
+        else:
+            path = './' + xpath.lstrip('/')
+        try:
+            nodes = self.root.findall(path)
+        except (SyntaxError, KeyError, TypeError) as exc:
+            raise WebDriverError(400, 'invalid selector', 'Unsupported xpath {xp}: {err}'.format(
+                xp=xpath, err=exc))
+        if position:
+            nodes = nodes[int(position) - 1:int(position)]
+        return nodes
+
+    def _find_ui_selector(self, selector):
+        """
+        Evaluate a UiSelector chain of className, resourceId, text, description and instance.
+
+        A UiScrollable is evaluated as the selector of its scrollIntoView: the scripted
+        screens hold every node, so nothing has to be scrolled into view.
+        """
+        conditions = []
+        instance = None
+        scroll_start = selector.find('.scrollIntoView(')
+        if selector.startswith('new UiScrollable(') and scroll_start != -1:
+            selector = selector[scroll_start + len('.scrollIntoView('):]
+        for method, quoted, bare in UI_SELECTOR_REGEX.findall(selector):
+            if method == 'UiSelector':
+                continue
+            if method == 'instance':
+                instance = int(bare)
+                continue
+            if method not in UI_SELECTOR_ATTRIBUTES:
+                raise WebDriverError(400, 'invalid selector', 'Unsupported UiSelector method '
+                                                              '{mt}'.format(mt=method))
+            value = re.sub(r'\\(.)', r'\1', quoted) if quoted else bare
+            conditions.append(UI_SELECTOR_ATTRIBUTES[method] + (value,))
+        nodes = [node for node in self.root.iter() if node is not self.root and all(
+            (value in node.get(attr, '')) if contains else node.get(attr) == value
+            for attr, contains, value in conditions)]
+        return nodes if instance is None else nodes[instance:instance + 1]
+
+
+class Scenario:
+    """Screens of the phone home screen and of every app."""
+
+    def __init__(self, screens, start, packages):
+        """
+        Initialization Method.
+
+        :param screens: dict
+            Screen keyed by qualified name.
+        :param start: str
+            Screen a new session starts on.
+        :param packages: dict
+            Start screen of each app, keyed by package.
+        """
+        self.screens = screens
+        self.start = start
+        self.packages = packages
+
+    @classmethod
+    def load(cls, directory=DEFAULT_SCENARIO_DIR):
+        """
+        Read every scenario file of a directory.
+
+        Screen names are qualified by the file name, so 'whatsapp.yaml' defines
+        'whatsapp.home'. Transitions may name screens of the same file without prefix.
+
+        :param directory: str
+        :return: Scenario
+        """
+        screens = {}
+        packages = {}
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith('.yaml'):
+                continue
+            prefix = file_name[:-len('.yaml')]
+            config = read_config_file(os.path.join(directory, file_name))
+
+            def resolve(name, prefix=prefix):
+                return name if '.' in name else prefix + '.' + name
+
+            for name, screen_config in config['SCREENS'].items():
+                screens[resolve(name)] = Screen(resolve(name), screen_config, config['PACKAGE'], resolve)
+            packages[config['PACKAGE']] = resolve(config['START'])
+        for screen in screens.values():
+            targets = [goto for _match, goto in screen.on_click] + list(screen.on_key.values())
+            for goto in targets + ([screen.back] if screen.back else []):
+                if goto not in screens:
+                    raise ValueError('Screen {sc} goes to unknown screen {goto}'.format(
+                        sc=screen.name, goto=goto))
+        return cls(screens, '{lc}.home'.format(lc=LAUNCHER), packages)
+
+
+class FakeSession:
+    """State of one session: current screen, revision and the elements handed out."""
+
+    def __init__(self, scenario, capabilities):
+        """
+        Initialization Method.
+
+        :param scenario: Scenario
+        :param capabilities: dict
+            Capabilities requested by the client.
+        """
+        self.id = uuid.uuid4().hex
+        self.scenario = scenario
+        self.capabilities = capabilities
+        self.screen = scenario.screens[scenario.start]
+        self.revision = 0
+        self.clipboard = ''
+        self.typed = []
+        self.commands = 0
+        self._elements = {}
+        self._element_ids = {}
+        self.lock = threading.Lock()
+
+    def touch(self):
+        """Record a change of the screen."""
+        self.revision += 1
+
+    def goto(self, name):
+        """Move to another screen."""
+        if name:
+            self.screen = self.scenario.screens[name]
+        self.touch()
+
+    def element_id(self, node):
+        """Return the id of a node of the current screen, creating it on first use."""
+        key = (self.screen.name, id(node))
+        if key not in self._element_ids:
+            element_id = uuid.uuid4().hex
+            self._element_ids[key] = element_id
+            self._elements[element_id] = (self.screen, node)
+        return self._element_ids[key]
+
+    def node(self, element_id):
+        """
+        Return the node of an element id.
+
+        :raises: WebDriverError
+            Raises WebDriverError if the element is unknown or not on the current screen.
+        """
+        if element_id not in self._elements:
+            raise WebDriverError(404, 'no such element', 'Unknown element {el}'.format(el=element_id))
+        screen, node = self._elements[element_id]
+        if screen is not self.screen:
+            raise WebDriverError(404, 'stale element reference',
+                                 'Element {el} is not on the current screen'.format(el=element_id))
+        return node
+
+    def center(self, node):
+        """Return center coordinates of a node."""
+        bounds = parse_bounds(node.get('bounds')) or (0, 0, 0, 0)
+        return (bounds[0] + bounds[2]) // 2, (bounds[1] + bounds[3]) // 2
+
+    def click(self, node):
+        """Click a node, following the transition of the screen."""
+        self.goto(self.screen.transition(node))
+
+    def tap(self, x_cord, y_cord):
+        """Tap a point, clicking the node under it."""
+        node = self.screen.node_at(x_cord, y_cord)
+        if node is None:
+            self.touch()
+        else:
+            self.click(node)
+
+    def gesture(self, start, end):
+        """Perform a tap when start and end are close, a swipe otherwise."""
+        if abs(start[0] - end[0]) <= TAP_SLOP and abs(start[1] - end[1]) <= TAP_SLOP:
+            self.tap(*start)
+        else:
+            self.touch()
+
+    def press_keycode(self, keycode):
+        """Press an android key code."""
+        if keycode == KEYCODE_BACK:
+            self.back()
+        elif keycode == KEYCODE_PASTE:
+            self.typed.append(self.clipboard)
+            self.touch()
+        else:
+            self.goto(self.screen.on_key.get(keycode))
+
+    def back(self):
+        """Press the back button."""
+        self.goto(self.screen.back)
+
+    def activate_app(self, package):
+        """Bring an app to the foreground."""
+        if package not in self.scenario.packages:
+            raise WebDriverError(400, 'invalid argument', 'Unknown app {pkg}'.format(pkg=package))
+        self.goto(self.scenario.packages[package])
+
+    def terminate_app(self, _package):
+        """Close the app, returning to the phone home screen."""
+        self.goto(self.scenario.start)
+        return True
+
+
+def _point(session, options):
+    """Return the point of a TouchAction or W3C pointer action."""
+    element = options.get('element') or options.get('el')
+    origin = options.get('origin')
+    if isinstance(origin, dict):
+        element = origin.get(ELEMENT_KEY) or origin.get('ELEMENT')
+    if element:
+        x_cord, y_cord = session.center(session.node(element))
+        return x_cord + int(options.get('x') or 0), y_cord + int(options.get('y') or 0)
+    return int(options.get('x') or 0), int(options.get('y') or 0)
+
+
+def perform_touch_actions(session, actions):
+    """
+    Perform an Appium TouchAction chain. ('/touch/perform')
+
+    :param session: FakeSession
+    :param actions: list
+        Actions as sent by TouchAction.perform().
+    :return: None
+    """
+    start = end = None
+    for action in actions:
+        name, options = action.get('action'), action.get('options') or {}
+        if name == 'tap':
+            session.tap(*_point(session, options))
+        elif name in ('press', 'longPress'):
+            start = end = _point(session, options)
+        elif name == 'moveTo':
+            end = _point(session, options)
+        elif name == 'release' and start:
+            session.gesture(start, end)
+            start = end = None
+    if start:
+        session.gesture(start, end)
+
+
+def perform_w3c_actions(session, sources):
+    """
+    Perform W3C action sources. ('/actions')
+
+    :param session: FakeSession
+    :param sources: list
+        Input sources of the W3C actions payload.
+    :return: None
+    """
+    for source in sources:
+        if source.get('type') != 'pointer':
+            session.touch()
+            continue
+        position = down = None
+        for action in source.get('actions') or ():
+            if action.get('type') == 'pointerMove':
+                position = _point(session, action)
+            elif action.get('type') == 'pointerDown':
+                down = position
+            elif action.get('type') == 'pointerUp' and down:
+                session.gesture(down, position)
+                down = None
+
+
+class FakeAppiumHandler(BaseHTTPRequestHandler):
+    """Route WebDriver requests to the sessions of the server."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeAppium/1.0'
+    # Headers and body are separate writes on keep-alive connections; with Nagle's algorithm
+    # the body waits for the client's delayed ACK (~40 ms per request).
+    disable_nagle_algorithm = True
+    ROUTES = []
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Log requests at debug level."""
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug('fake appium %s: %s', self.server.server_port, format % args)
+
+    def _reply(self, status, value):
+        """Send a JSON response."""
+        body = json.dumps({'value': value}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self):
+        """Find the route of the request and answer it."""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+        except ValueError:
+            self._reply(400, {'error': 'invalid argument', 'message': 'Invalid JSON body',
+                              'stacktrace': ''})
+            return
+        path = self.path.split('?')[0]
+        match = re.search(r'(/session(?:/.*)?|/status)$', path.rstrip('/'))
+        try:
+            if not match:
+                raise WebDriverError(404, 'unknown command', 'Unknown path {path}'.format(path=path))
+            for method, pattern, handler in self.ROUTES:
+                route = re.fullmatch(pattern, match.group(1))
+                if method == self.command and route:
+                    value = self.server.call(handler, payload, **route.groupdict())
+                    self._reply(200, value)
+                    return
+            raise WebDriverError(404, 'unknown command', '{mt} {path} is not supported'.format(
+                mt=self.command, path=path))
+        except WebDriverError as exc:
+            self._reply(exc.status, {'error': exc.error, 'message': str(exc), 'stacktrace': ''})
+
+    do_GET = do_POST = do_DELETE = _dispatch
+
+
+def _route(method, pattern):
+    """Register a FakeAppiumServer method as handler of a WebDriver endpoint."""
+    def _decorator(func):
+        FakeAppiumHandler.ROUTES.append((method, pattern.replace('{session}', '/session/(?P<sid>[^/]+)')
+                                         .replace('{element}', '/element/(?P<eid>[^/]+)'), func))
+        return func
+    return _decorator
+
+
+class FakeAppiumServer(ThreadingHTTPServer):
+    """HTTP server answering WebDriver commands from scripted screens."""
+
+    daemon_threads = True
+
+    def __init__(self, address, scenario=None, latency=0.0):
+        """
+        Initialization Method.
+
+        :param address: tuple
+            (host, port) to listen on. Port 0 picks a free port.
+        :param scenario: Scenario
+            Screens to serve. Defaults to the scenarios shipped with the framework.
+        :param latency: float
+            Seconds added to every command, to mimic the response time of a device.
+        """
+        super().__init__(address, FakeAppiumHandler)
+        self.scenario = scenario or Scenario.load()
+        self.latency = latency
+        self.sessions = {}
+
+    @property
+    def url(self):
+        """Property getter for the WebDriver url of the server."""
+        return 'http://{host}:{port}/wd/hub'.format(host=self.server_address[0], port=self.server_port)
+
+    def call(self, handler, payload, sid=None, **params):
+        """Run a route handler, with the session locked for session commands."""
+        if self.latency:
+            time.sleep(self.latency)
+        if sid is None:
+            return handler(self, payload, **params)
+        session = self.sessions.get(sid)
+        if session is None:
+            raise WebDriverError(404, 'invalid session id', 'No session {sid}'.format(sid=sid))
+        with session.lock:
+            session.commands += 1
+            return handler(self, session, payload, **params)
+
+    @_route('GET', '/status')
+    def status(self, _payload):
+        """Report the server as ready."""
+        return {'ready': True, 'message': 'fake appium', 'build': {'version': 'fake'}}
+
+    @_route('POST', '/session')
+    def new_session(self, payload):
+        """Create a session on the phone home screen."""
+        capabilities = payload.get('desiredCapabilities') or \
+            (payload.get('capabilities') or {}).get('alwaysMatch') or {}
+        session = FakeSession(self.scenario, capabilities)
+        self.sessions[session.id] = session
+        return {'sessionId': session.id, 'capabilities': capabilities}
+
+    @_route('DELETE', '{session}')
+    def delete_session(self, session, _payload):
+        """Delete a session."""
+        self.sessions.pop(session.id, None)
+
+    @_route('GET', '{session}/source')
+    def source(self, session, _payload):
+        """Return the page source of the current screen."""
+        return session.screen.render(session.revision)
+
+    @_route('GET', '{session}/appium/device/current_activity')
+    def current_activity(self, session, _payload):
+        """Return the activity of the current screen."""
+        return session.screen.activity
+
+    @_route('GET', '{session}/appium/device/current_package')
+    def current_package(self, session, _payload):
+        """Return the package of the current screen."""
+        return session.screen.package
+
+    @_route('GET', '{session}/window/(?:rect|current/size|size)')
+    def window_rect(self, _session, _payload):
+        """Return the window size."""
+        return dict(WINDOW_SIZE, x=0, y=0)
+
+    @_route('POST', '{session}/element')
+    def find_element(self, session, payload):
+        """Return the first element matching the locator."""
+        nodes = session.screen.find(payload.get('using'), payload.get('value'))
+        if not nodes:
+            raise WebDriverError(404, 'no such element', 'No element for {us} {val}'.format(
+                us=payload.get('using'), val=payload.get('value')))
+        return {ELEMENT_KEY: session.element_id(nodes[0]), 'ELEMENT': session.element_id(nodes[0])}
+
+    @_route('POST', '{session}/elements')
+    def find_elements(self, session, payload):
+        """Return all elements matching the locator."""
+        return [{ELEMENT_KEY: session.element_id(node), 'ELEMENT': session.element_id(node)}
+                for node in session.screen.find(payload.get('using'), payload.get('value'))]
+
+    @_route('POST', '{session}{element}/click')
+    def click(self, session, _payload, eid):
+        """Click an element."""
+        session.click(session.node(eid))
+
+    @_route('POST', '{session}(?:/appium)?{element}/(?:value|replace_value)')
+    def send_keys(self, session, payload, eid):
+        """Type into an element."""
+        session.node(eid)
+        value = payload.get('text') or payload.get('value') or ''
+        session.typed.append(value if isinstance(value, str) else ''.join(value))
+        session.touch()
+
+    @_route('GET', '{session}{element}/attribute/(?P<name>[^/]+)')
+    def attribute(self, session, _payload, eid, name):
+        """Return an attribute of an element."""
+        aliases = {'contentDescription': 'content-desc', 'name': 'content-desc',
+                   'resourceId': 'resource-id', 'className': 'class'}
+        return session.node(eid).get(aliases.get(name, name))
+
+    @_route('GET', '{session}{element}/text')
+    def text(self, session, _payload, eid):
+        """Return the text of an element."""
+        return session.node(eid).get('text', '')
+
+    @_route('GET', '{session}{element}/(?P<prop>displayed|enabled|selected)')
+    def state(self, session, _payload, eid, prop):
+        """Return a boolean state of an element."""
+        return prop != 'selected' and session.node(eid) is not None
+
+    @_route('GET', '{session}{element}/(?P<prop>rect|location|size)')
+    def rect(self, session, _payload, eid, prop):
+        """Return position and size of an element."""
+        left, top, right, bottom = parse_bounds(session.node(eid).get('bounds')) or (0, 0, 0, 0)
+        rect = {'x': left, 'y': top, 'width': right - left, 'height': bottom - top}
+        if prop == 'location':
+            return {'x': left, 'y': top}
+        if prop == 'size':
+            return {'width': rect['width'], 'height': rect['height']}
+        return rect
+
+    @_route('POST', '{session}/touch/perform')
+    def touch_perform(self, session, payload):
+        """Perform a TouchAction chain."""
+        perform_touch_actions(session, payload.get('actions') or [])
+
+    @_route('POST', '{session}/touch/multi/perform')
+    def touch_multi_perform(self, session, payload):
+        """Perform every chain of a MultiAction."""
+        for actions in payload.get('actions') or []:
+            perform_touch_actions(session, actions)
+
+    @_route('POST', '{session}/actions')
+    def actions(self, session, payload):
+        """Perform W3C actions."""
+        perform_w3c_actions(session, payload.get('actions') or [])
+
+    @_route('DELETE', '{session}/actions')
+    def release_actions(self, _session, _payload):
+        """Release all pointers."""
+
+    @_route('POST', '{session}/back')
+    def back(self, session, _payload):
+        """Press the back button."""
+        session.back()
+
+    @_route('POST', '{session}/appium/device/(?:press_keycode|keyevent|long_press_keycode)')
+    def press_keycode(self, session, payload):
+        """Press an android key code."""
+        session.press_keycode(int(payload.get('keycode', 0)))
+
+    @_route('POST', '{session}/appium/device/activate_app')
+    def activate_app(self, session, payload):
+        """Bring an app to the foreground."""
+        session.activate_app(payload.get('appId') or payload.get('bundleId'))
+
+    @_route('POST', '{session}/appium/device/terminate_app')
+    def terminate_app(self, session, payload):
+        """Close an app."""
+        return session.terminate_app(payload.get('appId') or payload.get('bundleId'))
+
+    @_route('POST', '{session}/appium/device/set_clipboard')
+    def set_clipboard(self, session, payload):
+        """Store the clipboard content. Base64 decoding is not needed by the fake screens."""
+        session.clipboard = payload.get('content', '')
+
+    @_route('POST', '{session}/appium/device/hide_keyboard')
+    def hide_keyboard(self, _session, _payload):
+        """Hide the keyboard."""
+
+    @_route('POST', '{session}/execute(?:/sync)?')
+    def execute_script(self, session, payload):
+        """Accept 'mobile:' commands as no-ops which change the screen."""
+        session.touch()
+        return '' if payload.get('script') == 'mobile: shell' else None
+
+
+def start_fake_server(host='127.0.0.1', port=0, scenario=None, latency=0.0):
+    """
+    Start a fake appium server on a background thread.
+
+    :param host: str
+    :param port: int
+        Port to listen on. Defaults to a free port.
+    :param scenario: Scenario
+        Screens to serve. Defaults to the scenarios shipped with the framework.
+    :param latency: float
+        Seconds added to every command.
+    :return: FakeAppiumServer
+        Running server. Call shutdown() and server_close() to stop it.
+    """
+    server = FakeAppiumServer((host, port), scenario, latency)
+    threading.Thread(target=server.serve_forever, name='fake-appium-{port}'.format(
+        port=server.server_port), daemon=True).start()
+    return server
+
+
+def main():
+    """Parse arguments and serve until interrupted."""
+    parser = argparse.ArgumentParser(description='Fake appium server with scripted screens.')
+    parser.add_argument('-a', '--address', default='127.0.0.1', help='Address to listen on.')
+    parser.add_argument('-p', '--port', type=int, default=4723, help='Port to listen on.')
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIO_DIR,
+                        help='Directory of the scenario YAML files.')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added to every command, to mimic a device.')
+    args = parser.parse_args()
+    server = FakeAppiumServer((args.address, args.port), Scenario.load(args.scenarios), args.latency)
+    LOGGER.info('Fake appium server listening on {url}'.format(url=server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('basedir', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+    main()
@@ -11,6 +11,15 @@ class IOSDevice(Device):
     def close_driver(self):
         """Close the application, quits the drivers."""
 
+    def fetch_page_source(self):
+        """Fetch the XML page source of the current screen from the driver."""
+
+    def get_current_activity(self):
+        """Return the name of the foreground activity."""
+
+    def perform_actions(self, payload, delay=2):
+        """Send a W3C actions payload in one request."""
+
     def set_scroll_length(self):
         """Read mobile window size & sets the scroll length for a mobile."""
 
@@ -32,6 +41,11 @@ class IOSDevice(Device):
     def return_element(self, el_type, text, bounds=False):
         """Return element according to element type given."""
 
+    # pylint: disable=too-many-arguments
+    def scroll_to_element(self, text=None, description=None, class_name=None, resource_id=None,
+                          instance=None, horizontal=False, max_swipes=10):
+        """Scroll until an element matches and return it, at most 'max_swipes' times."""
+
     def return_button(self, text, class_name='android.widget.TextView'):
         """Return element matching the text which is passed to it."""
 
@@ -44,5 +58,11 @@ class IOSDevice(Device):
     def click_using_class(self, text, search_text, delay=3, is_button=False):
         """Return element according to 'text' or 'search text' and clicks it."""
 
+    def send_messages(self, messages, field_text, send_id, method='auto', delay=3):
+        """Type and send every message through one resolved input field."""
+
     def start_app(self):
         """Open the application on the mobile device."""
+
+    def restart_app(self):
+        """Close the application and open it again on its first screen."""
@@ -0,0 +1,477 @@
+"""
+Record driver sessions to trace files and replay them as a fake appium server.
+
+While enabled, every command of an instrumented device (selenium driver or asyncio
+client) is appended to a trace file of the device with its HTTP method, path, body,
+status, response and duration. Traces are JSON lines, gzip compressed by default;
+long response values seen before, such as unchanged page sources, are stored once
+and referenced afterwards.
+
+A trace is served back by ReplayServer: requests are matched against the recorded
+commands in order, answered with the recorded responses and delayed by the recorded
+durations, scaled by a speed factor. New sessions are answered with the recorded
+new-session responses, so clients pick the protocol (W3C) they recorded with.
+
+Usage:
+python -m core.devices.recording logs/recordings/MOBILE_1_20200101_120000.trace.gz -p 4723
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import string
+import threading
+import time
+from functools import wraps
+from http.server import ThreadingHTTPServer
+
+# Import core modules
+from core.devices.fake_appium import FakeAppiumHandler
+from core.logger import get_logger
+
+__all__ = ('SessionRecorder', 'RECORDER', 'load_trace', 'ReplayServer', 'start_replay_server')
+LOGGER = get_logger().logger
+
+TRACE_VERSION = 1
+# Response values of at least this many characters are stored once per trace file.
+DEDUPE_MIN_LENGTH = 256
+# Recorded commands searched ahead of the replay position for a matching request.
+LOOKAHEAD = 64
+# Trace files are flushed every this many commands, bounding what a crash loses.
+FLUSH_EVERY = 100
+SESSION_PATH_REGEX = re.compile(r'^/session/([^/]+)')
+COMMAND_PATH_REGEX = re.compile(r'(/session(?:/.*)?|/status)$')
+
+
+def _command_path(path):
+    """Return the path of a command relative to the WebDriver url. (Example: '/session/1/source')"""
+    match = COMMAND_PATH_REGEX.search(path.split('?')[0].rstrip('/'))
+    return match.group(1) if match else path
+
+
+def _body_key(body):
+    """Return the canonical form of a command body, without session id, used to match requests."""
+    if not body:
+        return ''
+    if isinstance(body, dict):
+        body = {key: value for key, value in body.items() if key != 'sessionId'}
+    return json.dumps(body, sort_keys=True, separators=(',', ':'))
+
+
+def _http_response(response):
+    """
+    Return HTTP status and body of a response decoded by the selenium remote connection.
+
+    Error responses are returned by selenium as {'status': <http status>, 'value': <raw body>}.
+    """
+    status = response.get('status') if isinstance(response, dict) else None
+    if isinstance(status, int) and 399 < status <= 500 and isinstance(response.get('value'), str):
+        try:
+            return status, json.loads(response['value'])
+        except ValueError:
+            return status, response['value']
+    return 200, response
+
+
+class TraceWriter:
+    """Append-only writer of the trace file of one device."""
+
+    def __init__(self, path, device):
+        """
+        Initialization Method.
+
+        :param path: str
+            Path of the trace file. Files ending with '.gz' are gzip compressed.
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        """
+        self.path = path
+        self.device = device
+        self.count = 0
+        self.session_id = None
+        self._values = {}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stream = gzip.open(path, 'at', compresslevel=6) if path.endswith('.gz') else \
+            open(path, 'a')
+
+    def _write(self, record):
+        """Append one JSON line."""
+        self._stream.write(json.dumps(record, separators=(',', ':')) + '\n')
+
+    def _compact(self, response):
+        """Replace a long response value seen before by a reference to its first occurrence."""
+        value = response.get('value') if isinstance(response, dict) else None
+        if not isinstance(value, str) or len(value) < DEDUPE_MIN_LENGTH:
+            return {'r': response}
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        if digest not in self._values:
+            self._values[digest] = self.count
+            return {'r': response}
+        return {'r': {key: val for key, val in response.items() if key != 'value'},
+                'vr': self._values[digest]}
+
+    def command(self, method, path, body, status, response, start, seconds, capabilities=None):
+        """
+        Append a command and its response.
+
+        A session line is written first when the command belongs to a new session.
+
+        :param method: str
+            'GET', 'POST' or 'DELETE'
+        :param path: str
+            Path relative to the WebDriver url. (Example: '/session/1/source')
+        :param body: dict
+            JSON body of the command.
+        :param status: int
+            HTTP status of the response.
+        :param response: dict
+            Decoded JSON body of the response.
+        :param start: float
+            time.perf_counter() when the command was sent.
+        :param seconds: float
+            Duration of the command.
+        :param capabilities: dict
+            Capabilities of the session, written with the session line.
+        :return: None
+        """
+        match = SESSION_PATH_REGEX.match(path)
+        with self._lock:
+            if self._stream.closed:
+                return
+            if match and match.group(1) != self.session_id:
+                self.session_id = match.group(1)
+                self._write({'session': self.session_id, 'device': self.device, 'v': TRACE_VERSION,
+                             'time': time.time(), 'capabilities': capabilities or {}})
+            record = {'i': self.count, 't': round(max(start - self._origin, 0.0), 4), 'd': round(seconds, 4),
+                      'm': method, 'p': path, 's': status}
+            if body:
+                record['b'] = body
+            record.update(self._compact(response))
+            self._write(record)
+            self.count += 1
+            if not self.count % FLUSH_EVERY:
+                self._stream.flush()
+
+    def close(self):
+        """Close the file."""
+        with self._lock:
+            self._stream.close()
+
+
+class SessionRecorder:
+    """Record the commands of every device into one trace file per device."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.enabled = False
+        self.directory = None
+        self.compress = True
+        self._writers = {}
+        self._lock = threading.Lock()
+
+    def enable(self, directory, compress=True):
+        """
+        Start recording into a directory.
+
+        :param directory: str
+            Directory of the trace files.
+        :param compress: Boolean
+            Whether to gzip the trace files. Defaults to 'True'.
+        :return: None
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.compress = compress
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop recording and close the trace files.
+
+        :return: list
+            Paths of the written trace files.
+        """
+        self.enabled = False
+        with self._lock:
+            writers = list(self._writers.values())
+            self._writers.clear()
+        for writer in writers:
+            writer.close()
+            LOGGER.info('Recorded {num} commands of {dev} to {path}'.format(
+                num=writer.count, dev=writer.device, path=writer.path))
+        return [writer.path for writer in writers]
+
+    def record(self, device, method, path, body, status, response, start, seconds, capabilities=None):
+        """
+        Append a command of a device to its trace file. See TraceWriter.command.
+
+        :return: None
+        """
+        if not self.enabled:
+            return
+        if isinstance(body, dict) and 'sessionId' in body:
+            body = {key: value for key, value in body.items() if key != 'sessionId'}
+        with self._lock:
+            writer = self._writers.get(device)
+            if writer is None:
+                file_name = '{dev}_{ts}.trace{ext}'.format(dev=device, ts=time.strftime('%Y%m%d_%H%M%S'),
+                                                           ext='.gz' if self.compress else '')
+                writer = self._writers[device] = TraceWriter(os.path.join(self.directory, file_name),
+                                                             device)
+        writer.command(method, _command_path(path), body, status, response, start, seconds,
+                       capabilities)
+
+    def instrument(self, driver, device):
+        """
+        Record every command sent through the remote connection of a selenium driver.
+
+        The connection's 'execute' method is wrapped on the instance; it returns the
+        response before selenium raises errors or converts elements, so responses are
+        recorded as the server sent them. The path is filled in before the command is sent,
+        since selenium removes the session id from the parameters of W3C commands.
+        Instrumenting a driver twice has no further effect.
+
+        :param driver: WebDriver
+            Driver of the device.
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :return: WebDriver
+        """
+        connection = driver.command_executor
+        execute = connection.execute
+        if getattr(execute, 'recorder', None) is self:
+            return driver
+        routes = connection._commands  # pylint: disable=protected-access
+
+        @wraps(execute)
+        def _execute(command, params):
+            if not self.enabled:
+                return execute(command, params)
+            sent = dict(params or {})
+            method, path = routes.get(command, ('POST', command))
+            path = string.Template(path).safe_substitute(sent)
+            start = time.perf_counter()
+            response = execute(command, params)
+            seconds = time.perf_counter() - start
+            status, body = _http_response(response)
+            self.record(device, method, path, sent, status, body, start, seconds,
+                        getattr(driver, 'capabilities', None))
+            return response
+
+        _execute.recorder = self
+        connection.execute = _execute
+        return driver
+
+
+RECORDER = SessionRecorder()
+
+
+def load_trace(path):
+    """
+    Read a trace file.
+
+    :param path: str
+    :return: tuple
+        (sessions, commands): session lines and command records in recorded order. Referenced
+        response values are restored.
+    """
+    sessions = []
+    commands = []
+    values = {}
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt') as stream:
+        try:
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line of a trace cut short by a crash may be incomplete.
+                    LOGGER.warning('Skipping unreadable line of {path}'.format(path=path))
+                    continue
+                if 'session' in record:
+                    sessions.append(record)
+                    continue
+                if 'vr' in record:
+                    record['r'] = dict(record['r'], value=values[record['vr']])
+                elif isinstance(record.get('r'), dict) and 'value' in record['r']:
+                    values[record['i']] = record['r']['value']
+                commands.append(record)
+        except EOFError:
+            # A compressed trace cut short by a crash ends without its end-of-stream marker.
+            LOGGER.warning('{path} ends early, keeping the {num} commands read.'.format(
+                path=path, num=len(commands)))
+    return sessions, commands
+
+
+class ReplayHandler(FakeAppiumHandler):
+    """Answer WebDriver requests from the commands of a trace."""
+
+    def _send(self, status, body):
+        """Send a recorded response body."""
+        data = (body if isinstance(body, str) else json.dumps(body)).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _dispatch(self):
+        """Answer the request with the matching recorded command."""
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length).decode('utf-8')) if length else None
+        except ValueError:
+            body = None
+        status, response = self.server.respond(self.command, _command_path(self.path), body)
+        self._send(status, response)
+
+    do_GET = do_POST = do_DELETE = _dispatch
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """HTTP server replaying the recorded commands of one device."""
+
+    daemon_threads = True
+
+    def __init__(self, address, trace_path, speed=1.0):
+        """
+        Initialization Method.
+
+        :param address: tuple
+            (host, port) to listen on. Port 0 picks a free port.
+        :param trace_path: str
+            Trace file written by SessionRecorder.
+        :param speed: float
+            Replay speed: 1 keeps the recorded command durations, 10 is ten times faster
+            and 0 answers at once.
+        """
+        super().__init__(address, ReplayHandler)
+        self.sessions, commands = load_trace(trace_path)
+        self.new_sessions = []
+        self.commands = []
+        for record in commands:
+            is_new_session = record['m'] == 'POST' and record['p'] == '/session'
+            (self.new_sessions if is_new_session else self.commands).append(record)
+        self.speed = speed
+        self.position = 0
+        self.stats = {'matched': 0, 'skipped': 0, 'repeated': 0, 'missing': 0}
+        self._next_session = 0
+        self._by_key = {}
+        for index, record in enumerate(self.commands):
+            record['key'] = (record['m'], record['p'], _body_key(record.get('b')))
+            self._by_key.setdefault(record['key'], []).append(index)
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        """Property getter for the WebDriver url of the server."""
+        return 'http://{host}:{port}/wd/hub'.format(host=self.server_address[0], port=self.server_port)
+
+    def _find(self, key):
+        """
+        Return the recorded command answering a request.
+
+        The next matching command at most LOOKAHEAD commands ahead is taken and the replay
+        position moves past it, so commands the client no longer sends (e.g. fewer polls)
+        are skipped. A request not found ahead (e.g. an extra poll) gets the response of
+        the latest matching command before the position.
+        """
+        with self._lock:
+            for index in range(self.position, min(len(self.commands), self.position + LOOKAHEAD)):
+                if self.commands[index]['key'] == key:
+                    self.stats['skipped'] += index - self.position
+                    self.stats['matched'] += 1
+                    self.position = index + 1
+                    return self.commands[index]
+            indexes = self._by_key.get(key)
+            if not indexes:
+                self.stats['missing'] += 1
+                return None
+            self.stats['repeated'] += 1
+            earlier = [index for index in indexes if index < self.position]
+            return self.commands[earlier[-1] if earlier else indexes[0]]
+
+    def respond(self, method, path, body):
+        """
+        Return HTTP status and body answering a request.
+
+        :param method: str
+        :param path: str
+            Path relative to the WebDriver url.
+        :param body: dict
+            Decoded JSON body of the request.
+        :return: tuple
+        """
+        if path == '/status':
+            return 200, {'value': {'ready': True, 'message': 'replay'}}
+        if method == 'POST' and path == '/session':
+            with self._lock:
+                index = self._next_session
+                self._next_session += 1
+            if self.new_sessions:
+                record = self.new_sessions[min(index, len(self.new_sessions) - 1)]
+                return record['s'], record['r']
+            session = self.sessions[min(index, len(self.sessions) - 1)] if self.sessions else \
+                {'session': 'replay', 'capabilities': {}}
+            return 200, {'value': {'sessionId': session['session'], 'capabilities': session['capabilities']}}
+        record = self._find((method, path, _body_key(body)))
+        if record is None:
+            if method == 'DELETE':
+                return 200, {'value': None}
+            return 404, {'value': {'error': 'unknown command', 'stacktrace': '',
+                                   'message': '{mt} {path} is not in the trace'.format(mt=method,
+                                                                                       path=path)}}
+        if self.speed:
+            time.sleep(record['d'] / self.speed)
+        return record['s'], record['r']
+
+
+def start_replay_server(trace_path, host='127.0.0.1', port=0, speed=1.0):
+    """
+    Start a replay server on a background thread.
+
+    :param trace_path: str
+    :param host: str
+    :param port: int
+        Port to listen on. Defaults to a free port.
+    :param speed: float
+        Replay speed. See ReplayServer.
+    :return: ReplayServer
+        Running server. Call shutdown() and server_close() to stop it.
+    """
+    server = ReplayServer((host, port), trace_path, speed)
+    threading.Thread(target=server.serve_forever, name='replay-{port}'.format(port=server.server_port),
+                     daemon=True).start()
+    return server
+
+
+def main():
+    """Parse arguments and replay a trace until interrupted."""
+    parser = argparse.ArgumentParser(description='Serve a recorded driver session as appium server.')
+    parser.add_argument('trace', help='Trace file written with --record.')
+    parser.add_argument('-a', '--address', default='127.0.0.1', help='Address to listen on.')
+    parser.add_argument('-p', '--port', type=int, default=4723, help='Port to listen on.')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='1 replays recorded timing, 10 is ten times faster, 0 answers at once.')
+    args = parser.parse_args()
+    server = ReplayServer((args.address, args.port), args.trace, args.speed)
+    LOGGER.info('Replaying {num} commands of {path} on {url}'.format(
+        num=len(server.commands), path=args.trace, url=server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        LOGGER.info('Replay finished: {stats}'.format(stats=server.stats))
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('basedir', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+    main()
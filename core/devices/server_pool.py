@@ -0,0 +1,359 @@
+"""
+Warm appium server pool.
+
+The pool daemon keeps appium servers running between runs and leases them to
+AndroidDevice over a local socket. A lease lasts as long as the client keeps
+its connection open, so a crashed run returns its servers automatically.
+The server-side latencies parsed from the log of a server during a lease are sent
+back with the release, and merged into the SERVER_METRICS of the client.
+
+Usage:
+python -m core.devices.server_pool
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+# Import core modules
+from core.devices.appium_server import is_server_ready, server_device, start_server, stop_server, wait_for_server
+from core.devices.command_metrics import SERVER_METRICS
+from core.devices.device import read_config_file
+from core.devices.wait import WaitTimeoutError
+from core.logger import get_logger
+
+__all__ = ('ServerPool', 'PoolClient', 'PoolError', 'serve')
+LOGGER = get_logger().logger
+
+DEFAULT_POOL_CONFIG = {
+    'HOST': '127.0.0.1',
+    'PORT': 4700,
+    'IDLE_TIMEOUT': 1800,
+    'HEALTH_CHECK_INTERVAL': 30
+}
+
+
+class PoolError(Exception):
+    """Raised when the pool cannot lease a server."""
+
+
+class _PooledServer:
+    """Book-keeping for one server of the pool."""
+
+    def __init__(self, process, url):
+        """Initialization Method."""
+        self.process = process
+        self.url = url
+        self.leased = False
+        self.last_used = time.monotonic()
+
+
+class ServerPool:
+    """Keep appium servers warm and hand them out one lease at a time."""
+
+    def __init__(self, config):
+        """
+        Initialization Method.
+
+        :param config: dict
+            Appium server config. (Contents of 'appium_server_config.yaml')
+        """
+        self.config = config
+        self.pool_config = dict(DEFAULT_POOL_CONFIG)
+        self.pool_config.update(config.get('SERVER_POOL') or {})
+        self._servers = {}
+        self._lock = threading.Lock()
+
+    def lease(self, app_server):
+        """
+        Lease a running server, starting it if it is not warm yet.
+
+        :param app_server: str
+            'SERVER_1' or 'SERVER_2'
+        :return: str
+            WebDriver url of the leased server.
+        :raises: PoolError
+            Raises PoolError if the server is unknown, already leased or does not start.
+        """
+        if app_server not in self.config or 'CMD' not in self.config[app_server]:
+            raise PoolError('Unknown server {srv}!'.format(srv=app_server))
+        with self._lock:
+            server = self._servers.get(app_server)
+            if server and server.leased:
+                raise PoolError('{srv} is already leased!'.format(srv=app_server))
+            if server and server.process.poll() is not None:
+                server = None
+            if server is None:
+                server = _PooledServer(start_server(self.config[app_server], mode='a'),
+                                       self.config[app_server]['URL'])
+                self._servers[app_server] = server
+                LOGGER.info('Pool started {srv}'.format(srv=app_server))
+            server.leased = True
+            # Requests of health checks and earlier leases are not part of this lease.
+            SERVER_METRICS.take(server_device(self.config[app_server]))
+        try:
+            wait_for_server(server.url, self.config.get('WAIT'))
+        except WaitTimeoutError as exc:
+            self._evict(app_server)
+            raise PoolError(str(exc))
+        return server.url
+
+    def release(self, app_server):
+        """
+        Return a leased server to the pool.
+
+        :param app_server: str
+            'SERVER_1' or 'SERVER_2'
+        :return: tuple
+            (device, server-side latencies recorded during the lease as {command: histogram state})
+        """
+        with self._lock:
+            server = self._servers.get(app_server)
+            if server:
+                server.leased = False
+                server.last_used = time.monotonic()
+        if app_server not in self.config:
+            return None, {}
+        device = server_device(self.config[app_server])
+        return device, SERVER_METRICS.take(device)
+
+    def status(self):
+        """
+        Return state of every server in the pool.
+
+        :return: dict
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {name: {'url': server.url,
+                           'leased': server.leased,
+                           'idle_seconds': 0 if server.leased else int(now - server.last_used)}
+                    for name, server in self._servers.items()}
+
+    def _evict(self, app_server, condition=None):
+        """
+        Stop a server and drop it from the pool.
+
+        :param app_server: str
+        :param condition: callable
+            Called with the server while the pool is locked. The server is only evicted
+            if it returns 'True', so a server leased after it was checked is kept.
+        :return: Boolean
+            'True' if the server was evicted.
+        """
+        with self._lock:
+            server = self._servers.get(app_server)
+            if server is None or (condition is not None and not condition(server)):
+                return False
+            del self._servers[app_server]
+        stop_server(server.process)
+        LOGGER.info('Pool stopped {srv}'.format(srv=app_server))
+        return True
+
+    def check_servers(self):
+        """
+        Evict idle servers past 'IDLE_TIMEOUT' and servers failing the health check.
+
+        :return: None
+        """
+        timeout = self.pool_config['IDLE_TIMEOUT']
+        now = time.monotonic()
+        with self._lock:
+            idle = {name: server for name, server in self._servers.items() if not server.leased}
+        for name, server in idle.items():
+            if now - server.last_used > timeout:
+                # Leases taken or returned since the check keep the server.
+                def _still_idle(srv, old=server):
+                    return srv is old and not srv.leased and time.monotonic() - srv.last_used > timeout
+                if self._evict(name, _still_idle):
+                    LOGGER.info('{srv} was idle for too long'.format(srv=name))
+                continue
+            try:
+                healthy = server.process.poll() is None and is_server_ready(server.url)
+            except (OSError, ValueError):
+                healthy = False
+            if not healthy and self._evict(name, lambda srv, old=server: srv is old and not srv.leased):
+                LOGGER.error('{srv} failed the health check'.format(srv=name))
+
+    def shutdown(self):
+        """
+        Stop every server of the pool.
+
+        :return: None
+        """
+        for name in list(self._servers):
+            self._evict(name)
+
+
+class _PoolRequestHandler(socketserver.StreamRequestHandler):
+    """Handle JSON line requests of one client connection."""
+
+    def handle(self):
+        """Serve requests until the client disconnects, then release its leases."""
+        pool = self.server.pool
+        leases = set()
+        try:
+            for line in self.rfile:
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                    response = self._dispatch(pool, request, leases)
+                except (PoolError, ValueError, KeyError) as exc:
+                    response = {'ok': False, 'error': str(exc)}
+                self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+        finally:
+            for app_server in leases:
+                pool.release(app_server)
+
+    def _dispatch(self, pool, request, leases):
+        """Execute one request and return the response."""
+        cmd = request['cmd']
+        if cmd == 'lease':
+            url = pool.lease(request['server'])
+            leases.add(request['server'])
+            return {'ok': True, 'url': url}
+        if cmd == 'release':
+            device, metrics = pool.release(request['server'])
+            leases.discard(request['server'])
+            return {'ok': True, 'device': device, 'server_metrics': metrics}
+        if cmd == 'status':
+            return {'ok': True, 'servers': pool.status()}
+        if cmd == 'shutdown':
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'ok': True}
+        raise PoolError('Unknown command {cmd}!'.format(cmd=cmd))
+
+
+class _PoolServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    """Threaded TCP server holding the pool."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, pool):
+        """Initialization Method."""
+        super().__init__(address, _PoolRequestHandler)
+        self.pool = pool
+
+
+class PoolClient:
+    """Client side of a lease held on the pool daemon."""
+
+    def __init__(self, pool_config=None):
+        """
+        Initialization Method.
+
+        :param pool_config: dict
+            'SERVER_POOL' section of the appium server config.
+        """
+        config = dict(DEFAULT_POOL_CONFIG)
+        config.update(pool_config or {})
+        self.address = (config['HOST'], int(config['PORT']))
+        self._sock = None
+        self._file = None
+        self.app_server = None
+
+    def _request(self, request):
+        """Send one request on the open connection and return the response."""
+        self._file.write((json.dumps(request) + '\n').encode('utf-8'))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise PoolError('Pool daemon closed the connection!')
+        response = json.loads(line.decode('utf-8'))
+        if not response.get('ok'):
+            raise PoolError(response.get('error'))
+        return response
+
+    def lease(self, app_server):
+        """
+        Lease a server from the daemon. The connection stays open for the lease.
+
+        :param app_server: str
+            'SERVER_1' or 'SERVER_2'
+        :return: str
+            WebDriver url of the server, or 'None' if no daemon is running.
+        :raises: PoolError
+            Raises PoolError if the daemon refused the lease.
+        """
+        try:
+            self._sock = socket.create_connection(self.address, timeout=2)
+        except OSError:
+            return None
+        self._sock.settimeout(None)
+        self._file = self._sock.makefile('rwb')
+        try:
+            url = self._request({'cmd': 'lease', 'server': app_server})['url']
+        except (PoolError, OSError, ValueError):
+            self.close()
+            raise
+        self.app_server = app_server
+        return url
+
+    def release(self):
+        """
+        Return the leased server to the daemon and close the connection.
+
+        The server-side latencies of the lease are merged into SERVER_METRICS.
+
+        :return: None
+        """
+        if self._file and self.app_server:
+            try:
+                response = self._request({'cmd': 'release', 'server': self.app_server})
+            except (PoolError, OSError, ValueError):
+                response = {}
+            if response.get('server_metrics'):
+                SERVER_METRICS.merge(response['device'], response['server_metrics'])
+        self.close()
+
+    def close(self):
+        """
+        Close the connection. The daemon releases any lease still held.
+
+        :return: None
+        """
+        for handle in (self._file, self._sock):
+            if handle:
+                handle.close()
+        self._file = None
+        self._sock = None
+        self.app_server = None
+
+
+def serve(config):
+    """
+    Run the pool daemon until it is asked to shut down.
+
+    :param config: dict
+        Appium server config. (Contents of 'appium_server_config.yaml')
+    :return: None
+    """
+    pool = ServerPool(config)
+    address = (pool.pool_config['HOST'], int(pool.pool_config['PORT']))
+    stop = threading.Event()
+
+    def _health_loop():
+        while not stop.wait(pool.pool_config['HEALTH_CHECK_INTERVAL']):
+            pool.check_servers()
+
+    server = _PoolServer(address, pool)
+    threading.Thread(target=_health_loop, daemon=True).start()
+    LOGGER.info('Appium server pool listening on {host}:{port}'.format(
+        host=address[0], port=address[1]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    os.environ.setdefault('basedir', os.path.abspath(
+        os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)))
+    serve(read_config_file(os.path.join(os.environ['basedir'], 'core', 'devices',
+                                        'appium_server_config.yaml')))
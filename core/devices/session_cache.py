@@ -0,0 +1,114 @@
+"""Cache of driver sessions kept alive between app runs."""
+import atexit
+import json
+import threading
+from collections import namedtuple
+
+# Import core modules
+from core.logger import get_logger
+
+__all__ = ('Session', 'SessionCache', 'SESSION_CACHE')
+LOGGER = get_logger().logger
+
+Session = namedtuple('Session', ['driver', 'owner'])
+
+
+def _session_key(url, capabilities):
+    """
+    Return cache key for a server url and desired capabilities.
+
+    :param url: str
+        WebDriver url of the server.
+    :param capabilities: dict
+        Desired capabilities of the session.
+    :return: tuple
+    """
+    return url, json.dumps(capabilities, sort_keys=True, default=str)
+
+
+class SessionCache:
+    """Idle driver sessions keyed by server url and capabilities."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url, capabilities, check):
+        """
+        Take an idle session out of the cache after checking that it still works.
+
+        :param url: str
+            WebDriver url of the server.
+        :param capabilities: dict
+            Desired capabilities of the session.
+        :param check: callable
+            Function accepting the driver, raising an exception if the session is broken.
+        :return: Session
+            Cached session, 'None' if there is none. If the session was broken, its
+            driver is 'None' while the owner of the server is kept.
+        """
+        with self._lock:
+            session = self._idle.pop(_session_key(url, capabilities), None)
+        if session is None:
+            return None
+        try:
+            check(session.driver)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.info('Cached session on {url} is broken, recreating it: {err}'.format(
+                url=url, err=exc))
+            _quit(session.driver)
+            return session._replace(driver=None)
+        return session
+
+    def release(self, url, capabilities, driver, owner=None):
+        """
+        Keep a session alive in the cache for the next app run.
+
+        :param url: str
+            WebDriver url of the server.
+        :param capabilities: dict
+            Desired capabilities of the session.
+        :param driver: object
+            Driver of the session.
+        :param owner: object
+            Holder of the server, released when the session is finally closed.
+            (Example: PoolClient holding the lease of the server)
+        :return: None
+        """
+        with self._lock:
+            previous = self._idle.pop(_session_key(url, capabilities), None)
+            self._idle[_session_key(url, capabilities)] = Session(driver, owner)
+        if previous:
+            _close(previous)
+
+    def close_all(self):
+        """
+        Quit every cached session.
+
+        :return: None
+        """
+        with self._lock:
+            sessions = list(self._idle.values())
+            self._idle.clear()
+        for session in sessions:
+            _close(session)
+
+
+def _quit(driver):
+    """Quit a driver, ignoring errors of an already dead session."""
+    try:
+        driver.quit()
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+
+def _close(session):
+    """Quit the driver of a session and release its owner."""
+    _quit(session.driver)
+    if session.owner:
+        session.owner.release()
+
+
+SESSION_CACHE = SessionCache()
+atexit.register(SESSION_CACHE.close_all)
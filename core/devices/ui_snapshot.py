@@ -0,0 +1,172 @@
+"""In-memory index of a single page source fetch."""
+import re
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from functools import wraps
+
+__all__ = ('UINode', 'UISnapshot', 'invalidates_snapshot', 'ui_selector')
+
+BOUNDS_REGEX = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+INDEXED_ATTRIBUTES = ('class', 'text', 'content-desc', 'resource-id')
+
+UINode = namedtuple('UINode', ['class_name', 'text', 'content_desc', 'resource_id', 'bounds'])
+
+
+def _escape(value):
+    """
+    Escape a value for use inside a UiSelector string argument.
+
+    :param value: str
+    :return: str
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def ui_selector(class_name=None, resource_id=None, text=None, description=None, instance=None):
+    """
+    Build a UiSelector matching all given attributes.
+
+    :param class_name: str
+    :param resource_id: str
+    :param text: str
+    :param description: str
+        Content description of the element.
+    :param instance: int
+        Index of the element among the matching ones, from 0.
+    :return: str
+        (Example: 'new UiSelector().className("android.widget.TextView").text("Like")')
+    """
+    selector = 'new UiSelector()'
+    for method, value in (('className', class_name), ('resourceId', resource_id), ('text', text),
+                          ('description', description)):
+        if value:
+            selector += '.{mt}("{val}")'.format(mt=method, val=_escape(value))
+    if instance is not None:
+        selector += '.instance({num})'.format(num=int(instance))
+    return selector
+
+
+def parse_bounds(bounds):
+    """
+    Convert bounds attribute into a tuple of coordinates.
+
+    :param bounds: str
+        Bounds as present in page source. (Example: '[0,72][1080,228]')
+    :return: tuple
+        (x1, y1, x2, y2) or None if bounds cannot be parsed.
+    """
+    match = BOUNDS_REGEX.match(bounds or '')
+    if not match:
+        return None
+    return tuple(int(cord) for cord in match.groups())
+
+
+class UISnapshot:
+    """Page source fetched once and indexed by class, text, content-desc and resource-id."""
+
+    def __init__(self, source):
+        """
+        Initialization Method.
+
+        :param source: str
+            XML page source returned by the driver.
+        """
+        self.source = source
+        self._nodes = None
+        self._index = None
+
+    def _build_index(self):
+        """
+        Parse the page source and build the lookup index.
+
+        :return: None
+        """
+        self._nodes = []
+        self._index = {attr: {} for attr in INDEXED_ATTRIBUTES}
+        try:
+            root = ET.fromstring(self.source)
+        except ET.ParseError:
+            return
+        for element in root.iter():
+            attrib = element.attrib
+            node = UINode(class_name=attrib.get('class', element.tag),
+                          text=attrib.get('text', ''),
+                          content_desc=attrib.get('content-desc', ''),
+                          resource_id=attrib.get('resource-id', ''),
+                          bounds=parse_bounds(attrib.get('bounds')))
+            self._nodes.append(node)
+            for attr, value in zip(INDEXED_ATTRIBUTES, (node.class_name, node.text,
+                                                        node.content_desc, node.resource_id)):
+                if value:
+                    self._index[attr].setdefault(value, []).append(node)
+
+    @property
+    def nodes(self):
+        """Property getter for all nodes in document order."""
+        if self._nodes is None:
+            self._build_index()
+        return self._nodes
+
+    def find_all(self, class_name=None, text=None, content_desc=None, resource_id=None):
+        """
+        Return all nodes matching every given attribute, in document order.
+
+        :param class_name: str
+            Class of the element. (Example: 'android.widget.TextView')
+        :param text: str
+            Text of the element.
+        :param content_desc: str
+            Content description (accessibility id) of the element.
+        :param resource_id: str
+            Resource id of the element.
+        :return: list of UINode
+        """
+        if self._index is None:
+            self._build_index()
+        wanted = {attr: value for attr, value in zip(INDEXED_ATTRIBUTES, (class_name, text,
+                                                                          content_desc, resource_id))
+                  if value is not None}
+        if not wanted:
+            return list(self.nodes)
+        candidates = min((self._index[attr].get(value, []) for attr, value in wanted.items()),
+                         key=len)
+        return [node for node in candidates
+                if all(getattr(node, field) == wanted[attr]
+                       for attr, field in zip(INDEXED_ATTRIBUTES, UINode._fields)
+                       if attr in wanted)]
+
+    def find(self, class_name=None, text=None, content_desc=None, resource_id=None):
+        """
+        Return first node matching every given attribute.
+
+        :return: UINode
+            Returns 'None' if no node matches.
+        """
+        nodes = self.find_all(class_name=class_name, text=text,
+                              content_desc=content_desc, resource_id=resource_id)
+        return nodes[0] if nodes else None
+
+    def texts(self, class_name='android.widget.TextView'):
+        """
+        Return texts of all nodes of a class, in document order.
+
+        :param class_name: str
+            Class of the elements. Defaults to 'android.widget.TextView'.
+        :return: list of str
+        """
+        return [node.text for node in self.find_all(class_name=class_name)]
+
+
+def invalidates_snapshot(method):
+    """
+    Decorate device methods which change the screen so the cached snapshot is dropped.
+
+    :param method: callable
+        Device method performing a mutating action.
+    :return: callable
+    """
+    @wraps(method)
+    def _wrapper(self, *args, **kwargs):
+        self.invalidate_snapshot()
+        return method(self, *args, **kwargs)
+    return _wrapper
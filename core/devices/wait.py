@@ -0,0 +1,201 @@
+"""Condition based waiting for devices."""
+import asyncio
+import inspect
+import time
+
+__all__ = ('WaitTimeoutError', 'Waiter', 'element_present', 'element_gone',
+           'text_changed', 'activity_changed', 'source_changed')
+
+DEFAULT_WAIT_CONFIG = {
+    'FIXED_DELAY': False,
+    'TIMEOUT': 10,
+    'POLL_INTERVAL': 0.25,
+    'BACKOFF': 1.5,
+    'MAX_INTERVAL': 2,
+    'SERVER_READY_TIMEOUT': 60
+}
+
+
+class WaitTimeoutError(Exception):
+    """Raised when a condition is not met before the deadline."""
+
+
+class Waiter:
+    """Poll a condition on a device with adaptive backoff until a deadline."""
+
+    def __init__(self, device, wait_config=None, ignored_exceptions=None):
+        """
+        Initialization Method.
+
+        :param device: object
+            Device on which the conditions are evaluated.
+        :param wait_config: dict
+            'WAIT' section of the appium server config. Missing keys take default values.
+        :param ignored_exceptions: tuple
+            Exceptions treated as a falsy result of the condition.
+            Defaults to 'NOT_FOUND_EXCEPTIONS' of the device.
+        """
+        config = dict(DEFAULT_WAIT_CONFIG)
+        config.update(wait_config or {})
+        self.device = device
+        self.fixed_delay = bool(config['FIXED_DELAY'])
+        self.timeout = float(config['TIMEOUT'])
+        self.poll_interval = float(config['POLL_INTERVAL'])
+        self.backoff = float(config['BACKOFF'])
+        self.max_interval = float(config['MAX_INTERVAL'])
+        self.server_ready_timeout = float(config['SERVER_READY_TIMEOUT'])
+        if ignored_exceptions is None:
+            ignored_exceptions = getattr(device, 'NOT_FOUND_EXCEPTIONS', ())
+        self.ignored_exceptions = tuple(ignored_exceptions)
+
+    def until(self, condition, timeout=None, message=''):
+        """
+        Evaluate condition until it returns a truthy value or the deadline passes.
+
+        Ignored exceptions are treated as a falsy result, so lookups can be used
+        directly as conditions.
+
+        :param condition: callable
+            Function accepting the device and returning a truthy value when met.
+        :param timeout: float
+            Seconds to wait. Defaults to 'TIMEOUT' from the wait config.
+        :param message: str
+            Message of the WaitTimeoutError raised on deadline.
+        :return: object
+            Truthy value returned by the condition.
+        :raises: WaitTimeoutError
+            Raises WaitTimeoutError if condition is not met in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        pauses = self._pauses(time.monotonic() + timeout)
+        while True:
+            try:
+                value = condition(self.device)
+                if value:
+                    return value
+            except self.ignored_exceptions:
+                pass
+            pause = next(pauses, None)
+            if pause is None:
+                raise WaitTimeoutError(message or 'Condition not met in {sec} seconds!'.format(
+                    sec=timeout))
+            time.sleep(pause)
+
+    async def until_async(self, condition, timeout=None, message=''):
+        """
+        Evaluate condition without blocking the event loop, as 'until' does.
+
+        :param condition: callable
+            Function accepting the device and returning a value or an awaitable.
+        :param timeout: float
+            Seconds to wait. Defaults to 'TIMEOUT' from the wait config.
+        :param message: str
+            Message of the WaitTimeoutError raised on deadline.
+        :return: object
+            Truthy value returned by the condition.
+        :raises: WaitTimeoutError
+            Raises WaitTimeoutError if condition is not met in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        pauses = self._pauses(time.monotonic() + timeout)
+        while True:
+            try:
+                value = condition(self.device)
+                if inspect.isawaitable(value):
+                    value = await value
+                if value:
+                    return value
+            except self.ignored_exceptions:
+                pass
+            pause = next(pauses, None)
+            if pause is None:
+                raise WaitTimeoutError(message or 'Condition not met in {sec} seconds!'.format(
+                    sec=timeout))
+            await asyncio.sleep(pause)
+
+    def _pauses(self, deadline):
+        """Yield the pause before each further evaluation, growing by 'BACKOFF', until the deadline."""
+        interval = self.poll_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(interval, remaining)
+            interval = min(interval * self.backoff, self.max_interval)
+
+
+def element_present(el_type, text):
+    """
+    Condition met when the element is found on the screen.
+
+    :param el_type: str
+        type of element: 'access', 'id', 'xpath'
+    :param text: str
+        String by which element is identified.
+    :return: callable
+    """
+    def _condition(device):
+        return device.return_element(el_type=el_type, text=text)
+    return _condition
+
+
+def element_gone(el_type, text):
+    """
+    Condition met when the element is no longer found on the screen.
+
+    :param el_type: str
+        type of element: 'access', 'id', 'xpath'
+    :param text: str
+        String by which element is identified.
+    :return: callable
+    """
+    def _condition(device):
+        try:
+            return device.return_element(el_type=el_type, text=text) is None
+        except device.NOT_FOUND_EXCEPTIONS:
+            return True
+    return _condition
+
+
+def text_changed(el_type, text, old_text):
+    """
+    Condition met when the text of the element differs from 'old_text'.
+
+    :param el_type: str
+        type of element: 'access', 'id', 'xpath'
+    :param text: str
+        String by which element is identified.
+    :param old_text: str
+        Text of the element before the action.
+    :return: callable
+    """
+    def _condition(device):
+        element = device.return_element(el_type=el_type, text=text)
+        return element is not None and element.text != old_text
+    return _condition
+
+
+def activity_changed(old_activity):
+    """
+    Condition met when the foreground activity differs from 'old_activity'.
+
+    :param old_activity: str
+        Activity before the action.
+    :return: callable
+    """
+    def _condition(device):
+        return device.get_current_activity() != old_activity
+    return _condition
+
+
+def source_changed(old_source):
+    """
+    Condition met when the page source differs from 'old_source'.
+
+    :param old_source: str
+        Page source before the action.
+    :return: callable
+    """
+    def _condition(device):
+        return device.get_page_source() != old_source
+    return _condition
@@ -1,65 +1,407 @@
 """Executor class."""
 import os
 import sys
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from importlib import import_module
 
 # Import core modules
-from core.devices.device import read_config_file
+from core.app_registry import get_app_registry
+from core.checkpoint import Checkpoint
+from core.devices.command_metrics import COMMAND_METRICS, SERVER_METRICS
+from core.devices.device import Device, read_config_file
+from core.devices.recording import RECORDER
 from core.logger import get_logger
+from core.sleep_audit import SLEEP_AUDIT
+from core.soak import SoakRun
+from core.tracing import TRACER
 
-__all__ = ('Executor',)
+__all__ = ('Executor', 'DeviceScheduler', 'get_device_inventory')
 LOGGER = get_logger().logger
 
 
+def get_device_inventory(server_config):
+    """
+    Return the appium servers (one per device) listed in the appium server config.
+
+    :param server_config: dict
+        Appium server config. (Contents of 'appium_server_config.yaml')
+    :return: list
+        Names of servers in config order. (Example: ['SERVER_1', 'SERVER_2'])
+    """
+    return [name for name, value in server_config.items()
+            if isinstance(value, Mapping) and 'CMD' in value]
+
+
+class DeviceScheduler:
+    """Run queued app runs concurrently on a farm of devices, one run per device at a time."""
+
+    def __init__(self, devices, run_job, affinity=None):
+        """
+        Initialization Method.
+
+        :param devices: list
+            Names of the appium servers in the farm. (Example: ['SERVER_1', 'SERVER_2'])
+        :param run_job: callable
+            Function accepting a job and the list of assigned servers, returning a result dict.
+        :param affinity: dict
+            Servers allowed for an app, keyed by app name. Apps not listed may run anywhere.
+        """
+        self.devices = list(devices)
+        self.run_job = run_job
+        self.affinity = {app: list(servers) for app, servers in (affinity or {}).items()}
+        self._free = list(self.devices)
+        self._cond = threading.Condition()
+
+    def _allowed(self, job):
+        """Return servers the job may use, in inventory order."""
+        allowed = self.affinity.get(job['app'])
+        return [dev for dev in self.devices if allowed is None or dev in allowed]
+
+    def _take(self, job):
+        """Take free servers for the job. Must be called with the condition held."""
+        allowed = self._allowed(job)
+        servers = [dev for dev in self._free if dev in allowed][:job['device_count']]
+        if len(servers) < job['device_count']:
+            return None
+        for dev in servers:
+            self._free.remove(dev)
+        return servers
+
+    def _run(self, job, servers):
+        """Run a job and give its servers back to the farm. Errors of the job fail only the job."""
+        start = time.monotonic()
+        try:
+            result = self.run_job(job, servers)
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.exception('{app} failed on {dev}!'.format(app=job['app'], dev=', '.join(servers)))
+            result = {'app': job['app'], 'category': job['category'], 'status': 'failed',
+                      'seconds': round(time.monotonic() - start, 3), 'error': repr(exc)}
+        finally:
+            with self._cond:
+                self._free.extend(servers)
+                self._cond.notify_all()
+        result['devices'] = servers
+        return result
+
+    def run(self, jobs):
+        """
+        Run every job as soon as enough allowed devices are free.
+
+        Jobs are started in queue order, but a job waiting for a busy device does not
+        block later jobs which can run on the devices that are free.
+
+        :param jobs: list
+            Jobs as dicts with 'app', 'category' and 'device_count'.
+        :return: list
+            Result dict of each job, in the order of jobs, with the assigned devices and
+            'start'/'end' offsets in seconds from the start of the schedule.
+        """
+        results = [None] * len(jobs)
+        pending = []
+        for index, job in enumerate(jobs):
+            if len(self._allowed(job)) < job['device_count']:
+                LOGGER.error('Not enough devices for {app}: {num} required!'.format(
+                    app=job['app'], num=job['device_count']))
+                results[index] = {'app': job['app'], 'category': job['category'],
+                                  'status': 'failed', 'seconds': 0.0, 'devices': [],
+                                  'error': 'not enough devices'}
+            else:
+                pending.append(index)
+        start = time.monotonic()
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max(len(self.devices), 1), thread_name_prefix='device-scheduler') as pool:
+            with self._cond:
+                while pending:
+                    for index in list(pending):
+                        servers = self._take(jobs[index])
+                        if servers is None:
+                            continue
+                        pending.remove(index)
+                        LOGGER.info('Scheduling {app} on {dev}'.format(
+                            app=jobs[index]['app'], dev=', '.join(servers)))
+                        futures[index] = (time.monotonic() - start,
+                                          pool.submit(self._run, jobs[index], servers))
+                    if pending:
+                        self._cond.wait()
+            for index, (offset, future) in futures.items():
+                results[index] = future.result()
+                results[index]['start'] = round(offset, 3)
+                results[index]['end'] = round(offset + results[index]['seconds'], 3)
+        return results
+
+
 class Executor:
     """Executor Class."""
 
     def __init__(self, cmd_args):
         """Initialization Method."""
-        config_path = os.path.join(os.environ['basedir'], 'core', 'app_categories.yaml')
-        self.apps_config = read_config_file(config_path)
-        self.app_name = cmd_args['app'].lower()
-        self.category = self.get_app_category(self.app_name)
+        self.registry = get_app_registry()
+        self.app_names = self.get_app_names(cmd_args['app'])
+        self.app_categories = {name: self.get_app_category(name) for name in self.app_names}
+        self.app_name = self.app_names[0]
+        self.category = self.app_categories[self.app_name]
         self.device_type = cmd_args['device_type'].lower()
+        self.parallel = bool(cmd_args.get('parallel'))
+        self.audit_sleeps = bool(cmd_args.get('audit_sleeps'))
+        self.trace = bool(cmd_args.get('trace'))
+        self.record = bool(cmd_args.get('record'))
+        self.soak_duration = cmd_args.get('soak_duration')
+        self.soak_iterations = cmd_args.get('soak_iterations')
+        self.resume = bool(cmd_args.get('resume'))
+        self.checkpoint = bool(cmd_args.get('checkpoint'))
+        self.features = [name.strip() for name in (cmd_args.get('features') or '').split(',')
+                         if name.strip()] or None
+        self.results = []
+
+    def get_app_names(self, apps):
+        """
+        Expand the '--app' argument into a list of application names.
+
+        :param apps: str
+            Comma separated names of applications and / or categories.
+            (Example: 'whatsapp', 'whatsapp,youtube', 'social')
+        :return: list
+            Names of applications in the order they have to be run.
+        """
+        app_names = []
+        for name in apps.lower().split(','):
+            name = name.strip()
+            if not name:
+                continue
+            if name in self.registry.categories:
+                app_names.extend(self.registry.category_apps(name))
+            else:
+                app_names.append(name)
+        if not app_names:
+            LOGGER.error('No application given to run!')
+            sys.exit(1)
+        return app_names
 
     def get_app_category(self, app_name):
         """
-        Search app name in YAML file and returns the category.
+        Look up app name in the app registry and returns the category.
 
         :param app_name: str
             Name of application
         :return: str
             Category of application if found. (Example: 'social', 'streaming', 'messaging')
         """
-        for category in self.apps_config:
-            if app_name in self.apps_config[category]:
-                LOGGER.info('Category for {app} is identified as: {cate}'.format(
-                    app=app_name, cate=category))
-                return category
+        app = self.registry.get(app_name)
+        if app:
+            LOGGER.info('Category for {app} is identified as: {cate}'.format(
+                app=app_name, cate=app['category']))
+            return app['category']
         try:
             raise TypeError
         except TypeError:
             LOGGER.error('Category for {app} cannot be identified!'.format(app=app_name))
             sys.exit(1)
 
-    def execute_automation(self):
+    def get_app_class(self, app_name):
         """
-        Method to execute mobile automation.
+        Import the module of an application and return its class.
 
-        :return: None
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :return: class
+            Application class, 'None' if not found.
+        """
+        app = self.registry.get(app_name)
+        if not app:
+            return None
+        return getattr(import_module(app['module']), app['class'], None)
+
+    def run_app(self, app_name, category, servers=None):
+        """
+        Run all features of one application.
+
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :param category: str
+            Category of application. (Example: 'messaging')
+        :param servers: list
+            Appium servers assigned to the run. Defaults to the servers of the app class.
+        :return: dict
+            Result of the run with its status and duration in seconds.
         """
-        sys.path.append(os.path.sep.join([os.environ['basedir'], 'apps', self.category, self.app_name]))
-        test_module = import_module('.'.join(['apps', self.category, self.app_name, self.app_name]))
-        class_name = next(vars(test_module)[k] for k in vars(test_module)
-                          if k.lower() == self.app_name)
-        if class_name:
-            LOGGER.debug('Found class {ap}!'.format(ap=class_name))
+        result = {'app': app_name, 'category': category, 'status': 'passed', 'seconds': 0.0}
+        start = time.monotonic()
+        try:
+            class_name = self.get_app_class(app_name)
+            if not class_name:
+                LOGGER.error('Cannot find class name for {app}'.format(app=app_name))
+                sys.exit(1)
+            LOGGER.debug('Found class %s!', class_name)
             LOGGER.critical('########## Running Automation for '
-                            '{app} ##########'.format(app=self.app_name))
+                            '{app} ##########'.format(app=app_name))
             # Create class object & call all app features.
-            with class_name(self.device_type) as app_obj:
-                app_obj.all_features()
-            LOGGER.info('Automation execution completed.')
-        else:
-            LOGGER.error('Cannot find class name for {app}'.format(app=self.app_name))
+            with TRACER.span(app_name, 'app', servers=', '.join(servers or [])):
+                with class_name(self.device_type, servers=servers) as app_obj:
+                    if self.soak_duration or self.soak_iterations:
+                        soak = SoakRun(app_name, self.soak_duration, self.soak_iterations, self.features)
+                        result['soak'] = soak.path
+                        soak.run(app_obj)
+                    else:
+                        if self.resume or self.checkpoint:
+                            app_obj.checkpoint = self.get_checkpoint(app_name, class_name)
+                            result['checkpoint'] = app_obj.checkpoint.path
+                        if self.features:
+                            app_obj.run_features(self.features)
+                        else:
+                            app_obj.all_features()
+        except (Exception, SystemExit) as exc:  # pylint: disable=broad-except
+            LOGGER.exception('Automation for {app} failed!'.format(app=app_name))
+            result['status'] = 'failed'
+            result['error'] = repr(exc)
+        result['seconds'] = round(time.monotonic() - start, 3)
+        return result
+
+    def get_checkpoint(self, app_name, app_class):
+        """
+        Return the checkpoint of an app run, with the steps of a previous run when resuming.
+
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :param app_class: class
+            Application class.
+        :return: Checkpoint
+        """
+        checkpoint = Checkpoint(app_name, [step for step, _name, _kwargs in app_class.feature_steps(self.features)])
+        if self.resume:
+            checkpoint.load()
+        return checkpoint
+
+    def execute_automation(self):
+        """
+        Method to execute mobile automation for every requested application.
+
+        Applications run back-to-back in this process, so loaded configs, imported
+        modules, appium servers and driver sessions are shared between them.
+
+        :return: list
+            Result of each application run.
+        """
+        self.results = []
+        if self.audit_sleeps:
+            SLEEP_AUDIT.enable()
+        if self.trace:
+            TRACER.enable()
+        if self.record:
+            RECORDER.enable(os.path.join(os.environ['basedir'], 'logs', 'recordings'))
+        try:
+            if self.parallel:
+                self.results = self.run_on_device_farm()
+            else:
+                for app_name in self.app_names:
+                    self.results.append(self.run_app(app_name, self.app_categories[app_name]))
+        finally:
+            Device.stop_appium()
+            SLEEP_AUDIT.disable()
+            TRACER.disable()
+            RECORDER.disable()
+        self.log_summary()
+        self.export_metrics()
+        if self.trace:
+            self.write_trace()
+        if self.audit_sleeps:
+            SLEEP_AUDIT.report(sum(result['seconds'] for result in self.results),
+                               COMMAND_METRICS.total_seconds())
+        if any(result['status'] != 'passed' for result in self.results):
             sys.exit(1)
+        LOGGER.info('Automation execution completed.')
+        return self.results
+
+    def run_on_device_farm(self):
+        """
+        Run the applications concurrently on all devices of the appium server config.
+
+        :return: list
+            Result of each application run, with assigned devices and start / end offsets.
+        """
+        server_config = read_config_file(os.path.join(os.environ['basedir'], 'core', 'devices',
+                                                      'appium_server_config.yaml'))
+        jobs = [{'app': app_name, 'category': self.app_categories[app_name],
+                 'device_count': self.registry.get(app_name)['device_count']}
+                for app_name in self.app_names]
+        scheduler = DeviceScheduler(get_device_inventory(server_config),
+                                    lambda job, servers: self.run_app(job['app'], job['category'],
+                                                                      servers),
+                                    server_config.get('DEVICE_AFFINITY'))
+        return scheduler.run(jobs)
+
+    def export_metrics(self):
+        """
+        Write the latency metrics of the driver commands to 'logs/metrics'.
+
+        Server-side latencies parsed from the appium logs are written next to them, and
+        the time of each device is split into server time and client / network time.
+
+        :return: None
+        """
+        directory = os.path.join(os.environ['basedir'], 'logs', 'metrics')
+        try:
+            json_path, prom_path = COMMAND_METRICS.export(directory)
+            if SERVER_METRICS.histograms:
+                SERVER_METRICS.export(directory)
+        except OSError as exc:
+            LOGGER.error('Could not write command metrics: {err}'.format(err=exc))
+            return
+        LOGGER.info('Command latency metrics written to {js} and {prom}'.format(js=json_path, prom=prom_path))
+        for device, commands in COMMAND_METRICS.to_dict().items():
+            for command, summary in list(commands.items())[:3]:
+                LOGGER.info('{dev}: {cmd} x{num}, {sec:.2f} seconds total, p99 {p99:.3f}'.format(
+                    dev=device, cmd=command, num=summary['count'], sec=summary['total_seconds'],
+                    p99=summary['p99_seconds']))
+        server_devices = SERVER_METRICS.to_dict()
+        for device, commands in COMMAND_METRICS.to_dict().items():
+            if device not in server_devices:
+                continue
+            client_seconds = sum(summary['total_seconds'] for summary in commands.values())
+            server_seconds = sum(summary['total_seconds'] for summary in server_devices[device].values())
+            LOGGER.info('{dev}: {cl:.2f} seconds in driver commands, {sv:.2f} in the appium server and '
+                        'device, {net:.2f} in client and network'.format(
+                            dev=device, cl=client_seconds, sv=server_seconds,
+                            net=max(client_seconds - server_seconds, 0.0)))
+
+    def write_trace(self):
+        """
+        Write the trace events of the run to 'logs/traces'.
+
+        :return: None
+        """
+        path = os.path.join(os.environ['basedir'], 'logs', 'traces', 'trace_{ts}.json'.format(
+            ts=time.strftime('%Y%m%d_%H%M%S')))
+        try:
+            TRACER.write(path)
+        except OSError as exc:
+            LOGGER.error('Could not write trace: {err}'.format(err=exc))
+            return
+        LOGGER.info('Trace written to {path}. Open it in chrome://tracing or '
+                    'https://ui.perfetto.dev'.format(path=path))
+
+    def log_summary(self):
+        """
+        Log the status, duration and devices of every application run, and the error of failed runs.
+
+        :return: None
+        """
+        LOGGER.info('{app: <12} {cat: <12} {st: <8} {sec: >10}  {dev}'.format(
+            app='APP', cat='CATEGORY', st='STATUS', sec='SECONDS', dev='DEVICES'))
+        for result in self.results:
+            LOGGER.info('{app: <12} {cat: <12} {st: <8} {sec: >10.2f}  {dev}'.format(
+                app=result['app'], cat=result['category'], st=result['status'],
+                sec=result['seconds'], dev=', '.join(result.get('devices') or [])))
+        for result in self.results:
+            if result.get('error'):
+                LOGGER.error('{app} failed: {err}'.format(app=result['app'], err=result['error']))
+        total = sum(result['seconds'] for result in self.results)
+        LOGGER.info('Total: {sec:.2f} seconds for {num} app(s)'.format(
+            sec=total, num=len(self.results)))
+        ends = [result['end'] for result in self.results if 'end' in result]
+        if ends:
+            makespan = max(ends) - min(result['start'] for result in self.results if 'start' in result)
+            LOGGER.info('Makespan: {ms:.2f} seconds ({sp:.2f}x speed-up over serial runs)'.format(
+                ms=makespan, sp=(total / makespan) if makespan else 1.0))
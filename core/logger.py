@@ -1,11 +1,16 @@
 # -*- coding: utf-8 -*-
 """Logger module."""
+import atexit
 import datetime
+import json
 import logging
 import os
+import queue
 import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 
-__all__ = ('Logger', 'get_logger')
+__all__ = ('Logger', 'LogFormatter', 'JsonLinesFormatter', 'get_logger')
 _LOGGER_SINGLETON_INSTANCE = None
 SUPPORTED_LEVELS_MAP = {
     'critical': logging.CRITICAL,
@@ -35,6 +40,8 @@ class LogFormatter(logging.Formatter):
     def __init__(self):
         """Initialization method."""
         logging.Formatter.__init__(self)
+        # (second, formatted timestamp) of the last record; records mostly share a second.
+        self._timestamp = (None, '')
 
     def format(self, record):
         """
@@ -43,20 +50,65 @@ class LogFormatter(logging.Formatter):
         :param record: object
             Log record object
         :return: str
-            Formatted log message
+            Formatted log message, followed by the traceback of exceptions logged with it
         """
-        timestamp = datetime.datetime.fromtimestamp(record.created).strftime('%Y-%m-%d %H:%M:%S')
-        origin = '{fileName}#{lineNumber}'.format(
-            fileName=record.filename,
-            lineNumber=record.lineno)
+        second = int(record.created)
+        cached_second, timestamp = self._timestamp
+        if second != cached_second:
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+            self._timestamp = (second, timestamp)
         if record.funcName != '<module>':
-            origin += ' ({functionName})'.format(functionName=record.funcName)
-        return '[{ts: <19}]: {name}: {level: <8}: {msg: <68}: {origin}'.format(
-            ts=timestamp,
-            name=record.name,
-            level=record.levelname,
-            msg=record.getMessage(),
-            origin=origin)
+            message = '[%-19s]: %s: %-8s: %-68s: %s#%d (%s)' % (
+                timestamp, record.name, record.levelname, record.getMessage(), record.filename,
+                record.lineno, record.funcName)
+        else:
+            message = '[%-19s]: %s: %-8s: %-68s: %s#%d' % (
+                timestamp, record.name, record.levelname, record.getMessage(), record.filename,
+                record.lineno)
+        if record.exc_info and not record.exc_text:
+            # Cached on the record, so the console and file handlers format it once.
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message = message + '\n' + record.exc_text
+        return message
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Log formatter writing one JSON object per record."""
+
+    def format(self, record):
+        """
+        Override format method.
+
+        :param record: object
+            Log record object
+        :return: str
+            JSON object with time (epoch seconds), level, message, origin and thread.
+        """
+        entry = {'ts': round(record.created, 3), 'level': record.levelname, 'name': record.name,
+                 'msg': record.getMessage(), 'file': record.filename, 'line': record.lineno,
+                 'func': record.funcName, 'thread': record.threadName}
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler leaving the formatting of records to the listener thread."""
+
+    def prepare(self, record):
+        """
+        Merge the arguments into the message, so the record does not depend on mutable arguments.
+
+        The listener runs in this process, so exception info is passed on unformatted.
+
+        :param record: object
+            Log record object
+        :return: object
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
 
 
 class Logger(metaclass=Singleton):
@@ -71,6 +123,7 @@ class Logger(metaclass=Singleton):
         """
         self._log_file_name = None
         self._timestamp = None
+        self._listener = None
         self._logger = logging.getLogger('Android_Apps')
         # Work as a stand-alone logger when other loggers are not available.
         if not self._logger.handlers:
@@ -87,7 +140,57 @@ class Logger(metaclass=Singleton):
         """Property getter for _logger."""
         return self._logger
 
-    def start_file_logging(self, log_file_dir, log_level, app_name):
+    @property
+    def handlers(self):
+        """Property getter for the output handlers, behind the queue in queue mode."""
+        if self._listener:
+            return list(self._listener.handlers)
+        return list(self._logger.handlers)
+
+    def _add_handler(self, handler):
+        """Add an output handler, behind the queue in queue mode."""
+        if self._listener:
+            self._listener.handlers = self._listener.handlers + (handler,)
+        else:
+            self._logger.addHandler(handler)
+
+    def start_queue_logging(self):
+        """
+        Move the output handlers behind a queue served by a background thread.
+
+        Logging threads only put records on the queue, so they never wait on the
+        console or on disk. Records still queued are written at exit.
+
+        :return: None
+        """
+        if self._listener:
+            return
+        handlers = list(self._logger.handlers)
+        log_queue = queue.SimpleQueue()
+        for handler in handlers:
+            self._logger.removeHandler(handler)
+        self._logger.addHandler(_DeferredQueueHandler(log_queue))
+        self._listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self.stop_queue_logging)
+
+    def stop_queue_logging(self):
+        """
+        Write the queued records and attach the output handlers to the logger again.
+
+        :return: None
+        """
+        if not self._listener:
+            return
+        listener, self._listener = self._listener, None
+        for handler in list(self._logger.handlers):
+            if isinstance(handler, _DeferredQueueHandler):
+                self._logger.removeHandler(handler)
+        listener.stop()
+        for handler in listener.handlers:
+            self._logger.addHandler(handler)
+
+    def start_file_logging(self, log_file_dir, log_level, app_name, json_lines=False):
         """
         Method to start the file logging process.
 
@@ -103,6 +206,8 @@ class Logger(metaclass=Singleton):
                 DEBUG 10
         :param app_name: str
             Name of the application. For e.g. 'youtube'.
+        :param json_lines: Boolean
+            Whether to also write the records as JSON lines to a '.jsonl' file.
         :return: None
         """
         if log_level not in SUPPORTED_LEVELS_MAP:
@@ -113,7 +218,7 @@ class Logger(metaclass=Singleton):
 
         has_file_handler = False
 
-        for handler in self._logger.handlers:
+        for handler in self.handlers:
             if isinstance(handler, logging.FileHandler):
                 has_file_handler = True
                 break
@@ -124,7 +229,12 @@ class Logger(metaclass=Singleton):
             file_handler = logging.FileHandler(self._log_file_name)
             file_handler.setFormatter(LogFormatter())
             file_handler.setLevel(SUPPORTED_LEVELS_MAP[log_level])
-            self._logger.addHandler(file_handler)
+            self._add_handler(file_handler)
+            if json_lines:
+                json_handler = logging.FileHandler(os.path.splitext(self._log_file_name)[0] + '.jsonl')
+                json_handler.setFormatter(JsonLinesFormatter())
+                json_handler.setLevel(SUPPORTED_LEVELS_MAP[log_level])
+                self._add_handler(json_handler)
         self._logger.setLevel(SUPPORTED_LEVELS_MAP[log_level])
 
     def get_log_file_name(self):
@@ -0,0 +1,193 @@
+"""
+Opt-in audit of idle time spent in time.sleep and asyncio.sleep.
+
+While enabled, both are replaced by wrappers which record every call with its call
+site, the device it was done for and the app feature method it happened in. Sleeps
+done by Waiter between polls are kept apart as polling, since they end as soon as the
+device is ready.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Import core modules
+from core.logger import get_logger
+from core.tracing import STEP_WRAPPER_CODES
+
+__all__ = ('SleepAudit', 'SLEEP_AUDIT')
+LOGGER = get_logger().logger
+
+FEATURE_ENTRY = 'run_feature'
+POLL_FILE = os.path.join('core', 'devices', 'wait.py')
+
+
+def _relative_path(path):
+    """Return path relative to the base directory of the framework, if below it."""
+    base_dir = os.environ.get('basedir')
+    if base_dir and path.startswith(base_dir):
+        return os.path.relpath(path, base_dir)
+    return path
+
+
+def _device_name(frame):
+    """Return the name of the device an app or device frame works on, '-' if unknown."""
+    while frame is not None:
+        owner = frame.f_locals.get('self')
+        if owner is not None:
+            name = getattr(owner, 'mobile_name', None)
+            if name:
+                return name
+            # Waiter keeps its device as 'device', apps their first device as 'main_device'.
+            for attr in ('device', 'main_device'):
+                name = getattr(getattr(owner, attr, None), 'mobile_name', None)
+                if name:
+                    return name
+        frame = frame.f_back
+    return '-'
+
+
+def _feature_name(frame):
+    """
+    Return 'Class.method' of the feature called by run_feature, '-' if outside of it.
+
+    Frames of the trace_step wrappers are skipped, so decorated features are named after
+    the feature method rather than the wrapper.
+    """
+    callee = None
+    while frame is not None:
+        if frame.f_code.co_name == FEATURE_ENTRY:
+            if callee is None:
+                return '-'
+            owner = callee.f_locals.get('self')
+            prefix = type(owner).__name__ + '.' if owner is not None else ''
+            return prefix + callee.f_code.co_name
+        if frame.f_code not in STEP_WRAPPER_CODES:
+            callee = frame
+        frame = frame.f_back
+    return '-'
+
+
+class SleepAudit:
+    """Record time.sleep and asyncio.sleep calls by call site, device and feature."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.records = {}
+        self.enabled = False
+        self._original_sleep = None
+        self._original_async_sleep = None
+        self._lock = threading.Lock()
+
+    def _record(self, frame, slept):
+        """Add a sleep of the calling frame."""
+        path = _relative_path(frame.f_code.co_filename)
+        key = ('{path}:{line}'.format(path=path, line=frame.f_lineno), frame.f_code.co_name,
+               _device_name(frame), _feature_name(frame), path == POLL_FILE)
+        with self._lock:
+            record = self.records.setdefault(key, [0, 0.0])
+            record[0] += 1
+            record[1] += slept
+
+    def _sleep(self, seconds):
+        """Replacement of time.sleep recording the call."""
+        frame = sys._getframe(1)  # pylint: disable=protected-access
+        start = time.perf_counter()
+        try:
+            self._original_sleep(seconds)
+        finally:
+            self._record(frame, time.perf_counter() - start)
+
+    async def _async_sleep(self, delay, result=None):
+        """Replacement of asyncio.sleep recording the call."""
+        # The awaiting coroutine, or the task running it, is the caller of the sleep.
+        frame = sys._getframe(1)  # pylint: disable=protected-access
+        start = time.perf_counter()
+        try:
+            return await self._original_async_sleep(delay, result)
+        finally:
+            self._record(frame, time.perf_counter() - start)
+
+    def enable(self):
+        """
+        Start recording every time.sleep and asyncio.sleep call of the process.
+
+        :return: None
+        """
+        if self.enabled:
+            return
+        self._original_sleep = time.sleep
+        self._original_async_sleep = asyncio.sleep
+        time.sleep = self._sleep
+        asyncio.sleep = self._async_sleep
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop recording and restore time.sleep and asyncio.sleep.
+
+        :return: None
+        """
+        if not self.enabled:
+            return
+        time.sleep = self._original_sleep
+        asyncio.sleep = self._original_async_sleep
+        self.enabled = False
+
+    def reset(self):
+        """Forget every recorded sleep."""
+        with self._lock:
+            self.records.clear()
+
+    def sites(self):
+        """
+        Return the recorded sleeps ranked by idle seconds.
+
+        :return: list
+            Dicts with 'site', 'function', 'device', 'feature', 'poll', 'count' and 'seconds'.
+        """
+        with self._lock:
+            items = list(self.records.items())
+        sites = [{'site': site, 'function': function, 'device': device, 'feature': feature,
+                  'poll': poll, 'count': count, 'seconds': seconds}
+                 for (site, function, device, feature, poll), (count, seconds) in items]
+        return sorted(sites, key=lambda site: -site['seconds'])
+
+    def report(self, run_seconds, device_seconds=0.0, top=20):
+        """
+        Log the ranked table of idle time and the split of the run time.
+
+        :param run_seconds: float
+            Time of all app runs added up. (Device time, even for concurrent runs)
+        :param device_seconds: float
+            Time spent waiting on driver commands.
+        :param top: int
+            Number of call sites to list. Defaults to 20.
+        :return: dict
+            Seconds sleeping, polling and on driver commands, with their share of the run time.
+        """
+        sites = self.sites()
+        LOGGER.info('{sec: >9} {num: >6}  {dev: <10} {feat: <32} {site}'.format(
+            sec='IDLE SEC', num='CALLS', dev='DEVICE', feat='FEATURE', site='CALL SITE'))
+        for site in sites[:top]:
+            LOGGER.info('{sec: >9.2f} {num: >6}  {dev: <10} {feat: <32} {site} ({func}){poll}'.format(
+                sec=site['seconds'], num=site['count'], dev=site['device'], feat=site['feature'],
+                site=site['site'], func=site['function'], poll=' [poll]' if site['poll'] else ''))
+        summary = {
+            'run_seconds': run_seconds,
+            'sleep_seconds': sum(site['seconds'] for site in sites if not site['poll']),
+            'poll_seconds': sum(site['seconds'] for site in sites if site['poll']),
+            'device_seconds': device_seconds
+        }
+        for name in ('sleep', 'poll', 'device'):
+            summary[name + '_share'] = (summary[name + '_seconds'] / run_seconds) if run_seconds else 0.0
+        LOGGER.info('Run time {run:.2f} seconds: sleeping {sl:.2f} ({slp:.1%}), polling {po:.2f} '
+                    '({pop:.1%}), driver commands {dv:.2f} ({dvp:.1%})'.format(
+                        run=run_seconds, sl=summary['sleep_seconds'], slp=summary['sleep_share'],
+                        po=summary['poll_seconds'], pop=summary['poll_share'],
+                        dv=device_seconds, dvp=summary['device_share']))
+        return summary
+
+
+SLEEP_AUDIT = SleepAudit()
@@ -0,0 +1,209 @@
+"""
+Endurance (soak) runs repeating the features of an app on the same sessions.
+
+Each iteration runs the feature steps of the app once, or those of the selected
+features, and appends one JSON line to 'logs/soak/<app>_<timestamp>.jsonl' as soon
+as it ends: step durations, driver commands per minute, mean command latency and the
+memory and thread count of this process. Before every further iteration the app is
+reset (BaseApp.reset_state), and before every iteration it is brought to the state left
+by the steps preceding the first selected one (BaseApp.restore_state), so each
+iteration starts alike.
+The last line holds the latency percentiles of each step over the whole run and the
+drift per iteration of duration, command latency and memory, which grows when the
+app or the harness slows down or leaks.
+"""
+import ctypes
+import json
+import os
+import threading
+import time
+
+# Import core modules
+from core.devices.command_metrics import COMMAND_METRICS, LatencyHistogram
+from core.logger import get_logger
+
+__all__ = ('SoakRun', 'process_memory')
+LOGGER = get_logger().logger
+
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    """PROCESS_MEMORY_COUNTERS structure filled by GetProcessMemoryInfo on Windows."""
+
+    _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong)] + [
+        (name, ctypes.c_size_t) for name in (
+            'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+            'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+
+def _windows_working_set():
+    """Return the working set of this process in bytes, 'None' if it cannot be read."""
+    counters = _ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.windll.kernel32
+    kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    get_info.argtypes = (ctypes.c_void_p, ctypes.POINTER(_ProcessMemoryCounters), ctypes.c_ulong)
+    if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.WorkingSetSize
+
+
+def process_memory():
+    """
+    Return the resident memory of this process.
+
+    Read from /proc on Linux and from the working set on Windows.
+
+    :return: int
+        Bytes, 'None' where the platform does not tell.
+    """
+    try:
+        if os.name == 'nt':
+            return _windows_working_set()
+        with open('/proc/self/statm') as stream:
+            return int(stream.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def slope(values):
+    """
+    Return the least squares slope of values over their index.
+
+    :param values: list
+    :return: float
+        Change per iteration. 0 for less than two values.
+    """
+    points = [(index, value) for index, value in enumerate(values) if value is not None]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(index for index, _value in points) / len(points)
+    mean_y = sum(value for _index, value in points) / len(points)
+    spread = sum((index - mean_x) ** 2 for index, _value in points)
+    return sum((index - mean_x) * (value - mean_y) for index, value in points) / spread
+
+
+class SoakRun:
+    """Repeat the features of one app for a duration or a number of iterations."""
+
+    def __init__(self, app_name, duration=None, iterations=None, features=None, directory=None):
+        """
+        Initialization Method.
+
+        :param app_name: str
+            Name of application. (Example: 'whatsapp')
+        :param duration: float
+            Seconds after which no further iteration is started.
+        :param iterations: int
+            Number of iterations. Without duration nor iterations a single iteration runs.
+        :param features: list
+            Names of the features whose steps are repeated. Defaults to all features of the app.
+        :param directory: str
+            Directory of the metrics file. Defaults to 'logs/soak'.
+        """
+        self.app_name = app_name
+        self.duration = duration
+        self.iterations = iterations
+        self.features = features
+        directory = directory or os.path.join(os.environ['basedir'], 'logs', 'soak')
+        self.path = os.path.join(directory, '{app}_{ts}.jsonl'.format(app=app_name,
+                                                                      ts=time.strftime('%Y%m%d_%H%M%S')))
+        self.histograms = {}
+        self.records = []
+
+    def _done(self, iteration, elapsed):
+        """Return 'True' once the iteration count or the duration is reached."""
+        if self.iterations and iteration >= self.iterations:
+            return True
+        if self.duration:
+            return elapsed >= self.duration
+        return not self.iterations and iteration >= 1
+
+    def run(self, app_obj):
+        """
+        Run the iterations, writing the metrics of each one as it ends.
+
+        Iterations after the first one start with app_obj.reset_state. Every iteration then
+        starts with app_obj.restore_state with the steps preceding the first selected step,
+        if any. Both are left out of the metrics of the iteration.
+
+        :param app_obj: BaseApp
+            Application object with open sessions.
+        :return: list
+            Metrics of every iteration.
+        :raises: ValueError
+            Raises ValueError if a selected feature is not a feature of the app.
+        :raises: Exception
+            Errors of a failing iteration are raised once its metrics are written.
+        """
+        steps = app_obj.feature_steps(self.features)
+        all_steps = [step for step, _name, _kwargs in app_obj.feature_steps()]
+        preceding = all_steps[:all_steps.index(steps[0][0])] if steps else []
+        devices = [device.mobile_name for device in app_obj.devices]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        LOGGER.info('Soak run of {app} writing metrics to {path}'.format(app=self.app_name, path=self.path))
+        start = time.monotonic()
+        with open(self.path, 'w') as stream:
+            try:
+                while not self._done(len(self.records), time.monotonic() - start):
+                    if self.records:
+                        app_obj.reset_state()
+                    if preceding:
+                        app_obj.restore_state(preceding)
+                    self._iteration(app_obj, steps, devices, start, stream)
+            finally:
+                stream.write(json.dumps({'summary': self.summary()}) + '\n')
+        return self.records
+
+    def _iteration(self, app_obj, steps, devices, start, stream):
+        """Run the steps once and append their metrics to the stream."""
+        commands, command_seconds = COMMAND_METRICS.totals(devices)
+        record = {'iteration': len(self.records) + 1, 'offset': round(time.monotonic() - start, 3),
+                  'status': 'passed', 'features': {}}
+        iteration_start = time.monotonic()
+        try:
+            for step, name, kwargs in steps:
+                _output, seconds = app_obj.run_feature(name, **kwargs)
+                record['features'][step] = round(seconds, 3)
+                self.histograms.setdefault(step, LatencyHistogram()).record(seconds)
+        except (Exception, SystemExit) as exc:
+            record['status'] = 'failed'
+            record['error'] = repr(exc)
+            raise
+        finally:
+            seconds = time.monotonic() - iteration_start
+            count, total = COMMAND_METRICS.totals(devices)
+            count, total = count - commands, total - command_seconds
+            record.update({
+                'seconds': round(seconds, 3),
+                'commands': count,
+                'actions_per_min': round(count / seconds * 60, 2) if seconds else 0.0,
+                'command_mean_ms': round(total / count * 1000, 3) if count else 0.0,
+                'rss_bytes': process_memory(),
+                'threads': threading.active_count()
+            })
+            self.records.append(record)
+            stream.write(json.dumps(record) + '\n')
+            stream.flush()
+            LOGGER.info('Soak {app} iteration {num}: {sec:.1f} seconds, {apm} actions/min, '
+                        '{ms} ms per command'.format(app=self.app_name, num=record['iteration'],
+                                                     sec=seconds, apm=record['actions_per_min'],
+                                                     ms=record['command_mean_ms']))
+
+    def summary(self):
+        """
+        Return the step percentiles and the drift per iteration of the run.
+
+        :return: dict
+        """
+        return {
+            'iterations': len(self.records),
+            'failed': sum(record['status'] != 'passed' for record in self.records),
+            'features': {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+            'drift': {
+                'seconds_per_iteration': round(slope([rec['seconds'] for rec in self.records]), 6),
+                'command_ms_per_iteration': round(slope([rec['command_mean_ms'] for rec in self.records]), 6),
+                'rss_bytes_per_iteration': round(slope([rec['rss_bytes'] for rec in self.records]), 1),
+                'threads_per_iteration': round(slope([rec['threads'] for rec in self.records]), 6)
+            }
+        }
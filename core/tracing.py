@@ -0,0 +1,214 @@
+"""
+Timeline tracing in the Chrome trace-event format.
+
+When enabled, app runs, app feature steps and driver commands are recorded as
+complete ('X') events. Each device is a process of the trace and each thread a
+track inside it, so the file opened in chrome://tracing or https://ui.perfetto.dev
+shows how the activity of several phones overlaps and where they are idle.
+"""
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+__all__ = ('Tracer', 'TRACER', 'trace_step')
+
+RUN_PROCESS = 'run'
+# Code objects of the trace_step wrappers, skipped when looking for the feature method of a frame.
+STEP_WRAPPER_CODES = set()
+
+
+class Tracer:
+    """Collect trace events of the process."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.enabled = False
+        self.events = []
+        self._origin = time.perf_counter()
+        self._processes = {}
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """
+        Start recording events.
+
+        :return: None
+        """
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop recording events. Recorded events are kept.
+
+        :return: None
+        """
+        self.enabled = False
+
+    def reset(self):
+        """Forget every recorded event."""
+        with self._lock:
+            self.events = []
+            self._processes.clear()
+            self._threads.clear()
+
+    def _ids(self, device):
+        """Return trace process and thread ids of a device and the current thread."""
+        process = device or RUN_PROCESS
+        thread = threading.current_thread()
+        with self._lock:
+            if process not in self._processes:
+                pid = self._processes[process] = len(self._processes) + 1
+                self.events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                                    'args': {'name': process}})
+            pid = self._processes[process]
+            if (pid, thread.ident) not in self._threads:
+                tid = self._threads[(pid, thread.ident)] = len(self._threads) + 1
+                self.events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                    'args': {'name': thread.name}})
+        return pid, self._threads[(pid, thread.ident)]
+
+    def add(self, name, category, start, end, device=None, **args):
+        """
+        Record a complete event.
+
+        :param name: str
+            Name of the event. (Example: 'WhatsApp.put_status')
+        :param category: str
+            'app', 'step' or 'command'
+        :param start: float
+            time.perf_counter() at the start of the event.
+        :param end: float
+            time.perf_counter() at the end of the event.
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1') Events without device go to 'run'.
+        :param args: dict
+            Extra values shown with the event.
+        :return: None
+        """
+        pid, tid = self._ids(device)
+        event = {'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                 'ts': round((start - self._origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1)}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category, device=None, **args):
+        """
+        Record the duration of a block as an event, if tracing is enabled.
+
+        :param name: str
+            Name of the event.
+        :param category: str
+            'app', 'step' or 'command'
+        :param device: str
+            Name of the mobile.
+        :return: None
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            args['error'] = repr(exc)
+            raise
+        finally:
+            self.add(name, category, start, time.perf_counter(), device, **args)
+
+    def instrument(self, driver, device):
+        """
+        Record every command sent through the driver as an event.
+
+        Like CommandMetrics.instrument, the driver's 'execute' method is wrapped on the
+        instance, and instrumenting a driver twice has no further effect.
+
+        :param driver: WebDriver
+            Driver of the device.
+        :param device: str
+            Name of the mobile. (Example: 'MOBILE_1')
+        :return: WebDriver
+        """
+        execute = driver.execute
+        if getattr(execute, 'tracer', None) is self:
+            return driver
+
+        @wraps(execute)
+        def _execute(driver_command, params=None):
+            if not self.enabled:
+                return execute(driver_command, params)
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self.add(driver_command, 'command', start, time.perf_counter(), device)
+
+        _execute.tracer = self
+        driver.execute = _execute
+        return driver
+
+    def write(self, path):
+        """
+        Write the recorded events as a trace-event JSON file.
+
+        :param path: str
+        :return: str
+            Path of the written file.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w') as stream:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, stream)
+        return path
+
+
+TRACER = Tracer()
+
+
+def _device_of(owner):
+    """Return the mobile name of a device, or of the main device of an app."""
+    name = getattr(owner, 'mobile_name', None)
+    if name:
+        return name
+    return getattr(getattr(owner, 'main_device', None), 'mobile_name', None)
+
+
+def trace_step(func):
+    """
+    Record calls of an app feature step as trace events on the app's main device.
+
+    :param func: callable
+        Feature method of an app, static method whose first argument is a device, or
+        coroutine method whose first argument after self is a device.
+    :return: callable
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def _async_wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return await func(*args, **kwargs)
+            # Coroutine steps of an app get their device as second argument.
+            owner = args[1] if len(args) > 1 else None
+            with TRACER.span(func.__qualname__, 'step', _device_of(owner)):
+                return await func(*args, **kwargs)
+        STEP_WRAPPER_CODES.add(_async_wrapper.__code__)
+        return _async_wrapper
+
+    @wraps(func)
+    def _wrapper(*args, **kwargs):
+        if not TRACER.enabled:
+            return func(*args, **kwargs)
+        owner = args[0] if args else None
+        with TRACER.span(func.__qualname__, 'step', _device_of(owner)):
+            return func(*args, **kwargs)
+    STEP_WRAPPER_CODES.add(_wrapper.__code__)
+    return _wrapper
@@ -7,6 +7,8 @@ Only --app argument is mandatory and few are optional to start the regression.
 
 Usage:
 python run.py --app whatsapp
+python run.py --app whatsapp,youtube
+python run.py --app social
 """
 import argparse
 import getpass
@@ -21,7 +23,7 @@ LOGGER = get_logger().logger
 LOG_FILE_BASE_DIR = None
 
 
-def start_logging(log_level, app_name):
+def start_logging(log_level, app_name, use_queue=False, json_lines=False):
     """
     Function to start the logging for the testing.
 
@@ -29,9 +31,15 @@ def start_logging(log_level, app_name):
          'user', 'info', 'debug'. verbosity level: 'debug' > 'info' > 'user'
     :param app_name: str
         Name of the application.
+    :param use_queue: Boolean
+        Whether to write log records from a background thread.
+    :param json_lines: Boolean
+        Whether to also write the log as JSON lines.
     :return: None
     """
     lgr = Logger()
+    if use_queue:
+        lgr.start_queue_logging()
     log_file_dir = os.path.join(LOG_FILE_BASE_DIR, getpass.getuser())
     if not os.path.exists(log_file_dir):
         try:
@@ -40,7 +48,7 @@ def start_logging(log_level, app_name):
             print('ERROR: Could not create log file directory'
                   'to store regression logs: ' + str(exp))
             print(sys.exc_info())
-    lgr.start_file_logging(log_file_dir, log_level, app_name)
+    lgr.start_file_logging(log_file_dir, log_level, app_name, json_lines)
 
 
 def parse_cmd_line_arguments():
@@ -55,16 +63,64 @@ def parse_cmd_line_arguments():
         {nm} script to launch a regression.\n
         For e.g.: python {nm} --app youtube
         '''.format(nm=sys.argv[0]))
-    parser.add_argument('--app', help='Name of the app to run.',
+    parser.add_argument('--app', help='Name of the app to run. Comma separated names of apps '
+                                      'and / or categories run back-to-back in one process.',
                         required=True)
     parser.add_argument('--device-type',
                         required=False,
                         default='android',
                         help='<android|ios> Type of device.')
+    parser.add_argument('--parallel',
+                        required=False,
+                        action='store_true',
+                        help='Run the apps concurrently on all devices of the appium server config.')
+    parser.add_argument('--audit-sleeps',
+                        required=False,
+                        action='store_true',
+                        help='Record every time.sleep and asyncio.sleep and report idle time by call site.')
+    parser.add_argument('--trace',
+                        required=False,
+                        action='store_true',
+                        help='Write a Chrome trace-event timeline of feature steps and driver commands.')
+    parser.add_argument('--record',
+                        required=False,
+                        action='store_true',
+                        help='Record the driver commands of every device to replayable trace files.')
+    parser.add_argument('--features',
+                        required=False,
+                        default=None,
+                        help='Comma separated feature methods to run instead of all features.')
+    parser.add_argument('--resume',
+                        required=False,
+                        action='store_true',
+                        help='Skip the feature steps completed by the previous run of each app.')
+    parser.add_argument('--checkpoint',
+                        required=False,
+                        action='store_true',
+                        help='Write the completed feature steps of each app, to resume a later run.')
+    parser.add_argument('--soak-duration',
+                        required=False,
+                        type=float,
+                        default=None,
+                        help='Repeat the features on the same sessions for this many seconds.')
+    parser.add_argument('--soak-iterations',
+                        required=False,
+                        type=int,
+                        default=None,
+                        help='Repeat the features on the same sessions this many times.')
     parser.add_argument('--log-level',
                         required=False,
                         default='debug',
                         help='<user|info|debug> Increasing verbosity order user<info<debug.')
+    parser.add_argument('--log-queue',
+                        required=False,
+                        action='store_true',
+                        help='Write log records from a background thread, so devices never wait on disk. '
+                             'Implied by --soak-duration and --soak-iterations.')
+    parser.add_argument('--log-json',
+                        required=False,
+                        action='store_true',
+                        help='Also write the log as JSON lines next to the log file.')
     parser.add_argument('--log-file-dir',
                         required=False,
                         default=None,
@@ -73,7 +129,7 @@ def parse_cmd_line_arguments():
 
 
 if __name__ == '__main__':
-    assert sys.version_info >= (3, 5), 'This application requires Python 3.5 or higher to run.'
+    assert sys.version_info >= (3, 7), 'This application requires Python 3.7 or higher to run.'
 
     # Base directory of the application.
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -91,7 +147,11 @@ if __name__ == '__main__':
         ARGS['log_file_dir'] = LOG_FILE_BASE_DIR
     else:
         LOG_FILE_BASE_DIR = ARGS['log_file_dir']
-    start_logging(ARGS['log_level'], ARGS['app'].lower())
+    if ARGS['soak_duration'] or ARGS['soak_iterations']:
+        # Soak runs log for hours; keep disk writes off the device threads.
+        ARGS['log_queue'] = True
+    start_logging(ARGS['log_level'], ARGS['app'].lower().replace(',', '_'), ARGS['log_queue'],
+                  ARGS['log_json'])
 
     CMD = 'python {nm} '.format(nm=sys.argv[0])
     for key, value in ARGS.items():
@@ -0,0 +1,41 @@
+"""Shared fixtures of the unit tests."""
+import os
+
+import pytest
+
+os.environ.setdefault('basedir', os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+# Import core modules
+# pylint: disable=wrong-import-position
+from core.devices.fake_appium import start_fake_server  # noqa: E402
+
+
+@pytest.fixture
+def fake_server():
+    """Fake appium server on a free port, stopped after the test."""
+    server = start_fake_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def android_device(fake_server):
+    """AndroidDevice with a session on the fake appium server, skipped without appium."""
+    android_module = pytest.importorskip('core.devices.android_device')
+    # pylint: disable=import-outside-toplevel
+    from core.devices.wait import Waiter
+
+    class FakeServerDevice(android_module.AndroidDevice):
+        """AndroidDevice connected to the fake server instead of the configured one."""
+
+        def create_driver(self, app_server):
+            """Open a session on the fake server."""
+            self.mobile_name = 'MOBILE_1'
+            self.driver = android_module.webdriver.Remote(fake_server.url, {'platformName': 'Android'})
+            self.touch = android_module.TouchAction(self.driver)
+
+    device = FakeServerDevice('whatsapp', 'SERVER_1')
+    device.waiter = Waiter(device, {'TIMEOUT': 1, 'POLL_INTERVAL': 0.01, 'MAX_INTERVAL': 0.05})
+    yield device
+    device.driver.quit()
@@ -0,0 +1,108 @@
+"""Tests of the W3C gesture batches."""
+import pytest
+
+# Import core modules
+from core.devices.actions import TAP_HOLD_MS, ActionBatch
+from core.devices.fake_appium import FakeSession, Scenario, perform_w3c_actions
+
+# Center of the WhatsApp icon of the launcher and of the first chat of WhatsApp.
+WHATSAPP_ICON = (160, 1520)
+FIRST_CHAT = (550, 390)
+
+
+class RecordingDevice:
+    """Device recording the payloads it performs."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.x_cord = 540
+        self.start_y = 1400
+        self.end_y = 400
+        self.performed = []
+
+    def perform_actions(self, payload, delay=2):
+        """Record the payload and the settle delay."""
+        self.performed.append((payload, delay))
+
+
+def move(x_cord, y_cord, duration=0):
+    """Return a W3C pointer move to the coordinates."""
+    return {'type': 'pointerMove', 'duration': duration, 'x': x_cord, 'y': y_cord, 'origin': 'viewport'}
+
+
+DOWN = {'type': 'pointerDown', 'button': 0}
+UP = {'type': 'pointerUp', 'button': 0}
+
+
+def pointer_actions(batch):
+    """Return the actions of the single touch pointer of a batch payload."""
+    sources = batch.payload()['actions']
+    assert [(source['type'], source['id'], source['parameters']) for source in sources] == \
+        [('pointer', 'finger1', {'pointerType': 'touch'})]
+    return sources[0]['actions']
+
+
+@pytest.fixture
+def session():
+    """Session of the fake server on the phone home screen."""
+    return FakeSession(Scenario.load(), {'platformName': 'Android'})
+
+
+def test_tap_and_long_press_hold_then_release():
+    assert pointer_actions(ActionBatch(RecordingDevice()).tap(10.6, 20)) == \
+        [move(10, 20), DOWN, {'type': 'pause', 'duration': TAP_HOLD_MS}, UP]
+    assert pointer_actions(ActionBatch(RecordingDevice()).long_press(10, 20, 1500)) == \
+        [move(10, 20), DOWN, {'type': 'pause', 'duration': 1500}, UP]
+
+
+def test_swipe_and_press_and_slide_move_while_down():
+    assert pointer_actions(ActionBatch(RecordingDevice()).swipe(10, 900, 10, 100, duration=300)) == \
+        [move(10, 900), DOWN, {'type': 'pause', 'duration': 0}, move(10, 100, 300), UP]
+    assert pointer_actions(ActionBatch(RecordingDevice()).press_and_slide(10, 900, 500, 900, 800)) == \
+        [move(10, 900), DOWN, {'type': 'pause', 'duration': 800}, move(500, 900), UP]
+    assert pointer_actions(ActionBatch(RecordingDevice()).swipe_up())[::3] == [move(540, 1400), move(540, 400, 1000)]
+
+
+def test_gestures_are_chained_in_one_source():
+    batch = ActionBatch(RecordingDevice()).tap(1, 2).pause(250.0).swipe_right({'SWIPE_RIGHT': {'x': 900, 'y': 50}})
+    actions = pointer_actions(batch)
+    assert len(batch) == len(actions) == 10
+    assert actions[4] == {'type': 'pause', 'duration': 250}
+    assert (actions[5], actions[8]) == (move(900, 50), move(500, 50, 1000))
+
+
+def test_batch_is_performed_once_on_exit():
+    device = RecordingDevice()
+    with ActionBatch(device, settle_delay=0) as batch:
+        batch.tap(1, 2).tap(3, 4)
+    assert [(len(payload['actions'][0]['actions']), delay) for payload, delay in device.performed] == [(8, 0)]
+    assert len(batch) == 0
+    batch.perform()
+    with pytest.raises(RuntimeError):
+        with ActionBatch(device) as failing:
+            failing.tap(1, 2)
+            raise RuntimeError('gesture could not be built')
+    assert len(device.performed) == 1
+
+
+def test_fake_server_follows_taps_and_long_presses(session):
+    batch = ActionBatch(RecordingDevice()).tap(*WHATSAPP_ICON)
+    perform_w3c_actions(session, batch.payload()['actions'])
+    assert session.screen.name == 'whatsapp.home'
+    perform_w3c_actions(session, ActionBatch(RecordingDevice()).long_press(*FIRST_CHAT, 2000).payload()['actions'])
+    assert session.screen.name == 'whatsapp.chat'
+
+
+def test_fake_server_stays_on_screen_for_swipes_and_pauses(session):
+    for batch, redraws in ((ActionBatch(RecordingDevice()).swipe(*WHATSAPP_ICON, 160, 400), 1),
+                           (ActionBatch(RecordingDevice()).press_and_slide(*WHATSAPP_ICON, 800, 1520, 1000), 1),
+                           (ActionBatch(RecordingDevice()).pause(500), 0)):
+        revision = session.revision
+        perform_w3c_actions(session, batch.payload()['actions'])
+        assert (session.screen.name, session.revision) == ('launcher.home', revision + redraws)
+
+
+def test_batch_is_sent_through_the_device(android_device, fake_server):
+    with android_device.actions(settle_delay=0) as batch:
+        batch.tap(*WHATSAPP_ICON).pause(100).tap(*FIRST_CHAT)
+    assert fake_server.sessions[android_device.driver.session_id].screen.name == 'whatsapp.chat'
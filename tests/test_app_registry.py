@@ -0,0 +1,112 @@
+"""Tests of the registry of automated applications."""
+import json
+import os
+
+import pytest
+
+# Import core modules
+from core.app_registry import AppRegistry
+from core.config import clear_config_cache
+
+CATEGORY_SOURCE = '''from apps.base_app import BaseApp
+
+
+class Social(BaseApp):
+    DEFAULT_SERVERS = ('SERVER_1', 'SERVER_2')
+'''
+WHATSAPP_SOURCE = '''from apps.social.social import Social
+
+raise RuntimeError('app modules must not be imported by the registry')
+
+
+class WhatsApp(Social):
+    FEATURES = ['send_message']
+'''
+FACEBOOK_SOURCE = '''from apps import social
+
+
+class Facebook(social.Social):
+    DEFAULT_SERVERS = ['SERVER_1', 'SERVER_2', 'SERVER_3']
+'''
+
+
+def touch(path):
+    """Move the modification time of a file clearly after the previous one."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+@pytest.fixture
+def base_dir(tmp_path):
+    """Framework tree with a category of three apps, one of them without its class."""
+    (tmp_path / 'core').mkdir()
+    (tmp_path / 'core' / 'app_categories.yaml').write_text('social: [whatsapp, facebook, snapchat]\n')
+    social = tmp_path / 'apps' / 'social'
+    for app, source in (('whatsapp', WHATSAPP_SOURCE), ('facebook', FACEBOOK_SOURCE), ('snapchat', '')):
+        (social / app).mkdir(parents=True)
+        (social / app / (app + '.py')).write_text(source)
+    (social / 'social.py').write_text(CATEGORY_SOURCE)
+    (tmp_path / 'apps' / 'base_app.py').write_text('class BaseApp:\n    pass\n')
+    clear_config_cache()
+    yield str(tmp_path)
+    clear_config_cache()
+
+
+def test_build_reads_classes_without_importing_apps(base_dir):
+    registry = AppRegistry(base_dir).build()
+    assert sorted(registry.apps) == ['facebook', 'whatsapp']
+    assert registry.get('WhatsApp') == {
+        'name': 'whatsapp',
+        'category': 'social',
+        'module': 'apps.social.whatsapp.whatsapp',
+        'class': 'WhatsApp',
+        'device_count': 2,
+        'config': os.path.join('apps', 'social', 'whatsapp', 'config', 'app_config.yaml')
+    }
+    assert registry.get('facebook')['device_count'] == 3
+    assert registry.category_apps('social') == ['whatsapp', 'facebook']
+    assert registry.categories == ['social']
+    assert registry.get('snapchat') is None
+
+
+def test_load_writes_and_reuses_the_cache(base_dir, monkeypatch):
+    registry = AppRegistry.load(base_dir)
+    with open(registry.cache_file) as stream:
+        assert json.load(stream)['apps'] == registry.apps
+
+    def _build(_registry):
+        raise AssertionError('fresh cache was rebuilt')
+
+    monkeypatch.setattr(AppRegistry, 'build', _build)
+    cached = AppRegistry.load(base_dir)
+    assert cached.apps == registry.apps
+    assert not cached.is_stale()
+
+
+def test_changed_source_rebuilds_the_cache(base_dir):
+    registry = AppRegistry.load(base_dir)
+    app_file = os.path.join(base_dir, 'apps', 'social', 'whatsapp', 'whatsapp.py')
+    with open(app_file, 'a') as stream:
+        stream.write('    DEFAULT_SERVERS = ("SERVER_1",)\n')
+    touch(app_file)
+    assert registry.is_stale()
+    assert AppRegistry.load(base_dir).get('whatsapp')['device_count'] == 1
+    with open(registry.cache_file) as stream:
+        assert json.load(stream)['apps']['whatsapp']['device_count'] == 1
+
+
+def test_new_app_source_makes_the_cache_stale(base_dir):
+    registry = AppRegistry.load(base_dir)
+    with open(os.path.join(base_dir, 'apps', 'social', 'snapchat', 'snapchat.py'), 'w') as stream:
+        stream.write('class Snapchat:\n    pass\n')
+    assert registry.is_stale()
+    assert AppRegistry.load(base_dir).get('snapchat')['device_count'] == 1
+
+
+def test_unreadable_or_old_cache_is_rebuilt(base_dir):
+    registry = AppRegistry(base_dir)
+    os.makedirs(os.path.dirname(registry.cache_file))
+    for content in ('{not json', json.dumps({'version': 0, 'stamp': [], 'apps': {}})):
+        with open(registry.cache_file, 'w') as stream:
+            stream.write(content)
+        assert sorted(AppRegistry.load(base_dir).apps) == ['facebook', 'whatsapp']
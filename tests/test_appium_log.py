@@ -0,0 +1,69 @@
+"""Tests of the appium log capture."""
+import io
+
+# Import core modules
+from core.devices.appium_log import AppiumLogParser, AppiumLogReader, route_name
+from core.devices.command_metrics import SERVER_METRICS, CommandMetrics
+
+SESSION = '/wd/hub/session/5f1c3e2a-8d21-4c1e-b6f2-0f3a9c7d1e44'
+FIND_ELEMENT_LOG = [
+    '[HTTP] --> POST {sid}/element'.format(sid=SESSION),
+    '[HTTP] {"using":"accessibility id","value":"Send"}',
+    '[W3C (5f1c3e2a)] Calling AppiumDriver.findElement() with args: ["accessibility id","Send"]',
+    '[W3C (5f1c3e2a)] Responding to client with driver.findElement() result: {"element-6066":"12"}',
+    '[HTTP] <-- POST {sid}/element 200 125 ms - 137'.format(sid=SESSION),
+]
+
+
+def colored(line):
+    """Return a log line with the ANSI colors appium uses on a terminal."""
+    return line.replace('[HTTP]', '\x1b[35m[HTTP]\x1b[39m').replace(' ms', '\x1b[90m ms\x1b[39m')
+
+
+def test_route_name_drops_session_and_element_ids():
+    assert route_name('POST', SESSION + '/element/12/click') == 'POST /element/:id/click'
+    assert route_name('GET', SESSION + '/source?format=xml') == 'GET /source'
+    assert route_name('DELETE', SESSION) == 'DELETE /'
+    assert route_name('GET', '/wd/hub/status') == 'GET /wd/hub/status'
+
+
+def test_response_is_named_after_driver_call():
+    metrics = CommandMetrics()
+    parser = AppiumLogParser('MOBILE_1', metrics)
+    outputs = [parser.feed(line) for line in FIND_ELEMENT_LOG]
+    assert outputs == [None, None, None, None, ('findElement', 0.125)]
+    assert metrics.to_dict()['MOBILE_1']['findElement']['count'] == 1
+    assert parser.commands == 1
+
+
+def test_ansi_colors_are_ignored():
+    parser = AppiumLogParser('MOBILE_1', CommandMetrics())
+    outputs = [parser.feed(colored(line)) for line in FIND_ELEMENT_LOG]
+    assert outputs[-1] == ('findElement', 0.125)
+
+
+def test_response_without_driver_call_is_named_after_route():
+    parser = AppiumLogParser('MOBILE_1', CommandMetrics())
+    assert parser.feed('[HTTP] <-- GET {sid}/source 200 8.5 ms - 2048'.format(sid=SESSION)) == \
+        ('GET /source', 0.0085)
+
+
+def test_driver_call_belongs_to_latest_pending_request():
+    parser = AppiumLogParser('MOBILE_1', CommandMetrics())
+    parser.feed('[HTTP] --> GET /wd/hub/status')
+    parser.feed('[HTTP] --> POST {sid}/element/12/click'.format(sid=SESSION))
+    parser.feed('[W3C (5f1c3e2a)] Calling AppiumDriver.click() with args: ["12"]')
+    assert parser.feed('[HTTP] <-- POST {sid}/element/12/click 200 40 ms - 14'.format(sid=SESSION)) == \
+        ('click', 0.04)
+    assert parser.feed('[HTTP] <-- GET /wd/hub/status 200 2 ms - 80') == ('GET /wd/hub/status', 0.002)
+
+
+def test_reader_copies_output_to_rotated_log_while_parsing(tmp_path):
+    output = io.BytesIO(''.join(line + '\n' for line in FIND_ELEMENT_LOG * 2).encode('utf-8'))
+    path = str(tmp_path / 'appium_1.log')
+    reader = AppiumLogReader(output, path, 'MOBILE_1', max_bytes=500, backup_count=2)
+    reader.run()
+    SERVER_METRICS.reset()
+    with open(path + '.1', 'rb') as rotated, open(path, 'rb') as current:
+        assert (rotated.read() + current.read()).decode('utf-8').splitlines() == FIND_ELEMENT_LOG * 2
+    assert reader.parser.commands == 2
@@ -0,0 +1,38 @@
+"""Tests of appium server readiness checks against the fake appium server."""
+import socket
+
+import pytest
+
+# Import core modules
+from core.devices.appium_server import is_server_ready, status_url, wait_for_server
+from core.devices.wait import WaitTimeoutError
+
+
+def closed_port_url():
+    """Return a WebDriver url on a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return 'http://127.0.0.1:{port}/wd/hub'.format(port=port)
+
+
+def test_status_url():
+    assert status_url('http://localhost:4723/wd/hub/') == 'http://localhost:4723/wd/hub/status'
+
+
+def test_is_server_ready(fake_server):
+    assert is_server_ready(fake_server.url)
+
+
+def test_is_server_ready_raises_without_server():
+    with pytest.raises(OSError):
+        is_server_ready(closed_port_url())
+
+
+def test_wait_for_server_returns_startup_time(fake_server):
+    assert 0 <= wait_for_server(fake_server.url) < 5
+
+
+def test_wait_for_server_times_out_without_server():
+    with pytest.raises(WaitTimeoutError):
+        wait_for_server(closed_port_url(), {'SERVER_READY_TIMEOUT': 0.3, 'POLL_INTERVAL': 0.05})
@@ -0,0 +1,118 @@
+"""Tests of the asyncio WebDriver client against the fake appium server."""
+import asyncio
+
+import pytest
+
+# Import core modules
+from core.devices.actions import ActionBatch
+from core.devices.async_driver import AsyncAndroidDevice, AsyncWebDriver, AsyncWebDriverError, NoSuchElementError
+from core.devices.command_metrics import COMMAND_METRICS
+from core.devices.wait import WaitTimeoutError
+
+FAST_WAIT = {'TIMEOUT': 0.5, 'POLL_INTERVAL': 0.01, 'MAX_INTERVAL': 0.05}
+
+
+def run_on_device(url, flow, device=None):
+    """Run a coroutine function on an AsyncAndroidDevice of a new session, then quit it."""
+    async def _main():
+        driver = AsyncWebDriver(url)
+        driver.device = device
+        await driver.start_session({'platformName': 'Android'})
+        try:
+            return await flow(AsyncAndroidDevice(driver, device, FAST_WAIT))
+        finally:
+            await driver.quit()
+    return asyncio.run(_main())
+
+
+def test_commands_are_recorded_under_selenium_names(fake_server):
+    async def _flow(device):
+        element = await device.return_element('access', 'WhatsApp')
+        await device.driver.get_attribute(element, 'bounds')
+        await device.get_page_source()
+
+    COMMAND_METRICS.reset()
+    run_on_device(fake_server.url, _flow, 'MOBILE_ASYNC')
+    commands = COMMAND_METRICS.to_dict()['MOBILE_ASYNC']
+    COMMAND_METRICS.reset()
+    assert set(commands) == {'newSession', 'findElement[accessibility id]', 'getElementAttribute',
+                             'getPageSource', 'quit'}
+
+
+def test_wait_for_times_out_on_missing_element(fake_server):
+    async def _flow(device):
+        await device.wait_for(lambda dev: dev.return_element('access', 'No such app'), timeout=0.1)
+
+    with pytest.raises(WaitTimeoutError):
+        run_on_device(fake_server.url, _flow)
+
+
+def test_wait_for_awaits_coroutine_conditions(fake_server):
+    async def _flow(device):
+        return await device.wait_for(lambda dev: dev.return_element('access', 'WhatsApp'))
+
+    assert run_on_device(fake_server.url, _flow)
+
+
+def test_missing_element_raises_no_such_element(fake_server):
+    async def _flow(device):
+        await device.return_element('access', 'No such app')
+
+    with pytest.raises(NoSuchElementError):
+        run_on_device(fake_server.url, _flow)
+
+
+def test_press_and_slide_holds_before_moving():
+    actions = ActionBatch(None).press_and_slide(10, 20, 300, 400, 1500).payload()['actions'][0]['actions']
+    assert [action['type'] for action in actions] == ['pointerMove', 'pointerDown', 'pause',
+                                                      'pointerMove', 'pointerUp']
+    assert actions[2]['duration'] == 1500
+    assert (actions[3]['x'], actions[3]['y']) == (300, 400)
+
+
+def test_commands_reuse_one_keep_alive_connection(fake_server):
+    async def _flow(device):
+        for _num in range(5):
+            await device.get_page_source()
+        return device.driver.pool
+
+    pool = run_on_device(fake_server.url, _flow)
+    assert pool.requests == 7
+    assert pool.connections_opened == 1
+
+
+def test_click_opens_app_and_types_into_field(fake_server):
+    async def _flow(device):
+        await device.click_element('access', 'WhatsApp')
+        await device.click_using_class('Samsung Testing 1')
+        activity = await device.get_current_activity()
+        await device.click_using_class('Hello!', search_text='Type a message')
+        return activity, fake_server.sessions[device.driver.session_id].typed
+
+    assert run_on_device(fake_server.url, _flow) == ('.Conversation', ['Hello!'])
+
+
+def test_sessions_run_concurrently_on_one_loop(fake_server):
+    async def _session():
+        driver = AsyncWebDriver(fake_server.url)
+        await driver.start_session({'platformName': 'Android'})
+        try:
+            return driver.session_id, await driver.current_activity()
+        finally:
+            await driver.quit()
+
+    async def _main():
+        return await asyncio.gather(_session(), _session(), _session())
+
+    results = asyncio.run(_main())
+    assert len({session_id for session_id, _activity in results}) == 3
+
+
+def test_unsupported_command_raises_driver_error(fake_server):
+    async def _flow(device):
+        await device.driver.execute('GET', '/no/such/route')
+
+    with pytest.raises(AsyncWebDriverError) as info:
+        run_on_device(fake_server.url, _flow)
+    assert info.value.status == 404
+    assert not isinstance(info.value, NoSuchElementError)
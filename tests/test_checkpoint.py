@@ -0,0 +1,119 @@
+"""Tests of checkpoints and resumed feature runs."""
+import json
+
+import pytest
+
+# Import core modules
+from core.checkpoint import Checkpoint, step_names
+
+STEPS = ['put_status', 'open_chats', 'perform_chat']
+
+
+def test_step_names_number_repeated_methods():
+    features = (('send_friend_request', {}), ('check_in', {}), ('send_friend_request', {}))
+    assert step_names(features) == ['send_friend_request', 'check_in', 'send_friend_request#2']
+
+
+def test_complete_writes_status_and_steps(tmp_path):
+    checkpoint = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    checkpoint.complete('put_status', 1.23456, output={'sent': 1})
+    with open(checkpoint.path) as stream:
+        data = json.load(stream)
+    assert data['status'] == 'incomplete'
+    assert data['steps'] == STEPS
+    assert data['completed']['put_status']['seconds'] == 1.235
+    assert data['completed']['put_status']['output'] == {'sent': 1}
+    for step in STEPS[1:]:
+        checkpoint.complete(step, 0.0)
+    with open(checkpoint.path) as stream:
+        assert json.load(stream)['status'] == 'completed'
+
+
+def test_complete_keeps_repr_of_other_outputs(tmp_path):
+    checkpoint = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    checkpoint.complete('put_status', 0.0, output=object)
+    assert checkpoint.completed['put_status']['output'] == repr(object)
+
+
+def test_load_returns_steps_of_incomplete_run(tmp_path):
+    Checkpoint('whatsapp', STEPS, directory=str(tmp_path)).complete('put_status', 0.0)
+    checkpoint = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    assert checkpoint.load() == ['put_status']
+    assert checkpoint.is_done('put_status')
+    assert not checkpoint.is_done('open_chats')
+
+
+def test_load_ignores_missing_other_and_completed_checkpoints(tmp_path):
+    assert Checkpoint('whatsapp', STEPS, directory=str(tmp_path)).load() == []
+    Checkpoint('whatsapp', STEPS[:2], directory=str(tmp_path)).complete('put_status', 0.0)
+    assert Checkpoint('whatsapp', STEPS, directory=str(tmp_path)).load() == []
+    finished = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    for step in STEPS:
+        finished.complete(step, 0.0)
+    assert Checkpoint('whatsapp', STEPS, directory=str(tmp_path)).load() == []
+
+
+def make_app(checkpoint=None):
+    """Return an app recording its feature calls, skipping the test without appium."""
+    pytest.importorskip('appium')
+    # pylint: disable=import-outside-toplevel
+    from apps.base_app import BaseApp
+
+    class StepApp(BaseApp):
+        """App with three feature steps and no devices."""
+
+        FEATURES = tuple((step, {}) for step in STEPS)
+
+        def __init__(self):  # pylint: disable=super-init-not-called
+            """Initialization Method."""
+            self.checkpoint = checkpoint
+            self.calls = []
+
+        def put_status(self):
+            """Record the feature call."""
+            self.calls.append('put_status')
+
+        def open_chats(self):
+            """Record the feature call."""
+            self.calls.append('open_chats')
+
+        def perform_chat(self):
+            """Record the feature call."""
+            self.calls.append('perform_chat')
+
+        def restore_state(self, completed):
+            """Record the restored steps."""
+            self.calls.append(('restore', completed))
+
+        def all_features(self):
+            """Run all features."""
+            self.run_features()
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            """Exit method."""
+
+    return StepApp()
+
+
+def test_resumed_run_skips_completed_steps(tmp_path):
+    previous = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    previous.complete('put_status', 0.0)
+    previous.complete('open_chats', 0.0)
+    checkpoint = Checkpoint('whatsapp', STEPS, directory=str(tmp_path))
+    checkpoint.load()
+    app = make_app(checkpoint)
+    assert [step for step, _seconds in app.run_features()] == ['perform_chat']
+    assert app.calls == [('restore', ['put_status', 'open_chats']), 'perform_chat']
+    assert checkpoint.is_done('perform_chat')
+
+
+def test_selected_features_start_from_preceding_state():
+    app = make_app()
+    app.run_features(['perform_chat'])
+    assert app.calls == [('restore', ['put_status', 'open_chats']), 'perform_chat']
+
+
+def test_full_run_restores_nothing():
+    app = make_app()
+    app.all_features()
+    assert app.calls == STEPS
@@ -0,0 +1,22 @@
+"""Tests of the command latency metrics."""
+# Import core modules
+from core.devices.command_metrics import PROMETHEUS_BUCKETS, CommandMetrics, LatencyHistogram
+
+
+def test_prometheus_buckets_count_latencies_up_to_their_bound():
+    histogram = LatencyHistogram()
+    for seconds in (0.0049, 0.005, 0.0051, 0.01, 0.3, 120):
+        histogram.record(seconds)
+    counts = dict(zip(PROMETHEUS_BUCKETS, histogram.cumulative_counts()))
+    assert (counts[0.005], counts[0.01], counts[0.25], counts[0.5], counts[60]) == (2, 4, 4, 5, 5)
+
+
+def test_prometheus_text_ends_buckets_with_total_count():
+    metrics = CommandMetrics()
+    metrics.record('MOBILE_1', 'findElement[xpath]', 0.05)
+    metrics.record('MOBILE_1', 'findElement[xpath]', 0.051)
+    lines = metrics.to_prometheus().splitlines()
+    labels = 'device="MOBILE_1",command="findElement[xpath]"'
+    assert 'appium_command_duration_seconds_bucket{{{lb},le="0.05"}} 1'.format(lb=labels) in lines
+    assert 'appium_command_duration_seconds_bucket{{{lb},le="0.1"}} 2'.format(lb=labels) in lines
+    assert 'appium_command_duration_seconds_bucket{{{lb},le="+Inf"}} 2'.format(lb=labels) in lines
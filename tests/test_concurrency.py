@@ -0,0 +1,25 @@
+"""Tests of the concurrency helpers."""
+import pytest
+
+# Import core modules
+from core.concurrency import ParallelExecutionError, run_async_in_parallel, run_in_parallel
+
+
+def connect(server):
+    """Return a device name, failing for the second server."""
+    if server == 'SERVER_2':
+        raise ConnectionError('server not ready')
+    return 'device of ' + server
+
+
+async def connect_async(server):
+    """Coroutine version of connect."""
+    return connect(server)
+
+
+@pytest.mark.parametrize('runner,func', [(run_in_parallel, connect), (run_async_in_parallel, connect_async)])
+def test_error_keeps_results_of_succeeded_items(runner, func):
+    with pytest.raises(ParallelExecutionError) as info:
+        runner(func, ['SERVER_1', 'SERVER_2'])
+    assert info.value.results == {'SERVER_1': 'device of SERVER_1'}
+    assert isinstance(info.value.errors['SERVER_2'], ConnectionError)
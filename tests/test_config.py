@@ -0,0 +1,72 @@
+"""Tests of the YAML configuration cache."""
+import os
+from types import MappingProxyType
+
+import pytest
+
+# Import core modules
+from core.config import CONFIG_CACHE_DIR_ENV, clear_config_cache, read_config_file, thaw
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    """YAML config file, with the process cache cleared around the test."""
+    path = tmp_path / 'app_config.yaml'
+    path.write_text('SEND: Send\nMEDIA_LIST: [Photo, Video]\nSERVER_1: {PORT: 4723}\n')
+    clear_config_cache()
+    yield str(path)
+    clear_config_cache()
+
+
+def rewrite(path, text):
+    """Write the file with a modification time clearly after the previous one."""
+    stat = os.stat(path)
+    with open(path, 'w') as stream:
+        stream.write(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+def test_configs_are_frozen_and_shared(config_file):
+    config = read_config_file(config_file)
+    assert isinstance(config, MappingProxyType)
+    assert isinstance(config['SERVER_1'], MappingProxyType)
+    assert config['MEDIA_LIST'] == ('Photo', 'Video')
+    with pytest.raises(TypeError):
+        config['SEND'] = 'Post'
+    assert read_config_file(config_file) is config
+
+
+def test_thaw_returns_mutable_copy(config_file):
+    config = thaw(read_config_file(config_file))
+    config['SERVER_1']['PORT'] = 4823
+    assert config == {'SEND': 'Send', 'MEDIA_LIST': ['Photo', 'Video'], 'SERVER_1': {'PORT': 4823}}
+    assert read_config_file(config_file)['SERVER_1']['PORT'] == 4723
+
+
+def test_changed_file_is_read_again(config_file):
+    config = read_config_file(config_file)
+    rewrite(config_file, 'SEND: Post\n')
+    assert read_config_file(config_file) is not config
+    assert dict(read_config_file(config_file)) == {'SEND': 'Post'}
+
+
+def test_disk_cache_is_json_and_follows_file_changes(config_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(CONFIG_CACHE_DIR_ENV, str(cache_dir))
+    read_config_file(config_file)
+    assert [name[-5:] for name in os.listdir(str(cache_dir))] == ['.json']
+    if hasattr(os, 'getuid'):
+        assert os.stat(str(cache_dir)).st_mode & 0o777 == 0o700
+    clear_config_cache()
+    assert read_config_file(config_file)['SEND'] == 'Send'
+    rewrite(config_file, 'SEND: Post\n')
+    clear_config_cache()
+    assert dict(read_config_file(config_file)) == {'SEND': 'Post'}
+
+
+def test_data_changed_by_json_is_not_cached_on_disk(config_file, tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(CONFIG_CACHE_DIR_ENV, str(cache_dir))
+    rewrite(config_file, 'KEY_CODES: {66: enter}\n')
+    assert dict(read_config_file(config_file)['KEY_CODES']) == {66: 'enter'}
+    assert os.listdir(str(cache_dir)) == []
@@ -0,0 +1,175 @@
+"""Tests of the fake appium server."""
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+# Import core modules
+from core.devices.fake_appium import KEYCODE_BACK, KEYCODE_PASTE, FakeSession, Scenario, WebDriverError
+
+LAUNCHER = '''PACKAGE: 'com.android.launcher3'
+START: 'home'
+SCREENS:
+  home:
+    ACTIVITY: '.Launcher'
+    SOURCE: |
+      <hierarchy rotation="0">
+        <android.widget.FrameLayout content-desc="Notes" bounds="[0,0][200,200]">
+          <android.widget.ImageView bounds="[20,20][180,180]"/>
+        </android.widget.FrameLayout>
+      </hierarchy>
+    ON_CLICK:
+      - MATCH: {content-desc: 'Notes'}
+        GOTO: 'notes.home'
+'''
+NOTES = '''PACKAGE: 'com.notes'
+START: 'home'
+SCREENS:
+  home:
+    BACK: 'launcher.home'
+    ON_KEY:
+      66: 'note'
+    SOURCE: |
+      <hierarchy rotation="0">
+        <android.widget.LinearLayout bounds="[0,0][1080,1920]">
+          <android.widget.TextView text="Shopping list" resource-id="com.notes:id/title" bounds="[0,0][1080,100]"/>
+          <android.widget.TextView text="Holiday plans" resource-id="com.notes:id/title" bounds="[0,100][1080,200]"/>
+          <android.widget.ImageButton content-desc="New note" bounds="[900,1700][1060,1860]"/>
+        </android.widget.LinearLayout>
+      </hierarchy>
+    ON_CLICK:
+      - MATCH: {text: 'Shopping list'}
+        GOTO: '{goto}'
+  note:
+    BACK: 'home'
+    SOURCE: |
+      <hierarchy rotation="0">
+        <android.widget.EditText text="Milk" bounds="[0,0][1080,1920]"/>
+      </hierarchy>
+'''
+
+
+@pytest.fixture
+def scenario_dir(tmp_path):
+    """Return a function writing a launcher and a notes app whose first note goes to a screen."""
+    def _write(goto='note'):
+        (tmp_path / 'launcher.yaml').write_text(LAUNCHER)
+        (tmp_path / 'notes.yaml').write_text(NOTES.replace('{goto}', goto))
+        (tmp_path / 'README.txt').write_text('not a scenario')
+        return str(tmp_path)
+    return _write
+
+
+@pytest.fixture
+def session(scenario_dir):
+    """Session on the launcher of the notes scenario."""
+    return FakeSession(Scenario.load(scenario_dir()), {})
+
+
+def request(server, method, path, payload=None):
+    """Send a WebDriver command, returning the HTTP status and the value of the response."""
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(server.url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read().decode('utf-8'))['value']
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read().decode('utf-8'))['value']
+
+
+def test_scenarios_are_qualified_by_file_name(scenario_dir):
+    scenario = Scenario.load(scenario_dir())
+    assert sorted(scenario.screens) == ['launcher.home', 'notes.home', 'notes.note']
+    assert scenario.start == 'launcher.home'
+    assert scenario.packages == {'com.android.launcher3': 'launcher.home', 'com.notes': 'notes.home'}
+    note = scenario.screens['notes.note']
+    assert (note.package, note.activity, note.back) == ('com.notes', '.NoteActivity', 'notes.home')
+    assert scenario.screens['notes.home'].on_key == {66: 'notes.note'}
+    assert 'com.whatsapp' in Scenario.load().packages
+
+
+def test_unknown_screen_is_rejected(scenario_dir):
+    with pytest.raises(ValueError, match='notes.home goes to unknown screen notes.settings'):
+        Scenario.load(scenario_dir(goto='settings'))
+
+
+def test_locator_strategies(session):
+    session.goto('notes.home')
+    screen = session.screen
+
+    def _texts(using, value):
+        return [node.get('text') or node.get('content-desc') for node in screen.find(using, value)]
+
+    assert _texts('accessibility id', 'New note') == ['New note']
+    assert _texts('id', 'com.notes:id/title') == ['Shopping list', 'Holiday plans']
+    assert _texts('css selector', '#com.notes:id/title') == ['Shopping list', 'Holiday plans']
+    assert _texts('class name', 'android.widget.ImageButton') == ['New note']
+    assert _texts('xpath', '//android.widget.TextView[@text="Holiday plans"]') == ['Holiday plans']
+    assert _texts('xpath', '(//android.widget.TextView)[2]') == ['Holiday plans']
+    assert _texts('xpath', '/hierarchy/android.widget.LinearLayout/android.widget.ImageButton') == ['New note']
+    assert _texts('-android uiautomator', 'new UiSelector().textContains("list")') == ['Shopping list']
+    assert _texts('-android uiautomator', 'new UiSelector().resourceId("com.notes:id/title").instance(1)') == \
+        ['Holiday plans']
+    assert _texts('-android uiautomator', 'new UiScrollable(new UiSelector().scrollable(true))'
+                                          '.scrollIntoView(new UiSelector().description("New note"))') == ['New note']
+    for using, value in (('name', 'New note'), ('-android uiautomator', 'new UiSelector().checked(true)'),
+                         ('xpath', '//*[@text=')):
+        with pytest.raises(WebDriverError) as error:
+            screen.find(using, value)
+        assert (error.value.status, error.value.error) == (400, 'invalid selector')
+
+
+def test_clicks_follow_transitions_of_the_node_or_its_parents(session):
+    icon = session.screen.find('class name', 'android.widget.ImageView')[0]
+    session.click(icon)
+    assert session.screen.name == 'notes.home'
+    revision = session.revision
+    session.click(session.screen.find('accessibility id', 'New note')[0])
+    assert (session.screen.name, session.revision) == ('notes.home', revision + 1)
+    session.tap(500, 50)
+    assert session.screen.name == 'notes.note'
+
+
+def test_back_and_key_codes_move_between_screens(session):
+    session.activate_app('com.notes')
+    session.press_keycode(66)
+    assert session.screen.name == 'notes.note'
+    session.press_keycode(KEYCODE_BACK)
+    session.back()
+    assert session.screen.name == 'launcher.home'
+    session.back()
+    assert session.screen.name == 'launcher.home'
+    session.clipboard = 'Eggs'
+    session.press_keycode(KEYCODE_PASTE)
+    assert session.typed == ['Eggs']
+    with pytest.raises(WebDriverError):
+        session.activate_app('com.unknown')
+
+
+def test_elements_go_stale_when_the_screen_changes(session):
+    session.activate_app('com.notes')
+    element_id = session.element_id(session.screen.find('accessibility id', 'New note')[0])
+    assert session.element_id(session.screen.find('accessibility id', 'New note')[0]) == element_id
+    session.press_keycode(66)
+    with pytest.raises(WebDriverError, match='not on the current screen'):
+        session.node(element_id)
+    assert session.terminate_app('com.notes')
+    assert session.screen.name == 'launcher.home'
+
+
+def test_server_answers_webdriver_commands(fake_server):
+    status, value = request(fake_server, 'POST', '/session', {'desiredCapabilities': {'platformName': 'Android'}})
+    assert status == 200
+    session_path = '/session/' + value['sessionId']
+    status, element = request(fake_server, 'POST', session_path + '/element',
+                              {'using': 'accessibility id', 'value': 'WhatsApp'})
+    assert request(fake_server, 'POST', session_path + '/element/{el}/click'.format(el=element['ELEMENT']), {}) == \
+        (200, None)
+    assert request(fake_server, 'GET', session_path + '/appium/device/current_package') == (200, 'com.whatsapp')
+    assert request(fake_server, 'GET', session_path + '/source')[1].startswith('<hierarchy revision="1"')
+    assert request(fake_server, 'POST', session_path + '/element', {'using': 'id', 'value': 'missing'})[0] == 404
+    assert request(fake_server, 'POST', session_path + '/unknown', {})[1]['error'] == 'unknown command'
+    assert request(fake_server, 'DELETE', session_path) == (200, None)
+    assert request(fake_server, 'GET', session_path + '/source')[1]['error'] == 'invalid session id'
@@ -0,0 +1,18 @@
+"""Tests of the log formatters."""
+import logging
+import sys
+
+# Import core modules
+from core.logger import LogFormatter
+
+
+def test_log_formatter_appends_traceback():
+    try:
+        raise ValueError('element not found')
+    except ValueError:
+        record = logging.LogRecord('Android_Apps', logging.ERROR, __file__, 10, 'Automation failed!', None,
+                                   sys.exc_info(), func='run_app')
+    lines = LogFormatter().format(record).splitlines()
+    assert 'Automation failed!' in lines[0]
+    assert lines[1] == 'Traceback (most recent call last):'
+    assert lines[-1] == 'ValueError: element not found'
@@ -0,0 +1,111 @@
+"""Tests of session recording and replay."""
+import asyncio
+import gzip
+import shutil
+
+import pytest
+
+# Import core modules
+from core.devices.async_driver import AsyncWebDriver
+from core.devices.recording import FLUSH_EVERY, RECORDER, TraceWriter, load_trace, start_replay_server
+
+
+class FakeConnection:
+    """Remote connection deleting the session id of W3C commands, as selenium 3 does."""
+
+    _commands = {'getPageSource': ('GET', '/session/$sessionId/source')}
+
+    @staticmethod
+    def execute(_command, params):
+        """Answer a command after removing the session id from its parameters."""
+        del params['sessionId']
+        return {'value': '<hierarchy/>'}
+
+
+class FakeDriver:
+    """Selenium driver with a fake remote connection."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.command_executor = FakeConnection()
+        self.capabilities = {'platformName': 'Android'}
+
+
+async def run_flow(url, device=None):
+    """Open WhatsApp from the home screen and return the responses of the commands."""
+    driver = AsyncWebDriver(url)
+    driver.device = device
+    responses = [await driver.start_session({'platformName': 'Android'})]
+    element = await driver.find_element('access', 'WhatsApp')
+    await driver.click(element)
+    responses.append(await driver.current_activity())
+    responses.append(await driver.page_source())
+    responses.append(await driver.page_source())
+    await driver.quit()
+    return responses
+
+
+def test_instrument_records_session_path(tmp_path):
+    """Paths are filled in with the session id removed by selenium during the command."""
+    driver = FakeDriver()
+    RECORDER.enable(str(tmp_path))
+    try:
+        RECORDER.instrument(driver, 'MOBILE_1')
+        driver.command_executor.execute('getPageSource', {'sessionId': 'abc'})
+    finally:
+        paths = RECORDER.disable()
+    sessions, commands = load_trace(paths[0])
+    assert sessions[0]['session'] == 'abc'
+    assert commands[0]['p'] == '/session/abc/source'
+
+
+def test_record_and_replay_round_trip(tmp_path, fake_server):
+    """A session recorded against the fake server replays with the same responses."""
+    RECORDER.enable(str(tmp_path))
+    try:
+        recorded = asyncio.run(run_flow(fake_server.url, 'MOBILE_1'))
+    finally:
+        paths = RECORDER.disable()
+    replay = start_replay_server(paths[0], speed=0)
+    try:
+        replayed = asyncio.run(run_flow(replay.url))
+    finally:
+        replay.shutdown()
+        replay.server_close()
+    assert replayed == recorded
+    assert replay.stats['missing'] == 0
+
+
+def test_replay_answers_new_session_in_w3c_form(tmp_path, fake_server):
+    """New sessions are answered as recorded, with session id and capabilities in 'value'."""
+    RECORDER.enable(str(tmp_path))
+    try:
+        asyncio.run(run_flow(fake_server.url, 'MOBILE_1'))
+    finally:
+        paths = RECORDER.disable()
+    replay = start_replay_server(paths[0], speed=0)
+    try:
+        status, response = replay.respond('POST', '/session', {'capabilities': {}})
+    finally:
+        replay.shutdown()
+        replay.server_close()
+    assert status == 200
+    assert 'sessionId' not in response
+    assert set(response['value']) == {'sessionId', 'capabilities'}
+
+
+def test_load_trace_keeps_commands_of_cut_short_gzip_trace(tmp_path):
+    """A compressed trace copied before it was closed loads up to its last flush."""
+    path = str(tmp_path / 'MOBILE_1.trace.gz')
+    writer = TraceWriter(path, 'MOBILE_1')
+    for num in range(FLUSH_EVERY + 5):
+        writer.command('GET', '/session/abc/source', None, 200, {'value': str(num)}, 0.0, 0.01)
+    copy = str(tmp_path / 'crashed.trace.gz')
+    shutil.copyfile(path, copy)
+    writer.close()
+    with pytest.raises(EOFError):
+        with gzip.open(copy, 'rt') as stream:
+            stream.read()
+    sessions, commands = load_trace(copy)
+    assert sessions[0]['session'] == 'abc'
+    assert [record['r']['value'] for record in commands] == [str(num) for num in range(FLUSH_EVERY)]
@@ -0,0 +1,81 @@
+"""Tests of the device farm scheduler."""
+import threading
+import time
+
+# Import core modules
+from core.executor import DeviceScheduler
+
+
+def job(app, device_count=1):
+    """Return a job of the queue."""
+    return {'app': app, 'category': 'apps', 'device_count': device_count}
+
+
+def finished(app, servers, seconds=0.0):
+    """Return the result dict of a passed run."""
+    return {'app': app, 'category': 'apps', 'status': 'passed', 'seconds': seconds, 'servers': servers}
+
+
+def test_jobs_run_in_queue_order_on_one_device():
+    started = []
+
+    def _run_job(queued, servers):
+        started.append(queued['app'])
+        return finished(queued['app'], servers)
+
+    results = DeviceScheduler(['SERVER_1'], _run_job).run([job('whatsapp'), job('youtube'), job('facebook')])
+    assert started == ['whatsapp', 'youtube', 'facebook']
+    assert [result['devices'] for result in results] == [['SERVER_1']] * 3
+
+
+def test_waiting_job_does_not_block_later_jobs():
+    facebook_started = threading.Event()
+    started = []
+
+    def _run_job(queued, servers):
+        started.append(queued['app'])
+        if queued['app'] == 'whatsapp':
+            # Holds SERVER_1 until facebook runs beside it.
+            assert facebook_started.wait(5)
+        elif queued['app'] == 'facebook':
+            facebook_started.set()
+        return finished(queued['app'], servers)
+
+    scheduler = DeviceScheduler(['SERVER_1', 'SERVER_2'], _run_job,
+                                affinity={'whatsapp': ['SERVER_1'], 'youtube': ['SERVER_1']})
+    results = scheduler.run([job('whatsapp'), job('youtube'), job('facebook')])
+    assert started.index('facebook') < started.index('youtube')
+    assert [result['devices'] for result in results] == [['SERVER_1'], ['SERVER_1'], ['SERVER_2']]
+
+
+def test_failing_job_releases_its_device_for_the_queue():
+    def _run_job(queued, servers):
+        if queued['app'] == 'youtube':
+            raise ConnectionError('device went offline')
+        return finished(queued['app'], servers)
+
+    results = DeviceScheduler(['SERVER_1'], _run_job).run([job('whatsapp'), job('youtube'), job('facebook')])
+    assert [result['status'] for result in results] == ['passed', 'failed', 'passed']
+    assert results[1]['error'] == repr(ConnectionError('device went offline'))
+    assert results[1]['devices'] == ['SERVER_1']
+
+
+def test_jobs_needing_more_devices_fail_without_waiting():
+    scheduler = DeviceScheduler(['SERVER_1'], lambda queued, servers: finished(queued['app'], servers))
+    results = scheduler.run([job('whatsapp', device_count=2), job('youtube')])
+    assert results[0]['error'] == 'not enough devices'
+    assert results[1]['status'] == 'passed'
+
+
+def test_run_returns_once_all_jobs_ended_and_workers_stopped():
+    def _run_job(queued, servers):
+        time.sleep(0.05)
+        return finished(queued['app'], servers, 0.05)
+
+    scheduler = DeviceScheduler(['SERVER_1', 'SERVER_2'], _run_job)
+    assert scheduler.run([]) == []
+    results = scheduler.run([job('whatsapp', device_count=2), job('youtube'), job('facebook')])
+    # The two-device job holds the whole farm, the others start once it ended. Offsets are rounded to ms.
+    assert min(results[1]['start'], results[2]['start']) + 0.001 >= results[0]['end']
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('device-scheduler')]
+    assert sorted(scheduler._free) == ['SERVER_1', 'SERVER_2']  # pylint: disable=protected-access
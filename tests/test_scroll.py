@@ -0,0 +1,77 @@
+"""Tests of scrolling to an element on the fake appium server."""
+import pytest
+
+android_module = pytest.importorskip('core.devices.android_device')
+NoSuchElementException = android_module.NoSuchElementException
+WebDriverException = android_module.WebDriverException
+
+
+@pytest.fixture
+def chat(android_device, fake_server):
+    """Device on the chat screen of WhatsApp, with the session of the fake server."""
+    android_device.set_scroll_length()
+    android_device.click_element('access', 'WhatsApp', delay=0)
+    android_device.click_using_class('Samsung Testing 1', delay=0)
+    return android_device, fake_server.sessions[android_device.driver.session_id]
+
+
+def without_ui_scrollable(device, session, swipes_to_show=0):
+    """
+    Make the driver reject UiScrollable, and hide elements until the screen was swiped.
+
+    :param swipes_to_show: int
+        Number of screen changes after which the elements show up.
+    :return: list
+        Selectors looked up by the device.
+    """
+    find = device.driver.find_element_by_android_uiautomator
+    shown_at = session.revision + swipes_to_show
+    selectors = []
+
+    def _find(selector):
+        selectors.append(selector)
+        if selector.startswith('new UiScrollable('):
+            raise WebDriverException('Could not parse UiSelector argument: UiScrollable is not supported')
+        if session.revision < shown_at:
+            raise NoSuchElementException('element is below the screen')
+        return find(selector)
+
+    device.driver.find_element_by_android_uiautomator = _find
+    return selectors
+
+
+def test_ui_scrollable_returns_element_in_one_lookup(chat):
+    device, session = chat
+    commands, revision = session.commands, session.revision
+    element = device.scroll_to_element(text='Document', class_name='android.widget.TextView')
+    assert (session.commands, session.revision) == (commands + 1, revision)
+    assert element.text == 'Document'
+    assert device._snapshot is None  # pylint: disable=protected-access
+
+
+def test_screen_without_match_raises_after_plain_lookup(chat):
+    device, session = chat
+    commands = session.commands
+    with pytest.raises(NoSuchElementException):
+        device.scroll_to_element(text='Samsung Testing 3')
+    assert session.commands == commands + 2
+
+
+def test_unsupported_ui_scrollable_falls_back_to_swipes(chat):
+    device, session = chat
+    selectors = without_ui_scrollable(device, session, swipes_to_show=2)
+    element = device.scroll_to_element(description='Attach', max_swipes=5)
+    assert element.get_attribute('content-desc') == 'Attach'
+    assert selectors[1:] == ['new UiSelector().description("Attach")'] * 3
+    assert session.screen.name == 'whatsapp.chat'
+
+
+def test_swipes_are_bounded(chat):
+    device, session = chat
+    revision = session.revision
+    selectors = without_ui_scrollable(device, session, swipes_to_show=10)
+    with pytest.raises(NoSuchElementException):
+        device.scroll_to_element(text='Gallery', horizontal=True, max_swipes=3)
+    assert len(selectors) == 1 + 4
+    assert session.revision == revision + 3
+    assert '.setAsHorizontalList().setMaxSearchSwipes(3)' in selectors[0]
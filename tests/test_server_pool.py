@@ -0,0 +1,49 @@
+"""Tests of the warm appium server pool."""
+import json
+import subprocess
+import sys
+
+# Import core modules
+from core.devices.command_metrics import SERVER_METRICS, CommandMetrics
+from core.devices.server_pool import ServerPool, _PooledServer
+
+
+def exited_process():
+    """Return the handle of a process which already exited."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process
+
+
+def test_check_servers_evicts_dead_idle_server():
+    pool = ServerPool({})
+    pool._servers['SERVER_1'] = _PooledServer(exited_process(), 'http://127.0.0.1:9/wd/hub')
+    pool.check_servers()
+    assert pool.status() == {}
+
+
+def test_server_leased_after_check_is_kept():
+    pool = ServerPool({})
+    server = _PooledServer(exited_process(), 'http://127.0.0.1:9/wd/hub')
+    pool._servers['SERVER_1'] = server
+
+    def lease_during_check(srv):
+        # A client leases the server between the health check and the eviction.
+        srv.leased = True
+        return srv is server and not srv.leased
+
+    assert not pool._evict('SERVER_1', lease_during_check)
+    assert pool.status()['SERVER_1']['leased']
+
+
+def test_release_hands_back_server_metrics_of_the_lease():
+    pool = ServerPool({'SERVER_1': {'NAME': 'Server 1', 'MOBILE_NAME': 'MOBILE_9', 'CMD': 'appium',
+                                    'URL': 'http://127.0.0.1:9/wd/hub'}})
+    SERVER_METRICS.record('MOBILE_9', 'findElement', 0.2)
+    SERVER_METRICS.record('MOBILE_9', 'findElement', 0.4)
+    device, metrics = pool.release('SERVER_1')
+    client_metrics = CommandMetrics()
+    client_metrics.merge(device, json.loads(json.dumps(metrics)))
+    summary = client_metrics.to_dict()['MOBILE_9']['findElement']
+    assert (summary['count'], summary['total_seconds'], summary['max_seconds']) == (2, 0.6, 0.4)
+    assert 'MOBILE_9' not in SERVER_METRICS.to_dict()
@@ -0,0 +1,59 @@
+"""Tests of the sleep audit."""
+import asyncio
+import time
+
+# Import core modules
+from core.devices.wait import Waiter
+from core.sleep_audit import SLEEP_AUDIT
+from core.tracing import trace_step
+
+
+class App:
+    """App with a traced feature, run the way BaseApp.run_feature runs features."""
+
+    mobile_name = 'MOBILE_1'
+
+    @trace_step
+    def send_message(self):
+        """Feature sleeping once."""
+        time.sleep(0)
+
+    @trace_step
+    def make_call(self):
+        """Feature waiting in coroutines, on the call and on a condition."""
+        async def _call():
+            await asyncio.sleep(0.01)
+            await Waiter(self, {'POLL_INTERVAL': 0.01}).until_async(lambda device: next(polls), timeout=1)
+
+        polls = iter([False, True])
+        asyncio.run(_call())
+
+    def run_feature(self, name):
+        """Call a feature method by name."""
+        return getattr(self, name)()
+
+
+def test_sleep_is_attributed_to_traced_feature():
+    SLEEP_AUDIT.reset()
+    SLEEP_AUDIT.enable()
+    try:
+        App().run_feature('send_message')
+    finally:
+        SLEEP_AUDIT.disable()
+    assert [site['feature'] for site in SLEEP_AUDIT.sites()] == ['App.send_message']
+    SLEEP_AUDIT.reset()
+
+
+def test_asyncio_sleeps_and_polls_are_recorded():
+    original_sleep = asyncio.sleep
+    SLEEP_AUDIT.reset()
+    SLEEP_AUDIT.enable()
+    try:
+        App().run_feature('make_call')
+    finally:
+        SLEEP_AUDIT.disable()
+    sites = SLEEP_AUDIT.sites()
+    assert {(site['function'], site['poll']) for site in sites} == {('_call', False), ('until_async', True)}
+    assert {(site['device'], site['feature']) for site in sites} == {('MOBILE_1', 'App.make_call')}
+    assert asyncio.sleep is original_sleep
+    SLEEP_AUDIT.reset()
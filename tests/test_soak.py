@@ -0,0 +1,56 @@
+"""Tests of endurance runs."""
+# Import core modules
+from core.checkpoint import step_names
+from core.soak import SoakRun, process_memory
+
+
+class FakeApp:
+    """App recording the calls made by a soak run."""
+
+    FEATURES = (('send_friend_request', {}), ('check_in', {}), ('send_friend_request', {}))
+    devices = []
+
+    def __init__(self):
+        """Initialization Method."""
+        self.calls = []
+
+    def feature_steps(self, names=None):
+        """Return the named steps of FEATURES, as BaseApp does."""
+        return [(step, name, kwargs) for step, (name, kwargs) in zip(step_names(self.FEATURES), self.FEATURES)
+                if names is None or name in names]
+
+    def run_feature(self, name, **_kwargs):
+        """Record the feature run."""
+        self.calls.append(name)
+        return None, 0.0
+
+    def reset_state(self):
+        """Record the reset."""
+        self.calls.append('reset')
+
+    def restore_state(self, completed):
+        """Record the restored steps."""
+        self.calls.append(('restore', completed))
+
+
+def test_repeated_features_are_kept_apart(tmp_path):
+    records = SoakRun('fake', iterations=1, directory=str(tmp_path)).run(FakeApp())
+    assert list(records[0]['features']) == ['send_friend_request', 'check_in', 'send_friend_request#2']
+
+
+def test_iterations_start_from_reset_and_restored_state(tmp_path):
+    app = FakeApp()
+    SoakRun('fake', iterations=2, features=['check_in'], directory=str(tmp_path)).run(app)
+    assert app.calls == [('restore', ['send_friend_request']), 'check_in',
+                         'reset', ('restore', ['send_friend_request']), 'check_in']
+
+
+def test_nothing_is_restored_before_the_first_step(tmp_path):
+    app = FakeApp()
+    SoakRun('fake', iterations=2, features=['send_friend_request'], directory=str(tmp_path)).run(app)
+    assert app.calls == ['send_friend_request', 'send_friend_request', 'reset',
+                         'send_friend_request', 'send_friend_request']
+
+
+def test_process_memory_is_reported():
+    assert process_memory() > 0
@@ -0,0 +1,168 @@
+"""Tests of the text entry methods of AndroidDevice."""
+import pytest
+
+android_device = pytest.importorskip('core.devices.android_device')
+StaleElementReferenceException = android_device.StaleElementReferenceException
+WebDriverException = android_device.WebDriverException
+
+EDIT_TEXT = 'android.widget.EditText'
+
+
+class FakeField:
+    """Input field in which only some text entry methods land the text."""
+
+    def __init__(self, driver, works=(), fails=(), stale_after=None):
+        """
+        Initialization Method.
+
+        :param works: tuple
+            Methods which put the text into the field.
+        :param fails: tuple
+            Methods which raise a WebDriverException.
+        :param stale_after: int
+            Number of uses after which the field raises StaleElementReferenceException.
+        """
+        self.driver = driver
+        self.works = works
+        self.fails = fails
+        self.stale_after = stale_after
+        self.uses = 0
+        self.text = ''
+        self.received = []
+
+    def _use(self, method):
+        """Count a use of the field, raising the configured errors."""
+        self.uses += 1
+        if self.stale_after is not None and self.uses > self.stale_after:
+            raise StaleElementReferenceException('field is gone')
+        if method in self.fails:
+            raise WebDriverException('{mt} is not supported'.format(mt=method))
+
+    def land(self, method, text):
+        """Put the text into the field if the method works on it."""
+        if method in self.works:
+            self.text = text
+            self.received.append(text)
+
+    def set_value(self, text):
+        """Set the text with the appium set value command."""
+        self._use('set_value')
+        self.land('set_value', text)
+
+    def send_keys(self, text):
+        """Type the text key by key."""
+        self._use('send_keys')
+        self.land('send_keys', text)
+
+    def click(self):
+        """Focus the field."""
+        self._use('click')
+        self.driver.focused = self
+
+    def clear(self):
+        """Empty the field."""
+        self.text = ''
+
+
+class FakeButton:
+    """Send button counting its clicks."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.clicks = 0
+
+    def click(self):
+        """Click the button."""
+        self.clicks += 1
+
+
+class FakeDriver:
+    """Driver pasting and typing into the focused field."""
+
+    def __init__(self):
+        """Initialization Method."""
+        self.focused = None
+        self.clipboard = ''
+        self.shell = []
+        self.send_button = FakeButton()
+
+    def set_clipboard_text(self, text):
+        """Store the clipboard text."""
+        self.clipboard = text
+
+    def press_keycode(self, keycode):
+        """Paste the clipboard into the focused field."""
+        if keycode == android_device.KEY_CODE_DICT['paste']:
+            self.focused.land('clipboard', self.clipboard)
+
+    def execute_script(self, script, args):
+        """Run 'input text' in the shell, typing into the focused field."""
+        assert script == 'mobile: shell'
+        self.shell.append(args['args'])
+        self.focused.land('adb', args['args'][1].replace('%s', ' '))
+
+    def find_element_by_accessibility_id(self, _text):
+        """Return the send button."""
+        return self.send_button
+
+
+class OfflineDevice(android_device.AndroidDevice):
+    """AndroidDevice on a fake driver, with the input fields returned in turn."""
+
+    def create_driver(self, app_server):
+        """Use a fake driver instead of connecting to appium."""
+        self.mobile_name = 'MOBILE_1'
+        self.driver = FakeDriver()
+        self.fields = []
+        self.lookups = []
+
+    def return_button(self, text, class_name='android.widget.TextView'):
+        """Return the next input field."""
+        self.lookups.append((text, class_name))
+        return self.fields.pop(0) if self.fields else None
+
+
+@pytest.fixture
+def device():
+    """Device with a fake driver."""
+    return OfflineDevice('whatsapp', 'SERVER_1')
+
+
+def test_auto_picks_first_method_leaving_the_text(device):
+    field = FakeField(device.driver, works=('clipboard', 'send_keys'))
+    device._enter_text(field, 'Hello!', 'auto')  # pylint: disable=protected-access
+    assert device.text_entry_method == 'clipboard'
+    assert field.text == 'Hello!'
+
+
+def test_auto_skips_methods_raising_errors(device):
+    field = FakeField(device.driver, works=('adb',), fails=('set_value',))
+    device._enter_text(field, 'Hello there', 'auto')  # pylint: disable=protected-access
+    assert device.text_entry_method == 'adb'
+    assert device.driver.shell == [['text', 'Hello%sthere']]
+
+
+def test_remembered_method_is_used_without_checking(device):
+    device.text_entry_method = 'set_value'
+    field = FakeField(device.driver)
+    device._enter_text(field, 'Hello!', 'auto')  # pylint: disable=protected-access
+    assert field.uses == 1
+    assert device.text_entry_method == 'set_value'
+
+
+def test_auto_raises_when_no_method_works(device):
+    with pytest.raises(WebDriverException):
+        device._enter_text(FakeField(device.driver), 'Hello!', 'auto')  # pylint: disable=protected-access
+    assert device.text_entry_method is None
+
+
+def test_stale_field_is_found_again_by_its_hint(device):
+    first = FakeField(device.driver, works=('send_keys',), stale_after=1)
+    second = FakeField(device.driver, works=('send_keys',))
+    device.fields = [first, second]
+    stats = device.send_messages(['Hello!', 'Bye!'], field_text='Type a message', send_id='Send',
+                                 method='send_keys', delay=0)
+    assert device.lookups == [('Type a message', EDIT_TEXT), ('Type a message', EDIT_TEXT)]
+    assert (first.received, second.received) == (['Hello!'], ['Bye!'])
+    assert device.driver.send_button.clicks == 2
+    assert stats['method'] == 'send_keys'
@@ -0,0 +1,86 @@
+"""Tests of the page source snapshot."""
+# Import core modules
+from core.devices.ui_snapshot import UINode, UISnapshot, invalidates_snapshot, parse_bounds, ui_selector
+
+SOURCE = '''<?xml version="1.0" encoding="UTF-8"?>
+<hierarchy rotation="0">
+  <android.widget.FrameLayout class="android.widget.FrameLayout" bounds="[0,0][1080,2280]">
+    <android.widget.EditText class="android.widget.EditText" text="Search" resource-id="com.whatsapp:id/search"
+        bounds="[0,72][1080,228]"/>
+    <android.widget.TextView class="android.widget.TextView" text="CHATS" bounds="[0,228][360,372]"/>
+    <android.widget.TextView class="android.widget.TextView" text="STATUS" bounds="[360,228][720,372]"/>
+    <android.widget.ImageButton class="android.widget.ImageButton" content-desc="Send" bounds="[936,2100][1080,2244]"/>
+    <android.widget.EditText class="android.widget.EditText" text="Type a message" resource-id="com.whatsapp:id/entry"
+        bounds="[0,2100][936,2244]"/>
+    <android.widget.TextView class="android.widget.TextView" text="Search" bounds="[0,400][1080,480]"/>
+  </android.widget.FrameLayout>
+</hierarchy>'''
+
+
+def test_lookups_match_every_given_attribute():
+    snapshot = UISnapshot(SOURCE)
+    assert snapshot.find(class_name='android.widget.EditText', text='Search').resource_id == 'com.whatsapp:id/search'
+    assert snapshot.find(class_name='android.widget.TextView', text='Search').bounds == (0, 400, 1080, 480)
+    assert snapshot.find(content_desc='Send') == UINode('android.widget.ImageButton', '', 'Send', '',
+                                                        (936, 2100, 1080, 2244))
+    assert snapshot.find(resource_id='com.whatsapp:id/entry', text='Search') is None
+    assert snapshot.find(text='Unknown') is None
+
+
+def test_find_all_and_texts_keep_document_order():
+    snapshot = UISnapshot(SOURCE)
+    classes = [node.class_name for node in snapshot.find_all(text='Search')]
+    assert classes == ['android.widget.EditText', 'android.widget.TextView']
+    assert snapshot.texts() == ['CHATS', 'STATUS', 'Search']
+    assert snapshot.texts('android.widget.EditText') == ['Search', 'Type a message']
+    assert len(snapshot.find_all()) == len(snapshot.nodes) == 8
+
+
+def test_unreadable_source_has_no_nodes():
+    snapshot = UISnapshot('<hierarchy><unclosed>')
+    assert snapshot.nodes == []
+    assert snapshot.find(text='CHATS') is None
+
+
+def test_parse_bounds_and_ui_selector():
+    assert parse_bounds('[0,72][1080,228]') == (0, 72, 1080, 228)
+    assert parse_bounds('') is None
+    assert ui_selector(class_name='android.widget.TextView', text='Say "hi"', instance=1) == \
+        'new UiSelector().className("android.widget.TextView").text("Say \\"hi\\"").instance(1)'
+
+
+def test_decorated_methods_drop_the_snapshot_first():
+    class Screen:
+        """Object caching a snapshot, as Device does."""
+
+        def __init__(self):
+            """Initialization Method."""
+            self._snapshot = UISnapshot(SOURCE)
+            self.seen = []
+
+        def invalidate_snapshot(self):
+            """Drop the snapshot."""
+            self._snapshot = None
+
+        @invalidates_snapshot
+        def tap(self):
+            """Record the snapshot seen by the action."""
+            self.seen.append(self._snapshot)
+
+    screen = Screen()
+    screen.tap()
+    assert screen.seen == [None]
+
+
+def test_device_snapshot_is_reused_until_an_action(android_device, fake_server):
+    session = fake_server.sessions[android_device.driver.session_id]
+    android_device.click_element('access', 'WhatsApp', delay=0)
+    snapshot = android_device.snapshot()
+    commands = session.commands
+    assert android_device.snapshot() is snapshot
+    assert android_device.return_button('Samsung Testing 1') is not None
+    # Only the element lookup reached the server, the page source came from the snapshot.
+    assert session.commands == commands + 1
+    android_device.click_using_class('Samsung Testing 1', delay=0)
+    assert android_device._snapshot is None  # pylint: disable=protected-access
+    assert android_device.snapshot().find(resource_id='com.whatsapp:id/entry') is not None
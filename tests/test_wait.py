@@ -0,0 +1,88 @@
+"""Tests of condition based waiting."""
+import asyncio
+import time
+
+import pytest
+
+# Import core modules
+from core.devices.wait import Waiter, WaitTimeoutError, activity_changed, element_gone, element_present
+
+FAST_WAIT = {'TIMEOUT': 0.3, 'POLL_INTERVAL': 0.01, 'BACKOFF': 2, 'MAX_INTERVAL': 0.05}
+
+
+class FakeDevice:
+    """Device whose element appears after a number of lookups."""
+
+    NOT_FOUND_EXCEPTIONS = (LookupError,)
+
+    def __init__(self, found_after=0):
+        """Initialization Method."""
+        self.found_after = found_after
+        self.lookups = 0
+        self.activity = '.Home'
+
+    def return_element(self, el_type, text):
+        """Return the element once it has appeared, raise LookupError before."""
+        self.lookups += 1
+        if self.lookups <= self.found_after:
+            raise LookupError(text)
+        return '{el}={txt}'.format(el=el_type, txt=text)
+
+    def get_current_activity(self):
+        """Return the foreground activity."""
+        return self.activity
+
+
+def test_pauses_grow_by_backoff_up_to_max_interval():
+    waiter = Waiter(None, {'POLL_INTERVAL': 0.1, 'BACKOFF': 2, 'MAX_INTERVAL': 0.5})
+    pauses = waiter._pauses(time.monotonic() + 60)  # pylint: disable=protected-access
+    assert [round(next(pauses), 3) for _num in range(5)] == [0.1, 0.2, 0.4, 0.5, 0.5]
+
+
+def test_pauses_end_at_deadline():
+    waiter = Waiter(None, {'POLL_INTERVAL': 10})
+    pauses = waiter._pauses(time.monotonic() + 0.05)  # pylint: disable=protected-access
+    assert next(pauses) <= 0.05
+    assert list(Waiter(None)._pauses(time.monotonic() - 1)) == []  # pylint: disable=protected-access
+
+
+def test_until_returns_value_once_met_ignoring_lookup_errors():
+    device = FakeDevice(found_after=3)
+    assert Waiter(device, FAST_WAIT).until(element_present('access', 'Send')) == 'access=Send'
+    assert device.lookups == 4
+
+
+def test_until_raises_after_deadline():
+    device = FakeDevice(found_after=1000)
+    start = time.monotonic()
+    with pytest.raises(WaitTimeoutError, match='Send is missing'):
+        Waiter(device, FAST_WAIT).until(element_present('access', 'Send'), message='Send is missing')
+    assert 0.3 <= time.monotonic() - start < 1
+
+
+def test_until_raises_errors_which_are_not_ignored():
+    def _fail(_device):
+        raise ValueError('broken condition')
+
+    with pytest.raises(ValueError):
+        Waiter(FakeDevice(), FAST_WAIT).until(_fail)
+
+
+def test_until_async_awaits_conditions():
+    async def _present(device):
+        return device.return_element('access', 'Send')
+
+    device = FakeDevice(found_after=2)
+    assert asyncio.run(Waiter(device, FAST_WAIT).until_async(_present)) == 'access=Send'
+    with pytest.raises(WaitTimeoutError):
+        asyncio.run(Waiter(FakeDevice(found_after=1000), FAST_WAIT).until_async(_present, timeout=0.05))
+
+
+def test_element_gone_and_activity_changed():
+    device = FakeDevice(found_after=1000)
+    assert element_gone('access', 'Send')(device)
+    assert not element_gone('access', 'Send')(FakeDevice())
+    changed = activity_changed('.Home')
+    assert not changed(device)
+    device.activity = '.Conversation'
+    assert changed(device)